@@ -0,0 +1,578 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+业财融合管理系统 - 接口基准测试
+
+在进程内驱动 server/app.py 的全部路由，数据库由 database/generate_data.py 按多个规模生成
+（固定种子与截止日期，结果可复现），每个规模：
+- 复制一份数据库（写接口会修改数据），在子进程中以 FINANCE_DB_PATH 指向该副本启动应用
+- 每个用例按指定并发发送请求，统计 p50/p95/p99 延迟、吞吐量、错误数与峰值RSS
+- 结果保存为JSON；指定基线时逐项比较 p95 与吞吐量，超过容差视为性能回退（退出码1）
+
+请求通过一个最小的进程内ASGI客户端发送：响应体只计字节数、不在内存中拼接，
+流式与导出接口的峰值RSS反映的是服务端的内存占用。
+
+用法:
+    python benchmarks/endpoints.py [--scales 10k,100k] [--requests 200] [--concurrency 8]
+                                   [--output results.json] [--baseline baseline.json] [--save-baseline]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from argparse import Namespace
+from datetime import date
+from urllib.parse import urlencode
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVER_DIR = os.path.join(ROOT_DIR, 'server')
+DATABASE_DIR = os.path.join(ROOT_DIR, 'database')
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+
+sys.path.insert(0, DATABASE_DIR)
+
+from generate_data import build_database, parse_count
+
+# 生成的数据库与结果的默认位置
+DATA_DIR = os.path.join(BENCHMARK_DIR, 'data')
+DEFAULT_OUTPUT_PATH = os.path.join(BENCHMARK_DIR, 'results', 'endpoints.json')
+DEFAULT_BASELINE_PATH = os.path.join(BENCHMARK_DIR, 'baseline.json')
+
+# 数据生成参数（固定，保证各次运行使用相同的数据）
+DATA_SEED = 42
+DATA_END_DATE = date(2025, 6, 30)
+
+# 基准测试使用的账号
+USERNAME = "admin"
+PASSWORD = "admin"
+
+# 回退判定：p95 增加或吞吐量下降超过容差，且 p95 差值超过噪声下限
+DEFAULT_TOLERANCE = 0.20
+NOISE_FLOOR_MS = 2.0
+
+# 峰值RSS采样间隔（秒）
+RSS_SAMPLE_INTERVAL = 0.005
+
+# 流式、导出与对账等耗时用例的请求数上限
+HEAVY_REQUESTS = 3
+
+# 只读用例的目标可以重复使用；其余（写接口）每个目标只使用一次
+REUSABLE_TARGETS = {"events", "event_batches", "records", "approvals", "reports"}
+
+# 批量查询详情时每次的业务事件数量
+DETAIL_BATCH = 20
+
+
+class Case:
+    """一个基准用例
+
+    path 中的 {id} 由 targets 中的值依次替换；targets 为 "目标名"，由 collect_targets 从数据库查询，
+    每个目标只使用一次（写接口不会重复处理同一行）。params / body 可以是返回值的函数，参数为目标值。
+    """
+
+    def __init__(self, method, path, name=None, params=None, body=None, form=None, targets=None,
+                 requests=None, group="read"):
+        self.method = method
+        self.path = path
+        self.name = name or f"{method} {path}"
+        self.params = params
+        self.body = body
+        self.form = form
+        self.targets = targets
+        self.requests = requests
+        self.group = group
+
+
+def _event_body(_):
+    return {
+        "event_type": "采购", "project_name": "基准测试采购", "amount": 12345.67,
+        "event_date": DATA_END_DATE.isoformat(), "description": "基准测试", "department_id": 5, "created_by": 1,
+    }
+
+
+def _record_body(event_id):
+    return {
+        "business_event_id": event_id, "account_code": "6001001", "account_name": "办公费用",
+        "amount": 100.0, "direction": "支出", "record_date": DATA_END_DATE.isoformat(),
+        "fiscal_year": DATA_END_DATE.year, "fiscal_period": DATA_END_DATE.month,
+        "description": "基准测试", "created_by": 1,
+    }
+
+
+# 写接口放在最后，读接口测量的是生成后的原始数据
+CASES = [
+    Case("POST", "/token", form={"username": USERNAME, "password": PASSWORD}),
+    Case("GET", "/users/me"),
+    Case("GET", "/business_events", params={"limit": 50}),
+    Case("GET", "/business_events", name="GET /business_events?status", params={"status": "已审批", "limit": 50}),
+    Case("GET", "/business_events", name="GET /business_events?keyword",
+         params={"keyword": "服务器", "limit": 50}),
+    Case("GET", "/business_events/stream", requests=HEAVY_REQUESTS),
+    Case("GET", "/business_events/export", params={"format": "csv"}, requests=HEAVY_REQUESTS),
+    Case("GET", "/business_events/unposted", params={"limit": 50}),
+    Case("GET", "/business_events/details", targets="event_batches", params=lambda ids: {"ids": ids}),
+    Case("GET", "/business_events/{id}", targets="events"),
+    Case("GET", "/business_events/{id}/detail", targets="events"),
+    Case("GET", "/business_events/{id}/status", targets="events"),
+    Case("GET", "/business_events/{id}/related", targets="events"),
+    Case("GET", "/business_events/{id}/approvals", targets="events"),
+    Case("GET", "/customers"),
+    Case("GET", "/departments"),
+    Case("GET", "/account_subjects"),
+    Case("GET", "/financial_records", params={"limit": 50}),
+    Case("GET", "/financial_records/stream", requests=HEAVY_REQUESTS),
+    Case("GET", "/financial_records/export", params={"format": "csv"}, requests=HEAVY_REQUESTS),
+    Case("GET", "/financial_records/{id}", targets="records"),
+    Case("GET", "/approvals", params={"limit": 50}),
+    Case("GET", "/approvals", name="GET /approvals?status", params={"status": "待审批", "limit": 50}),
+    Case("GET", "/approvals/stream", requests=HEAVY_REQUESTS),
+    Case("GET", "/approvals/{id}", targets="approvals"),
+    Case("GET", "/budgets", params={"year": DATA_END_DATE.year, "limit": 50}),
+    Case("GET", "/budgets/execution", params={"year": DATA_END_DATE.year}),
+    Case("GET", "/budgets/execution", name="GET /budgets/execution?rollup",
+         params={"year": DATA_END_DATE.year, "rollup": "true"}),
+    Case("GET", "/reports/trial_balance",
+         params={"fiscal_year": DATA_END_DATE.year, "fiscal_period": DATA_END_DATE.month}),
+    Case("GET", "/reports/trial_balance", name="GET /reports/trial_balance?as_of",
+         params={"as_of": DATA_END_DATE.isoformat()}),
+    Case("GET", "/reports"),
+    Case("POST", "/reports/{id}/run", targets="reports", body={}),
+    Case("GET", "/system/db_pool"),
+    Case("GET", "/system/auth_cache"),
+    Case("GET", "/system/report_cache"),
+    Case("GET", "/system/sql_profile"),
+    Case("DELETE", "/system/sql_profile"),
+    Case("GET", "/metrics"),
+    Case("POST", "/system/budget_reconciliation", name="POST /system/budget_reconciliation?dry_run",
+         params={"dry_run": "true"}, requests=HEAVY_REQUESTS),
+    Case("POST", "/business_events", body=_event_body, group="write"),
+    Case("POST", "/business_events/bulk", body=lambda _: {"events": [_event_body(None)] * 100}, group="write"),
+    Case("POST", "/business_events/{id}/submit-to-approval", targets="new_events", group="write"),
+    Case("POST", "/approvals/{id}/approve", targets="approve", group="write"),
+    Case("POST", "/approvals/{id}/reject", targets="reject", group="write"),
+    Case("POST", "/approvals/{id}/update-business-status", targets="approved_approvals",
+         body={"status": "已审批", "remarks": "基准测试"}, group="write"),
+    Case("POST", "/financial_records", targets="unposted", body=_record_body, group="write"),
+    Case("POST", "/financial_records/bulk", targets="unposted_bulk",
+         body=lambda event_id: {"records": [_record_body(event_id)] * 50}, group="write"),
+    Case("POST", "/system/budget_reconciliation", group="write", requests=HEAVY_REQUESTS),
+]
+
+
+# ---- 数据准备 ----
+
+def ensure_database(scale, data_dir):
+    """按规模生成数据库（已存在时直接使用），返回路径"""
+    path = os.path.join(data_dir, f"bench_{scale}_seed{DATA_SEED}_{DATA_END_DATE:%Y%m%d}.db")
+    if os.path.exists(path):
+        return path
+    os.makedirs(data_dir, exist_ok=True)
+
+    events = parse_count(scale)
+    args = Namespace(
+        events=events, years=3, end_date=DATA_END_DATE, seed=DATA_SEED, departments=24,
+        users=min(max(events // 500, 20), 5000), customers=min(max(events // 100, 50), 100000),
+    )
+    print(f"生成 {scale} 规模的数据库: {path}")
+    temp_path = path + ".tmp"
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+    build_database(temp_path, args)
+    os.replace(temp_path, path)
+    return path
+
+
+def collect_targets(db_path, limit, seed):
+    """从数据库中查询各用例的目标id"""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(db_path)
+
+    def ids(sql, params=()):
+        return [row[0] for row in conn.execute(sql, params)]
+
+    def sample(values):
+        values = list(values)
+        rng.shuffle(values)
+        return values[:limit]
+
+    max_event = conn.execute("SELECT MAX(id) FROM business_events").fetchone()[0] or 1
+    max_record = conn.execute("SELECT MAX(id) FROM financial_records").fetchone()[0] or 1
+    max_approval = conn.execute("SELECT MAX(id) FROM approvals").fetchone()[0] or 1
+
+    # 每个事件当前待处理的一级审批（各事件互不相同，并发处理不会冲突）
+    current = sample(ids("""
+        SELECT MIN(a.id) FROM approvals a
+        JOIN business_events e ON a.business_event_id = e.id
+        WHERE a.status = '待审批' AND e.status IN ('待审批', '审批中')
+        GROUP BY a.business_event_id
+    """))
+    half = len(current) // 2
+    targets = {
+        "events": [rng.randint(1, max_event) for _ in range(limit)],
+        "event_batches": [[rng.randint(1, max_event) for _ in range(DETAIL_BATCH)] for _ in range(limit)],
+        "records": [rng.randint(1, max_record) for _ in range(limit)],
+        "approvals": [rng.randint(1, max_approval) for _ in range(limit)],
+        "reports": ids("SELECT id FROM report_configs WHERE is_active = 1"),
+        "new_events": sample(ids("SELECT id FROM business_events WHERE status = '新建'")),
+        "approve": current[:half],
+        "reject": current[half:],
+        "approved_approvals": sample(ids("""
+            SELECT a.id FROM approvals a JOIN business_events e ON a.business_event_id = e.id
+            WHERE e.status = '已审批' LIMIT ?
+        """, (limit * 10,))),
+    }
+    # 未入账的已审批事件在单条与批量入账之间平分
+    unposted = ids("""
+        SELECT e.id FROM business_events e
+        WHERE e.status = '已审批' AND NOT EXISTS (SELECT 1 FROM financial_records r WHERE r.business_event_id = e.id)
+    """)
+    rng.shuffle(unposted)
+    half = min((len(unposted) + 1) // 2, limit)
+    targets["unposted"] = unposted[:half]
+    targets["unposted_bulk"] = unposted[half:half + limit]
+    conn.close()
+    return targets
+
+
+# ---- 进程内ASGI客户端 ----
+
+class ASGIClient:
+    """直接调用ASGI应用的最小客户端：响应体只计字节数"""
+
+    def __init__(self, app):
+        self.app = app
+        self.headers = []
+
+    async def request(self, method, path, params=None, json_body=None, form=None):
+        headers = [(b"host", b"benchmark")] + self.headers
+        body = b""
+        if json_body is not None:
+            body = json.dumps(json_body, ensure_ascii=False).encode("utf-8")
+            headers.append((b"content-type", b"application/json"))
+        elif form is not None:
+            body = urlencode(form).encode("utf-8")
+            headers.append((b"content-type", b"application/x-www-form-urlencoded"))
+        headers.append((b"content-length", str(len(body)).encode()))
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": method, "scheme": "http", "path": path, "raw_path": path.encode("utf-8"),
+            "query_string": urlencode(params or {}, doseq=True).encode("ascii"), "root_path": "",
+            "headers": headers, "client": ("127.0.0.1", 50000), "server": ("benchmark", 80),
+        }
+        finished = asyncio.Event()
+        request_sent = False
+        response = {"status": None, "bytes": 0, "body": b""}
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            # 响应发送完毕后才断开，否则流式响应会被提前取消
+            await finished.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                chunk = message.get("body", b"")
+                response["bytes"] += len(chunk)
+                # 只保留较小的响应体（登录等需要读取内容）
+                if response["bytes"] <= 65536:
+                    response["body"] += chunk
+                if not message.get("more_body", False):
+                    finished.set()
+
+        try:
+            await self.app(scope, receive, send)
+        except Exception:
+            # 与服务器一致：未处理的异常（ServerErrorMiddleware 已发送500响应后重新抛出）计为500
+            if response["status"] is None:
+                response["status"] = 500
+        finally:
+            finished.set()
+        return response
+
+
+# ---- 统计 ----
+
+def current_rss():
+    """当前进程的常驻内存（字节）"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        import resource
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux 以KB为单位，macOS 以字节为单位
+        return usage if sys.platform == "darwin" else usage * 1024
+
+
+class RSSSampler:
+    """后台线程采样峰值RSS"""
+
+    def __init__(self):
+        self.peak = current_rss()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(RSS_SAMPLE_INTERVAL):
+            self.peak = max(self.peak, current_rss())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss())
+
+
+def percentile(sorted_values, fraction):
+    """最近秩百分位数"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+async def run_case(client, case, targets, requests, concurrency):
+    """执行一个用例，返回统计结果；没有可用目标时返回None"""
+    count = case.requests or requests
+    if case.targets:
+        available = targets.get(case.targets, [])
+        if case.targets in REUSABLE_TARGETS:
+            values = [available[i % len(available)] for i in range(count)] if available else []
+        else:
+            values = available[:count]
+            del available[:count]
+        if not values:
+            return None
+    else:
+        values = [None] * count
+
+    latencies = []
+    errors = 0
+    response_bytes = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(value):
+        nonlocal errors, response_bytes
+        path = case.path.replace("{id}", str(value)) if "{id}" in case.path else case.path
+        params = case.params(value) if callable(case.params) else case.params
+        body = case.body(value) if callable(case.body) else case.body
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.request(case.method, path, params, body, case.form)
+            latencies.append((time.perf_counter() - start) * 1000)
+        response_bytes += response["bytes"]
+        if not 200 <= response["status"] < 300:
+            errors += 1
+
+    rss_before = current_rss()
+    with RSSSampler() as sampler:
+        start = time.perf_counter()
+        await asyncio.gather(*(one(value) for value in values))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "method": case.method,
+        "path": case.path,
+        "group": case.group,
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p95_ms": round(percentile(latencies, 0.95), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+        "max_ms": round(latencies[-1], 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "avg_response_bytes": response_bytes // len(latencies),
+        "peak_rss_mb": round(sampler.peak / 1048576, 1),
+        "rss_growth_mb": round((sampler.peak - rss_before) / 1048576, 1),
+    }
+
+
+async def run_worker(db_path, requests, concurrency, seed):
+    """子进程：在当前进程中启动应用并执行所有用例"""
+    targets = collect_targets(db_path, requests, seed)
+
+    sys.path.insert(0, SERVER_DIR)
+    os.chdir(SERVER_DIR)
+    import app as server
+
+    await server.app.router.startup()
+    try:
+        client = ASGIClient(server.app)
+        login = await client.request("POST", "/token", form={"username": USERNAME, "password": PASSWORD})
+        if login["status"] != 200:
+            raise RuntimeError(f"登录失败: {login['status']}")
+        token = json.loads(login["body"])["access_token"]
+        client.headers = [(b"authorization", f"Bearer {token}".encode())]
+
+        # 预热：建立连接池、加载参考数据缓存
+        for path in ("/users/me", "/departments", "/business_events"):
+            await client.request("GET", path)
+
+        results = {}
+        for case in CASES:
+            result = await run_case(client, case, targets, requests, concurrency)
+            if result is None:
+                print(f"  跳过 {case.name}: 没有可用的测试数据", file=sys.stderr)
+                continue
+            results[case.name] = result
+            print(f"  {case.name:<58}{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f}{result['p99_ms']:>9.1f}"
+                  f"{result['throughput_rps']:>10.1f}{result['peak_rss_mb']:>9.1f}{result['errors']:>6}",
+                  file=sys.stderr)
+
+        # 未覆盖的路由
+        covered = {(case.method, case.path.replace("{id}", "")) for case in CASES}
+        uncovered = []
+        for route in server.app.routes:
+            methods = getattr(route, "methods", None) or ()
+            for method in methods:
+                key = (method, _strip_params(route.path))
+                if method != "HEAD" and key not in covered and route.path not in ("/docs", "/redoc", "/openapi.json",
+                                                                                    "/docs/oauth2-redirect"):
+                    uncovered.append(f"{method} {route.path}")
+        return {"results": results, "uncovered_routes": uncovered}
+    finally:
+        await server.app.router.shutdown()
+
+
+def _strip_params(path):
+    """/approvals/{approval_id}/approve -> /approvals//approve"""
+    parts = []
+    for part in path.split("/"):
+        parts.append("" if part.startswith("{") else part)
+    return "/".join(parts)
+
+
+def run_scale(scale, db_path, args):
+    """复制数据库并在子进程中运行一个规模的基准"""
+    work_dir = tempfile.mkdtemp(prefix="finance_bench_")
+    try:
+        work_db = os.path.join(work_dir, "finance.db")
+        shutil.copyfile(db_path, work_db)
+        env = dict(os.environ, FINANCE_DB_PATH=work_db, LOG_LEVEL="WARNING")
+        output_path = os.path.join(work_dir, "result.json")
+        command = [sys.executable, os.path.abspath(__file__), "--worker", work_db, "--worker-output", output_path,
+                   "--requests", str(args.requests), "--concurrency", str(args.concurrency), "--seed", str(args.seed)]
+        print(f"\n规模 {scale}（{db_path}）")
+        print(f"  {'用例':<56}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>10}{'RSS MB':>9}{'错误':>5}")
+        subprocess.run(command, env=env, check=True)
+        with open(output_path, encoding="utf-8") as f:
+            return json.load(f)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+# ---- 基线比较 ----
+
+def compare(results, baseline, tolerance):
+    """返回回退列表 [(规模, 用例, 说明), ...]"""
+    regressions = []
+    for scale, scale_result in results["scales"].items():
+        base_scale = baseline.get("scales", {}).get(scale)
+        if not base_scale:
+            continue
+        for name, current in scale_result["results"].items():
+            base = base_scale["results"].get(name)
+            if not base:
+                continue
+            if current["errors"] > base["errors"]:
+                regressions.append((scale, name, f"错误数 {base['errors']} -> {current['errors']}"))
+            if (current["p95_ms"] > base["p95_ms"] * (1 + tolerance)
+                    and current["p95_ms"] - base["p95_ms"] > NOISE_FLOOR_MS):
+                regressions.append((scale, name, f"p95 {base['p95_ms']:.1f} -> {current['p95_ms']:.1f} ms"))
+            if (base["throughput_rps"] and current["throughput_rps"] < base["throughput_rps"] * (1 - tolerance)
+                    and current["p95_ms"] - base["p95_ms"] > NOISE_FLOOR_MS):
+                regressions.append((scale, name,
+                                    f"吞吐量 {base['throughput_rps']:.1f} -> {current['throughput_rps']:.1f} req/s"))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="接口基准测试")
+    parser.add_argument("--scales", default="10k,100k", help="数据规模，逗号分隔（默认 10k,100k）")
+    parser.add_argument("--db", action="append", default=[], help="使用已有的数据库（可多次指定，名称取文件名）")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="生成的数据库的存放目录")
+    parser.add_argument("--requests", type=int, default=200, help="每个用例的请求数（默认 200）")
+    parser.add_argument("--concurrency", type=int, default=8, help="并发请求数（默认 8）")
+    parser.add_argument("--seed", type=int, default=1, help="选取测试目标的随机数种子")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT_PATH, help="结果JSON路径")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH, help="基线JSON路径（不存在时跳过比较）")
+    parser.add_argument("--save-baseline", action="store_true", help="把本次结果保存为基线")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="回退容差（默认 0.2）")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--worker-output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        result = asyncio.run(run_worker(args.worker, args.requests, args.concurrency, args.seed))
+        with open(args.worker_output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False)
+        return True
+
+    databases = [(os.path.splitext(os.path.basename(path))[0], path) for path in args.db]
+    if not args.db:
+        databases = [(scale, ensure_database(scale, args.data_dir))
+                     for scale in args.scales.split(",") if scale.strip()]
+
+    results = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+        },
+        "scales": {},
+    }
+    for scale, db_path in databases:
+        results["scales"][scale] = run_scale(scale, db_path, args)
+        uncovered = results["scales"][scale]["uncovered_routes"]
+        if uncovered:
+            print(f"  未覆盖的路由: {', '.join(uncovered)}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已保存: {args.output}")
+
+    ok = True
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"基线已保存: {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            ok = False
+            print(f"\n性能回退（容差 {args.tolerance:.0%}）:")
+            for scale, name, detail in regressions:
+                print(f"  [{scale}] {name}: {detail}")
+        else:
+            print(f"与基线 {args.baseline} 相比没有性能回退")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,613 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+业财融合管理系统 - 负载回放
+
+对运行中的服务端按时间顺序重放请求，用于容量规划：
+- 轨迹回放：TRACE_FILE 记录的真实请求（见 server/tracing.py），保留原始的请求组合与时间间隔
+- 场景回放：按内置的合成场景生成请求（上午集中审批、月末集中入账等），到达时间服从泊松过程，
+  速率按场景的负载曲线变化
+
+每个请求在计划时间（原始时间 / 时间倍率）放入队列，由 N 个虚拟用户（各自一个HTTP长连接）取出发送。
+延迟从计划时间算起，包含虚拟用户都在忙时的排队时间，服务端变慢时不会因为少发请求而低估延迟；
+另外单独统计服务端处理时间（从发送到读完响应）。
+
+审批、提交审批与入账等会改变数据状态的请求，路径或请求体中的ID默认替换为从服务端查询到的可用目标
+（待处理的审批、新建的事件、未入账的已审批事件），每个目标只使用一次，目标用完后的请求计为跳过；
+--keep-ids 保留轨迹中的原始ID。匿名化的字符串参数以同样长度的占位字符串代替，
+请求体按记录的结构（字段、数组长度）构造。
+
+输出按路由的 p50/p95/p99 延迟、吞吐量、状态码分布、错误率与锁冲突率
+（database is locked 与等待数据库连接超时）。
+
+用法:
+    python benchmarks/replay.py trace.jsonl [--url http://127.0.0.1:8000] [--users 20] [--time-scale 2]
+    python benchmarks/replay.py --scenario month_end [--duration 60] [--rate 20] [--users 20]
+"""
+
+import argparse
+import gzip
+import http.client
+import json
+import math
+import queue
+import random
+import sys
+import threading
+import time
+from datetime import date
+from urllib.parse import urlencode, urlsplit
+
+DEFAULT_URL = "http://127.0.0.1:8000"
+
+# 回放使用的账号
+USERNAME = "admin"
+PASSWORD = "admin"
+
+DEFAULT_USERS = 10
+DEFAULT_TIME_SCALE = 1.0
+REQUEST_TIMEOUT = 60
+
+# 场景回放的默认时长（秒）与平均速率（请求/秒）
+DEFAULT_DURATION = 60
+DEFAULT_RATE = 20.0
+
+# 每个目标池最多查询的行数（分页读取）
+POOL_SIZE = 2000
+PAGE_SIZE = 1000
+
+# 批量接口在请求体结构未知时的行数
+DEFAULT_BULK_ROWS = 20
+
+# 视为锁冲突的错误信息
+LOCK_ERRORS = ("database is locked".encode(), "等待数据库连接超时".encode())
+
+# 回放时去掉的查询参数：游标无法还原，改为读取第一页（键集分页各页的代价相同）
+DROPPED_PARAMS = {"cursor"}
+
+# 会改变数据状态的请求：(方法, 路由) -> (参数名, 目标池)；参数不在路径中时写入请求体
+CONSUMING_ROUTES = {
+    ("POST", "/approvals/{approval_id}/approve"): ("approval_id", "pending_approvals"),
+    ("POST", "/approvals/{approval_id}/reject"): ("approval_id", "pending_approvals"),
+    ("POST", "/business_events/{event_id}/submit-to-approval"): ("event_id", "new_events"),
+    ("POST", "/financial_records"): ("business_event_id", "unposted_events"),
+    ("POST", "/financial_records/bulk"): ("business_event_id", "unposted_events"),
+}
+
+# 可以重复使用的目标池（只读请求）
+REUSABLE_POOLS = {"events", "approvals", "records", "reports", "user_id", "department_id"}
+
+
+# ---- 场景 ----
+
+class Scenario:
+    """合成场景：请求组合与负载曲线
+
+    mix 的每一项为 (权重, 方法, 路由, {路径参数: 目标池}, 查询参数, 请求体结构)；
+    load(x) 给出进度 x（0~1）处的速率倍数，平均速率为 --rate。
+    """
+
+    def __init__(self, description, mix, load=lambda x: 1.0):
+        self.description = description
+        self.mix = mix
+        self.load = load
+
+    def generate(self, duration, rate, rng):
+        """按非齐次泊松过程生成请求（以峰值速率生成后按负载曲线稀释）"""
+        samples = [self.load(i / 100) for i in range(101)]
+        mean = sum(samples) / len(samples)
+        peak_rate = rate * max(samples) / mean
+        weights = [item[0] for item in self.mix]
+        entries = []
+        t = 0.0
+        while True:
+            t += rng.expovariate(peak_rate)
+            if t >= duration:
+                return entries
+            if rng.random() * max(samples) > self.load(t / duration):
+                continue
+            _, method, route, pools, query, body = rng.choices(self.mix, weights)[0]
+            entries.append({
+                "t": t, "method": method, "route": route, "pools": pools,
+                "path_params": {}, "query": list(query), "body": body,
+            })
+
+
+def _burst(x):
+    """9点集中审批：前20%时间升到峰值，之后回落"""
+    return 1 + 9 * (x / 0.2 if x < 0.2 else math.exp(-(x - 0.2) * 6))
+
+
+def _storm(x):
+    """月末入账：负载在后半段持续上升"""
+    return 1 + 5 * max(0.0, x - 0.5) * 2
+
+
+_TODAY = date.today().isoformat()
+_RECORD_BULK = {"records": {"list": DEFAULT_BULK_ROWS, "item": None}}
+_EVENT_BULK = {"events": {"list": DEFAULT_BULK_ROWS, "item": None}}
+
+SCENARIOS = {
+    "mixed": Scenario("日常读写混合（以列表与详情查询为主）", [
+        (20, "GET", "/business_events", {}, [["limit", "50"]], None),
+        (8, "GET", "/business_events", {}, [["status", "待审批"], ["limit", "50"]], None),
+        (15, "GET", "/business_events/{event_id}/detail", {"event_id": "events"}, [], None),
+        (10, "GET", "/approvals", {}, [["status", "待审批"], ["limit", "50"]], None),
+        (10, "GET", "/financial_records", {}, [["limit", "50"]], None),
+        (5, "GET", "/budgets/execution", {}, [], None),
+        (3, "GET", "/reports/trial_balance", {}, [["as_of", _TODAY]], None),
+        (6, "POST", "/business_events", {}, [], None),
+        (4, "POST", "/business_events/{event_id}/submit-to-approval", {}, [], None),
+        (4, "POST", "/approvals/{approval_id}/approve", {}, [], None),
+        (3, "POST", "/financial_records", {}, [], None),
+    ]),
+    "morning_approvals": Scenario("上午9点集中审批（待办列表、审批详情、通过/拒绝）", [
+        (25, "GET", "/approvals", {}, [["status", "待审批"], ["limit", "50"]], None),
+        (15, "GET", "/approvals/{approval_id}", {"approval_id": "approvals"}, [], None),
+        (15, "GET", "/business_events/{event_id}/approvals", {"event_id": "events"}, [], None),
+        (10, "GET", "/business_events/{event_id}/detail", {"event_id": "events"}, [], None),
+        (25, "POST", "/approvals/{approval_id}/approve", {}, [], None),
+        (5, "POST", "/approvals/{approval_id}/reject", {}, [], None),
+        (5, "POST", "/business_events/{event_id}/submit-to-approval", {}, [], None),
+    ], load=_burst),
+    "month_end": Scenario("月末集中入账（待入账队列、单笔与批量入账、试算平衡与预算执行）", [
+        (20, "GET", "/business_events/unposted", {}, [["limit", "50"]], None),
+        (25, "POST", "/financial_records", {}, [], None),
+        (10, "POST", "/financial_records/bulk", {}, [], _RECORD_BULK),
+        (5, "POST", "/business_events/bulk", {}, [], _EVENT_BULK),
+        (10, "GET", "/financial_records", {}, [["limit", "100"]], None),
+        (10, "GET", "/reports/trial_balance", {}, [["as_of", _TODAY]], None),
+        (10, "GET", "/budgets/execution", {}, [], None),
+        (5, "POST", "/reports/{report_id}/run", {"report_id": "reports"}, [], {}),
+        (5, "GET", "/approvals", {}, [["status", "待审批"], ["limit", "50"]], None),
+    ], load=_storm),
+}
+
+
+def load_trace(path):
+    """读取轨迹文件，按时间排序；原始时间平移到从0开始"""
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                entry.setdefault("pools", {})
+                entries.append(entry)
+    entries.sort(key=lambda entry: entry["t"])
+    if entries:
+        first = entries[0]["t"]
+        for entry in entries:
+            entry["t"] -= first
+    return entries
+
+
+# ---- HTTP ----
+
+class Connection:
+    """一个虚拟用户的HTTP长连接（出错后重新连接）"""
+
+    def __init__(self, base_url, token=None):
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme
+        self.netloc = parts.netloc
+        self.prefix = parts.path.rstrip("/")
+        self.token = token
+        self._conn = None
+
+    def request(self, method, path, query=None, body=None, form=None, decode=False):
+        """发送请求，返回 (状态码, 响应体)；响应体默认不解压（错误信息不超过压缩阈值，不会被压缩）"""
+        url = self.prefix + path
+        if query:
+            url += "?" + urlencode(query)
+        headers = {"Accept-Encoding": "gzip"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        data = None
+        if form is not None:
+            data = urlencode(form).encode("utf-8")
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        elif body is not None:
+            data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+        if self._conn is None:
+            factory = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+            self._conn = factory(self.netloc, timeout=REQUEST_TIMEOUT)
+        try:
+            self._conn.request(method, url, body=data, headers=headers)
+            response = self._conn.getresponse()
+            content = response.read()
+        except (OSError, http.client.HTTPException):
+            self.close()
+            raise
+        if decode and response.getheader("Content-Encoding") == "gzip":
+            content = gzip.decompress(content)
+        return response.status, content
+
+    def get_json(self, path, query=None):
+        status, content = self.request("GET", path, query, decode=True)
+        if status != 200:
+            raise RuntimeError(f"GET {path} 失败: {status} {content[:200]!r}")
+        return json.loads(content)
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def login(base_url, username, password):
+    conn = Connection(base_url)
+    status, content = conn.request("POST", "/token", form={"username": username, "password": password})
+    conn.close()
+    if status != 200:
+        raise RuntimeError(f"登录失败: {status} {content[:200]!r}")
+    return json.loads(content)["access_token"]
+
+
+# ---- 目标池 ----
+
+class TargetPools:
+    """回放使用的ID：消耗型目标池每个ID只取一次，只读目标池随机重复使用"""
+
+    def __init__(self, pools, rng):
+        self._pools = pools
+        self._rng = rng
+        self._lock = threading.Lock()
+
+    @classmethod
+    def fetch(cls, conn, rng, size=POOL_SIZE):
+        """从服务端查询各目标池"""
+
+        def items(path, query=()):
+            rows = []
+            cursor = None
+            while len(rows) < size:
+                params = list(query) + [("limit", min(PAGE_SIZE, size - len(rows)))]
+                if cursor:
+                    params.append(("cursor", cursor))
+                page = conn.get_json(path, params)
+                rows += page["items"]
+                cursor = page["next_cursor"]
+                if not cursor:
+                    break
+            return rows
+
+        # 每个事件只取当前级别（最低级别）的待处理审批，避免越级审批
+        current = {}
+        for approval in items("/approvals", [("status", "待审批")]):
+            existing = current.get(approval["business_event_id"])
+            if existing is None or approval["approval_level"] < existing["approval_level"]:
+                current[approval["business_event_id"]] = approval
+        events = items("/business_events")
+        pools = {
+            "pending_approvals": [approval["id"] for approval in current.values()],
+            "new_events": [event["id"] for event in items("/business_events", [("status", "新建")])],
+            "unposted_events": [event["id"] for event in items("/business_events/unposted")],
+            "events": [event["id"] for event in events],
+            "approvals": [approval["id"] for approval in items("/approvals")],
+            "records": [record["id"] for record in items("/financial_records")],
+            "reports": [report["id"] for report in conn.get_json("/reports")],
+        }
+        for values in pools.values():
+            rng.shuffle(values)
+        me = conn.get_json("/users/me")
+        departments = conn.get_json("/departments")
+        pools["user_id"] = [me["id"]]
+        pools["department_id"] = [department["id"] for department in departments] or [1]
+        return cls(pools, rng)
+
+    def take(self, name):
+        """取一个ID；消耗型目标池用完时返回None"""
+        with self._lock:
+            values = self._pools.get(name)
+            if not values:
+                return None
+            if name in REUSABLE_POOLS:
+                return self._rng.choice(values)
+            return values.pop()
+
+    def sizes(self):
+        with self._lock:
+            return {name: len(values) for name, values in self._pools.items()}
+
+
+# ---- 请求构造 ----
+
+def materialize(shape, fill="x"):
+    """按请求体结构构造占位值"""
+    if isinstance(shape, dict):
+        if set(shape) == {"str"}:
+            return fill * shape["str"]
+        if set(shape) == {"list", "item"}:
+            return [materialize(shape["item"], fill) for _ in range(shape["list"])]
+        if set(shape) == {"bytes"}:
+            return None
+        return {key: materialize(value, fill) for key, value in shape.items()}
+    return {"int": 1, "float": 1.0, "bool": False}.get(shape)
+
+
+def _bulk_rows(shape, key):
+    try:
+        return shape[key]["list"]
+    except (KeyError, TypeError):
+        return DEFAULT_BULK_ROWS
+
+
+def _event_body(pools):
+    return {
+        "event_type": "采购", "project_name": "负载回放", "amount": 1000.0,
+        "event_date": date.today().isoformat(), "description": "负载回放",
+        "department_id": pools.take("department_id"), "created_by": pools.take("user_id"),
+    }
+
+
+def _record_body(event_id, pools):
+    today = date.today()
+    return {
+        "business_event_id": event_id, "account_code": "6001001", "account_name": "办公费用",
+        "amount": 100.0, "direction": "支出", "record_date": today.isoformat(),
+        "fiscal_year": today.year, "fiscal_period": today.month,
+        "description": "负载回放", "created_by": pools.take("user_id"),
+    }
+
+
+# 已知接口的请求体：(请求体结构, 目标ID, 目标池) -> 请求体；其余接口按结构构造占位值
+BODY_BUILDERS = {
+    ("POST", "/business_events"): lambda shape, target, pools: _event_body(pools),
+    ("POST", "/business_events/bulk"): lambda shape, target, pools: {
+        "events": [_event_body(pools) for _ in range(_bulk_rows(shape, "events"))]},
+    ("POST", "/financial_records"): lambda shape, target, pools: _record_body(target, pools),
+    ("POST", "/financial_records/bulk"): lambda shape, target, pools: {
+        "records": [_record_body(target, pools) for _ in range(_bulk_rows(shape, "records"))]},
+    ("POST", "/approvals/{approval_id}/update-business-status"): lambda shape, target, pools: {
+        "status": "已审批", "remarks": "负载回放"},
+}
+
+
+def prepare(entry, pools, keep_ids):
+    """把轨迹或场景中的一项转换为 (方法, 路径, 查询参数, 请求体, 表单)；目标用完时返回None"""
+    method, route = entry["method"], entry["route"]
+    path_params = dict(entry.get("path_params") or {})
+    for name, pool in entry["pools"].items():
+        value = pools.take(pool)
+        if value is None:
+            return None
+        path_params[name] = value
+
+    # --keep-ids 只保留路径中的ID；请求体中的ID已匿名化，总是从目标池中取
+    target = None
+    consuming = CONSUMING_ROUTES.get((method, route))
+    if consuming is not None:
+        name, pool = consuming
+        in_path = "{" + name + "}" in route
+        if keep_ids and in_path and name in path_params:
+            target = path_params[name]
+        else:
+            target = pools.take(pool)
+            if target is None:
+                return None
+            if in_path:
+                path_params[name] = target
+
+    # 匿名化的路径参数无法还原，只能以占位值代替
+    path = route
+    for name, value in path_params.items():
+        if isinstance(value, dict):
+            value = materialize(value)
+        path = path.replace("{" + name + "}", str(value))
+
+    query = [(key, materialize(value) if isinstance(value, dict) else value)
+             for key, value in entry["query"] if key not in DROPPED_PARAMS]
+
+    if (method, route) == ("POST", "/token"):
+        return method, path, query, None, {"username": USERNAME, "password": PASSWORD}
+    builder = BODY_BUILDERS.get((method, route))
+    if builder is not None:
+        body = builder(entry.get("body"), target, pools)
+    else:
+        body = materialize(entry.get("body"))
+    return method, path, query, body, None
+
+
+# ---- 回放 ----
+
+class RouteResult:
+    """单个 (方法, 路由) 的回放结果（各虚拟用户线程共享，加锁更新）"""
+
+    def __init__(self):
+        self.latencies = []
+        self.service_times = []
+        self.statuses = {}
+        self.errors = 0
+        self.lock_errors = 0
+        self.skipped = 0
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class Replayer:
+    def __init__(self, base_url, token, entries, pools, users=DEFAULT_USERS,
+                 time_scale=DEFAULT_TIME_SCALE, keep_ids=False):
+        self.base_url = base_url
+        self.token = token
+        self.entries = entries
+        self.pools = pools
+        self.users = users
+        self.time_scale = time_scale
+        self.keep_ids = keep_ids
+        self.results = {}
+        self.max_lag = 0.0
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+
+    def _result(self, key):
+        result = self.results.get(key)
+        if result is None:
+            result = self.results[key] = RouteResult()
+        return result
+
+    def _worker(self):
+        conn = Connection(self.base_url, self.token)
+        while True:
+            item = self._queue.get()
+            if item is None:
+                conn.close()
+                return
+            scheduled, entry = item
+            key = f"{entry['method']} {entry['route']}"
+            request = prepare(entry, self.pools, self.keep_ids)
+            if request is None:
+                with self._lock:
+                    self._result(key).skipped += 1
+                continue
+            method, path, query, body, form = request
+            sent = time.perf_counter()
+            try:
+                status, content = conn.request(method, path, query, body, form)
+            except (OSError, http.client.HTTPException):
+                status, content = None, b""
+            finished = time.perf_counter()
+            with self._lock:
+                result = self._result(key)
+                result.latencies.append(finished - scheduled)
+                result.service_times.append(finished - sent)
+                self.max_lag = max(self.max_lag, sent - scheduled)
+                result.statuses[status] = result.statuses.get(status, 0) + 1
+                if status is None or status >= 500:
+                    result.errors += 1
+                    if any(message in content for message in LOCK_ERRORS):
+                        result.lock_errors += 1
+
+    def run(self):
+        """按计划时间分发请求，返回实际耗时（秒）"""
+        workers = [threading.Thread(target=self._worker, daemon=True) for _ in range(self.users)]
+        for worker in workers:
+            worker.start()
+        start = time.perf_counter()
+        for entry in self.entries:
+            scheduled = start + (entry["t"] / self.time_scale if self.time_scale > 0 else 0.0)
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            self._queue.put((scheduled, entry))
+        for _ in workers:
+            self._queue.put(None)
+        for worker in workers:
+            worker.join()
+        return time.perf_counter() - start
+
+
+def summarize(name, result, elapsed):
+    latencies = sorted(result.latencies)
+    service_times = sorted(result.service_times)
+    count = len(latencies)
+    return {
+        "route": name,
+        "requests": count,
+        "skipped": result.skipped,
+        "throughput_rps": round(count / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        "service_p95_ms": round(percentile(service_times, 0.95) * 1000, 2),
+        "statuses": {str(status): count for status, count in sorted(result.statuses.items(), key=str)},
+        "errors": result.errors,
+        "error_rate": round(result.errors / count, 4) if count else 0.0,
+        "lock_errors": result.lock_errors,
+        "lock_rate": round(result.lock_errors / count, 4) if count else 0.0,
+    }
+
+
+def report(replayer, elapsed, source):
+    total = RouteResult()
+    for result in replayer.results.values():
+        total.latencies += result.latencies
+        total.service_times += result.service_times
+        total.errors += result.errors
+        total.lock_errors += result.lock_errors
+        total.skipped += result.skipped
+        for status, count in result.statuses.items():
+            total.statuses[status] = total.statuses.get(status, 0) + count
+    routes = [summarize(name, result, elapsed) for name, result in sorted(replayer.results.items())]
+    offered = replayer.entries[-1]["t"] / replayer.time_scale if replayer.entries and replayer.time_scale > 0 else 0.0
+    return {
+        "source": source,
+        "users": replayer.users,
+        "time_scale": replayer.time_scale,
+        "elapsed_s": round(elapsed, 3),
+        "offered_rps": round(len(replayer.entries) / offered, 2) if offered else None,
+        "max_lag_ms": round(replayer.max_lag * 1000, 2),
+        "total": summarize("总计", total, elapsed),
+        "routes": routes,
+    }
+
+
+def print_report(result):
+    print(f"回放 {result['source']}：{result['users']} 个虚拟用户，时间倍率 {result['time_scale']}，"
+          f"耗时 {result['elapsed_s']} 秒，最大发送延后 {result['max_lag_ms']} ms", file=sys.stderr)
+    print(f"  {'路由':<56} {'请求':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8} "
+          f"{'错误率':>7} {'锁冲突':>7} {'跳过':>5}", file=sys.stderr)
+    for row in result["routes"] + [result["total"]]:
+        print(f"  {row['route']:<56} {row['requests']:>6} {row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} "
+              f"{row['p99_ms']:>8.1f} {row['throughput_rps']:>8.1f} {row['error_rate']:>7.2%} "
+              f"{row['lock_rate']:>7.2%} {row['skipped']:>5}", file=sys.stderr)
+    print(f"  状态码: {result['total']['statuses']}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="对运行中的服务端回放请求轨迹或合成场景")
+    parser.add_argument("trace", nargs="?", help="TRACE_FILE 记录的轨迹文件")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), help="合成场景（不指定轨迹文件时使用）")
+    parser.add_argument("--url", default=DEFAULT_URL, help=f"服务端地址（默认 {DEFAULT_URL}）")
+    parser.add_argument("--users", type=int, default=DEFAULT_USERS, help="并发虚拟用户数")
+    parser.add_argument("--time-scale", type=float, default=DEFAULT_TIME_SCALE,
+                        help="时间倍率：2 表示以两倍速度回放，0 表示不等待、尽快发送")
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION, help="场景时长（秒，按原始时间）")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="场景的平均请求速率（请求/秒）")
+    parser.add_argument("--seed", type=int, default=42, help="场景生成与目标选择的随机种子")
+    parser.add_argument("--keep-ids", action="store_true", help="写请求保留轨迹中的原始ID")
+    parser.add_argument("--username", default=USERNAME)
+    parser.add_argument("--password", default=PASSWORD)
+    parser.add_argument("--output", help="结果JSON文件")
+    args = parser.parse_args()
+
+    if bool(args.trace) == bool(args.scenario):
+        parser.error("需要指定轨迹文件或 --scenario 其中之一")
+
+    rng = random.Random(args.seed)
+    if args.trace:
+        entries = load_trace(args.trace)
+        source = args.trace
+    else:
+        entries = SCENARIOS[args.scenario].generate(args.duration, args.rate, rng)
+        source = f"场景 {args.scenario}"
+    if not entries:
+        print("没有可回放的请求", file=sys.stderr)
+        return 1
+
+    token = login(args.url, args.username, args.password)
+    conn = Connection(args.url, token)
+    pools = TargetPools.fetch(conn, rng)
+    conn.close()
+    print(f"目标池: {pools.sizes()}", file=sys.stderr)
+
+    replayer = Replayer(args.url, token, entries, pools, args.users, args.time_scale, args.keep_ids)
+    elapsed = replayer.run()
+    result = report(replayer, elapsed, source)
+    print_report(result)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存: {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+业财融合管理系统 - 列表响应序列化基准
+
+对比 10000 行财务记录列表的每次响应CPU时间：
+- 原方式: jsonable_encoder + 标准库 json 的 JSONResponse
+- 新方式: json_response()（跳过 jsonable_encoder，orjson 序列化）
+以及 gzip / br 压缩的CPU时间与压缩后大小。
+
+用法: python benchmarks/serialization.py [--rows 10000] [--repeat 20]
+"""
+
+import argparse
+import gzip
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'server'))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+import responses
+from responses import json_response, GZIP_LEVEL, BROTLI_QUALITY
+
+
+def make_rows(count):
+    """生成与 financial_records 列表结构相同的行"""
+    directions = ["收入", "支出"]
+    rows = []
+    for i in range(1, count + 1):
+        rows.append({
+            "id": i,
+            "business_event_id": i // 3 + 1,
+            "account_code": f"{6600 + i % 40}",
+            "account_name": f"管理费用-办公费{i % 40}",
+            "amount": round(1000 + i * 13.37 % 50000, 2),
+            "direction": directions[i % 2],
+            "record_date": f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}",
+            "fiscal_year": 2024,
+            "fiscal_period": i % 12 + 1,
+            "description": f"业务事件 BE20240101{i:04d} 的财务记录",
+            "created_by": 1,
+            "created_at": "2024-01-01 08:00:00",
+            "event_code": f"BE20240101{i:04d}",
+            "event_name": f"采购办公用品{i}",
+        })
+    return {"items": rows, "next_cursor": "WzIwMjQtMDEtMDEsMV0", "total": count}
+
+
+def measure(fn, repeat):
+    """返回每次调用的CPU毫秒数（取最小值）"""
+    best = None
+    for _ in range(repeat):
+        start = time.process_time()
+        fn()
+        elapsed = (time.process_time() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="列表响应序列化基准")
+    parser.add_argument("--rows", type=int, default=10000, help="行数")
+    parser.add_argument("--repeat", type=int, default=20, help="重复次数")
+    args = parser.parse_args()
+
+    payload = make_rows(args.rows)
+    baseline_body = JSONResponse(jsonable_encoder(payload)).body
+    fast_body = json_response(payload).body
+
+    print(f"行数: {args.rows}  orjson: {'是' if responses.orjson else '否'}")
+    print(f"{'项目':<32}{'CPU ms':>10}{'字节':>12}")
+    results = [
+        ("jsonable_encoder + JSONResponse",
+         measure(lambda: JSONResponse(jsonable_encoder(payload)), args.repeat), len(baseline_body)),
+        ("json_response",
+         measure(lambda: json_response(payload), args.repeat), len(fast_body)),
+        (f"gzip (level {GZIP_LEVEL})",
+         measure(lambda: gzip.compress(fast_body, GZIP_LEVEL), args.repeat),
+         len(gzip.compress(fast_body, GZIP_LEVEL))),
+    ]
+    if responses.brotli is not None:
+        brotli = responses.brotli
+        results.append((f"br (quality {BROTLI_QUALITY})",
+                        measure(lambda: brotli.compress(fast_body, quality=BROTLI_QUALITY), args.repeat),
+                        len(brotli.compress(fast_body, quality=BROTLI_QUALITY))))
+    for name, cpu_ms, size in results:
+        print(f"{name:<32}{cpu_ms:>10.1f}{size:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""
+业财融合管理系统 - 客户端日志
+
+日志记录放入队列，由后台线程写到控制台，界面线程不等待控制台输出。
+级别由环境变量 LOG_LEVEL 控制（默认 INFO），响应内容等明细只在 DEBUG 级别输出。
+"""
+
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+
+_listener = None
+
+
+def setup_logging(level=LOG_LEVEL):
+    """配置根记录器：队列处理器 + 后台监听线程，重复调用无效"""
+    global _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    # 退出前写完队列中剩余的日志
+    atexit.register(_listener.stop)
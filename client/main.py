@@ -3,6 +3,7 @@ import os
 from PyQt6.QtWidgets import QApplication
 from PyQt6.QtGui import QIcon
 from main_window import MainWindow
+from app_logging import setup_logging
 
 if __name__ == "__main__":
     # 添加当前目录到路径
@@ -10,6 +11,9 @@ if __name__ == "__main__":
     if current_dir not in sys.path:
         sys.path.append(current_dir)
     
+    # 日志
+    setup_logging()
+    
     # 创建应用
     app = QApplication(sys.argv)
     app.setApplicationName("业财融合管理系统")
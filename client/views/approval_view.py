@@ -1,6 +1,7 @@
 import sys
 import os
 import json
+import logging
 import requests
 from datetime import datetime
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
@@ -9,6 +10,11 @@ from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLa
                            QGroupBox, QSplitter, QFrame)
 from PyQt6.QtCore import Qt, pyqtSignal, QSize
 
+# 每页加载的审批记录数量
+PAGE_SIZE = 200
+
+logger = logging.getLogger(__name__)
+
 class ApprovalView(QWidget):
     """审批管理视图"""
     
@@ -16,6 +22,9 @@ class ApprovalView(QWidget):
         super().__init__()
         self.token = token
         self.user_data = user_data
+        self.data = []
+        self.next_cursor = None
+        self.current_status = None
         self.init_ui()
         self.load_data()
         
@@ -79,6 +88,12 @@ class ApprovalView(QWidget):
         self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
         self.table.selectionModel().selectionChanged.connect(self.on_selection_changed)
         left_layout.addWidget(self.table)
+
+        # 加载下一页
+        self.load_more_button = QPushButton("加载更多")
+        self.load_more_button.setEnabled(False)
+        self.load_more_button.clicked.connect(self.load_more)
+        left_layout.addWidget(self.load_more_button)
         
         # 右侧业务详情
         self.right_widget = QWidget()
@@ -97,47 +112,52 @@ class ApprovalView(QWidget):
         
         main_layout.addWidget(splitter)
     
-    def load_data(self, status=None):
-        """加载审批数据"""
+    def load_data(self, status=None, cursor=None):
+        """加载审批数据（状态与事件类型筛选在服务端完成，cursor为空时重新加载第一页）"""
         try:
-            print(f"当前用户: {self.user_data}")
-            
-            # 构建URL
+            # 构建查询参数
             url = "http://localhost:8000/approvals"
+            params = {"limit": PAGE_SIZE}
             if status:
-                url += f"?status={status}"
+                params["status"] = status
+            event_type = self.filter_combo.currentData()
+            if event_type:
+                params["event_type"] = event_type
+            if cursor:
+                params["cursor"] = cursor
             
             response = requests.get(
                 url,
+                params=params,
                 headers={"Authorization": f"Bearer {self.token}"}
             )
             
-            print(f"请求URL: {url}")
-            print(f"响应状态码: {response.status_code}")
-            print(f"响应内容: {response.text}")
+            logger.debug("GET %s -> %s", response.url, response.status_code)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("响应内容: %s", response.text)
             
             if response.status_code == 200:
-                self.data = response.json()
-                print(f"解析后的数据: {self.data}")
-                print(f"数据长度: {len(self.data)}")
+                page = response.json()
+                if cursor:
+                    self.data.extend(page["items"])
+                else:
+                    self.data = page["items"]
+                self.current_status = status
+                self.next_cursor = page["next_cursor"]
+                self.load_more_button.setEnabled(bool(self.next_cursor))
+                logger.debug("已加载审批记录: %d 条", len(self.data))
                 self.display_data()
             else:
                 QMessageBox.warning(self, "加载失败", "无法加载审批数据")
         except Exception as e:
-            print(f"加载审批数据时发生错误: {str(e)}")
+            logger.exception("加载审批数据时发生错误")
             QMessageBox.warning(self, "错误", f"加载审批数据时发生错误: {str(e)}")
     
     def display_data(self):
         """显示数据到表格"""
         self.table.setRowCount(0)
         
-        filter_text = self.filter_combo.currentData()
-        
         for row, item in enumerate(self.data):
-            # 应用过滤
-            if filter_text and item["event_type"] != filter_text:
-                continue
-                
             self.table.insertRow(row)
             
             # 设置各列数据
@@ -188,7 +208,12 @@ class ApprovalView(QWidget):
     
     def filter_data(self):
         """按类型过滤数据"""
-        self.display_data()
+        self.load_data(self.status_filter.currentData())
+
+    def load_more(self):
+        """加载下一页"""
+        if self.next_cursor:
+            self.load_data(self.current_status, self.next_cursor)
     
     def approve(self, approval_id):
         """审批通过"""
@@ -201,19 +226,18 @@ class ApprovalView(QWidget):
         
         if reply == QMessageBox.StandardButton.Yes:
             try:
-                print(f"发送审批通过请求，审批ID: {approval_id}")
-                
                 response = requests.post(
                     f"http://localhost:8000/approvals/{approval_id}/approve",
                     headers={"Authorization": f"Bearer {self.token}"}
                 )
                 
-                print(f"响应状态码: {response.status_code}")
-                print(f"响应内容: {response.text}")
+                logger.debug("POST %s -> %s", response.url, response.status_code)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("响应内容: %s", response.text)
                 
                 if response.status_code == 200:
                     result = response.json()
-                    print(f"审批通过成功，返回结果: {result}")
+                    logger.info("审批 %s 已通过", approval_id)
                     QMessageBox.information(self, "操作成功", "审批已通过")
                     
                     # 如果所有审批都已完成，显示创建财务记录的询问
@@ -229,12 +253,10 @@ class ApprovalView(QWidget):
                             error_message = error_data["detail"]
                     except:
                         pass
-                    print(f"审批通过失败，错误信息: {error_message}")
+                    logger.warning("审批 %s 通过失败: %s", approval_id, error_message)
                     QMessageBox.warning(self, "操作失败", f"审批通过失败: {error_message}")
             except Exception as e:
-                print(f"审批通过过程中发生错误: {str(e)}")
-                import traceback
-                traceback.print_exc()
+                logger.exception("审批通过过程中发生错误")
                 QMessageBox.warning(self, "错误", f"操作时发生错误: {str(e)}")
     
     def reject(self, approval_id):
@@ -248,18 +270,17 @@ class ApprovalView(QWidget):
         
         if reply == QMessageBox.StandardButton.Yes:
             try:
-                print(f"发送审批拒绝请求，审批ID: {approval_id}")
-                
                 response = requests.post(
                     f"http://localhost:8000/approvals/{approval_id}/reject",
                     headers={"Authorization": f"Bearer {self.token}"}
                 )
                 
-                print(f"响应状态码: {response.status_code}")
-                print(f"响应内容: {response.text}")
+                logger.debug("POST %s -> %s", response.url, response.status_code)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("响应内容: %s", response.text)
                 
                 if response.status_code == 200:
-                    print("审批拒绝成功")
+                    logger.info("审批 %s 已拒绝", approval_id)
                     QMessageBox.information(self, "操作成功", "审批已拒绝")
                     self.refresh_data()
                 else:
@@ -270,12 +291,10 @@ class ApprovalView(QWidget):
                             error_message = error_data["detail"]
                     except:
                         pass
-                    print(f"审批拒绝失败，错误信息: {error_message}")
+                    logger.warning("审批 %s 拒绝失败: %s", approval_id, error_message)
                     QMessageBox.warning(self, "操作失败", f"审批拒绝失败: {error_message}")
             except Exception as e:
-                print(f"审批拒绝过程中发生错误: {str(e)}")
-                import traceback
-                traceback.print_exc()
+                logger.exception("审批拒绝过程中发生错误")
                 QMessageBox.warning(self, "错误", f"操作时发生错误: {str(e)}")
     
     def on_selection_changed(self, selected, deselected):
@@ -504,7 +523,7 @@ class ApprovalView(QWidget):
                             business_id = int(child.text())
                             break
                 except Exception as e:
-                    print(f"获取业务事件ID时出错: {str(e)}")
+                    logger.warning("获取业务事件ID时出错: %s", e)
                 
                 if business_id:
                     # 显示详情
@@ -519,15 +538,17 @@ class ApprovalView(QWidget):
                 headers={"Authorization": f"Bearer {self.token}"}
             )
             
-            print(f"查询业务事件 {business_id} 的审批任务")
-            print(f"响应状态码: {response.status_code}")
-            print(f"响应内容: {response.text}")
+            logger.debug("GET %s -> %s", response.url, response.status_code)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("响应内容: %s", response.text)
             
             if response.status_code == 200:
                 approvals = response.json()
                 if approvals and len(approvals) > 0:
                     QMessageBox.information(self, "查询结果", f"找到 {len(approvals)} 条审批记录")
                     self.data = approvals
+                    self.next_cursor = None
+                    self.load_more_button.setEnabled(False)
                     self.display_data()
                     return True
                 else:
@@ -537,7 +558,7 @@ class ApprovalView(QWidget):
                 QMessageBox.warning(self, "查询失败", "无法获取审批记录")
                 return False
         except Exception as e:
-            print(f"查询审批记录时发生错误: {str(e)}")
+            logger.exception("查询审批记录时发生错误")
             QMessageBox.warning(self, "错误", f"查询审批记录时发生错误: {str(e)}")
             return False
 
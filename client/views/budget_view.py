@@ -6,7 +6,8 @@ from datetime import datetime
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
                            QTableWidget, QTableWidgetItem, QHeaderView, QComboBox,
                            QLineEdit, QDateEdit, QFormLayout, QDialog, QMessageBox,
-                           QSpinBox, QDoubleSpinBox, QTextEdit, QGroupBox, QProgressBar)
+                           QSpinBox, QDoubleSpinBox, QTextEdit, QGroupBox, QProgressBar,
+                           QCheckBox)
 from PyQt6.QtCore import Qt, pyqtSignal, QDate
 from PyQt6.QtGui import QColor
 
@@ -57,13 +58,18 @@ class BudgetView(QWidget):
         month_label = QLabel("月份:")
         top_layout.addWidget(month_label)
         top_layout.addWidget(self.month_combo)
+
+        # 上级部门的执行数包含下级部门
+        self.rollup_check = QCheckBox("含下级部门")
+        self.rollup_check.stateChanged.connect(self.filter_data)
+        top_layout.addWidget(self.rollup_check)
         
         main_layout.addLayout(top_layout)
         
         # 表格
         self.table = QTableWidget()
         self.table.setColumnCount(7)
-        self.table.setHorizontalHeaderLabels(["ID", "部门", "年/月", "预算科目", "预算金额", "已用金额", "执行率"])
+        self.table.setHorizontalHeaderLabels(["ID", "部门", "年/月", "预算科目", "预算金额", "执行数", "执行率"])
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
         self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
@@ -75,20 +81,22 @@ class BudgetView(QWidget):
             year = self.year_combo.currentData()
             month = self.month_combo.currentData()
             
-            url = f"http://localhost:8000/budgets?year={year}"
+            params = {"year": year, "rollup": self.rollup_check.isChecked()}
             if month > 0:
-                url += f"&month={month}"
-                
+                params["month"] = month
+
+            # 执行数由服务端的预算执行汇总表提供，每个预算一行
             response = requests.get(
-                url,
+                "http://localhost:8000/budgets/execution",
+                params=params,
                 headers={"Authorization": f"Bearer {self.token}"}
             )
-            
-            if response.status_code == 200:
-                self.data = response.json()
-                self.display_data(self.data)
-            else:
+            if response.status_code != 200:
                 QMessageBox.warning(self, "加载失败", "无法加载预算数据")
+                return
+
+            self.data = response.json()
+            self.display_data(self.data)
         except Exception as e:
             QMessageBox.warning(self, "错误", f"加载数据时发生错误: {str(e)}")
     
@@ -105,25 +113,24 @@ class BudgetView(QWidget):
             self.table.setItem(row, 2, QTableWidgetItem(f"{item['year']}/{item['month']}"))
             
             # 预算科目
-            account_name = item.get("account_name", "总预算")
+            account_name = item.get("account_name") or "总预算"
             self.table.setItem(row, 3, QTableWidgetItem(account_name))
             
-            # 预算金额与已用金额
+            # 预算金额与执行数
             self.table.setItem(row, 4, QTableWidgetItem(f"¥{item['amount']:,.2f}"))
-            self.table.setItem(row, 5, QTableWidgetItem(f"¥{item['used_amount']:,.2f}"))
+            self.table.setItem(row, 5, QTableWidgetItem(f"¥{item['executed_amount']:,.2f}"))
             
             # 执行率进度条
             progress_widget = QWidget()
             progress_layout = QVBoxLayout(progress_widget)
             progress_layout.setContentsMargins(4, 4, 4, 4)
             
-            # 计算执行率
-            rate = (item['used_amount'] / item['amount']) * 100 if item['amount'] > 0 else 0
+            rate = item['execution_rate']
             
             # 创建进度条
             progress_bar = QProgressBar()
             progress_bar.setRange(0, 100)
-            progress_bar.setValue(int(rate))
+            progress_bar.setValue(min(int(rate), 100))
             
             # 设置进度条颜色
             if rate < 50:
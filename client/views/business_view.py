@@ -7,7 +7,12 @@ from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLa
                            QTableWidget, QTableWidgetItem, QHeaderView, QComboBox,
                            QLineEdit, QDateEdit, QFormLayout, QDialog, QMessageBox,
                            QSpinBox, QDoubleSpinBox, QTextEdit, QGroupBox, QProgressBar)
-from PyQt6.QtCore import Qt, pyqtSignal, QDate
+from PyQt6.QtCore import Qt, pyqtSignal, QDate, QTimer
+
+from .reference_data import get_reference_data
+
+# 每页加载的业务事件数量
+PAGE_SIZE = 200
 
 class BusinessEventView(QWidget):
     """业务事件管理视图"""
@@ -17,6 +22,9 @@ class BusinessEventView(QWidget):
         self.token = token
         self.user_data = user_data
         self.departments = []
+        self.data = []
+        self.next_cursor = None
+        self.total = None
         self.init_ui()
         self.load_departments()
         self.load_data()
@@ -39,6 +47,11 @@ class BusinessEventView(QWidget):
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("搜索项目名称...")
         self.search_input.textChanged.connect(self.search_data)
+        # 输入停止300毫秒后再向服务端查询，避免每个按键都发请求
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(300)
+        self.search_timer.timeout.connect(self.load_data)
         self.search_input.setMaximumWidth(200)
         top_layout.addWidget(self.search_input)
         
@@ -70,33 +83,61 @@ class BusinessEventView(QWidget):
         self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
         self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
         main_layout.addWidget(self.table)
+
+        # 分页：显示已加载数量，按需加载下一页
+        bottom_layout = QHBoxLayout()
+        self.count_label = QLabel()
+        bottom_layout.addWidget(self.count_label)
+        bottom_layout.addStretch()
+        self.load_more_button = QPushButton("加载更多")
+        self.load_more_button.setEnabled(False)
+        self.load_more_button.clicked.connect(self.load_more)
+        bottom_layout.addWidget(self.load_more_button)
+        main_layout.addLayout(bottom_layout)
     
     def load_departments(self):
         """加载部门数据"""
         try:
-            response = requests.get(
-                "http://localhost:8000/departments",
-                headers={"Authorization": f"Bearer {self.token}"}
-            )
+            departments = get_reference_data("/departments", self.token)
             
-            if response.status_code == 200:
-                self.departments = response.json()
+            if departments is not None:
+                self.departments = departments
             else:
                 QMessageBox.warning(self, "加载失败", "无法加载部门数据")
         except Exception as e:
             QMessageBox.warning(self, "错误", f"加载部门数据时发生错误: {str(e)}")
     
-    def load_data(self):
-        """加载业务事件数据"""
+    def load_data(self, cursor=None):
+        """加载业务事件数据（筛选在服务端完成，cursor为空时重新加载第一页）"""
+        params = {"limit": PAGE_SIZE}
+        if cursor is None:
+            params["with_total"] = "true"
+        else:
+            params["cursor"] = cursor
+        status_filter = self.filter_combo.currentData()
+        if status_filter:
+            params["status"] = status_filter
+        search_text = self.search_input.text().strip()
+        if search_text:
+            params["keyword"] = search_text
+
         try:
             response = requests.get(
                 "http://localhost:8000/business_events",
+                params=params,
                 headers={"Authorization": f"Bearer {self.token}"}
             )
             
             if response.status_code == 200:
-                self.data = response.json()
+                page = response.json()
+                if cursor is None:
+                    self.data = page["items"]
+                    self.total = page.get("total")
+                else:
+                    self.data.extend(page["items"])
+                self.next_cursor = page["next_cursor"]
                 self.display_data(self.data)
+                self.update_page_status()
             else:
                 QMessageBox.warning(self, "加载失败", "无法加载业务事件数据")
         except Exception as e:
@@ -196,24 +237,27 @@ class BusinessEventView(QWidget):
             
             self.table.setCellWidget(row, 8, btn_widget)
     
+    def load_more(self):
+        """加载下一页"""
+        if self.next_cursor:
+            self.load_data(self.next_cursor)
+
+    def update_page_status(self):
+        """更新分页状态"""
+        if self.total is not None:
+            self.count_label.setText(f"已加载 {len(self.data)} / {self.total} 条")
+        else:
+            self.count_label.setText(f"已加载 {len(self.data)} 条")
+        self.load_more_button.setEnabled(bool(self.next_cursor))
+
     def search_data(self):
-        """搜索数据"""
-        search_text = self.search_input.text().lower()
-        status_filter = self.filter_combo.currentData()
-        
-        filtered_data = []
-        for item in self.data:
-            project_name_match = search_text in item["project_name"].lower()
-            status_match = not status_filter or item["status"] == status_filter
-            
-            if project_name_match and status_match:
-                filtered_data.append(item)
-        
-        self.display_data(filtered_data)
+        """搜索数据（延迟后由服务端按项目名称筛选）"""
+        self.search_timer.start()
     
     def filter_data(self):
         """按状态过滤数据"""
-        self.search_data()
+        self.search_timer.stop()
+        self.load_data()
     
     def show_add_dialog(self):
         """显示添加业务事件对话框"""
@@ -437,13 +481,10 @@ class BusinessEventDialog(QDialog):
     def load_customers(self):
         """加载客户数据"""
         try:
-            response = requests.get(
-                "http://localhost:8000/customers",
-                headers={"Authorization": f"Bearer {self.token}"}
-            )
+            customers = get_reference_data("/customers", self.token)
             
-            if response.status_code == 200:
-                self.customers = response.json()
+            if customers is not None:
+                self.customers = customers
                 # 清空下拉菜单（保留默认选项）
                 while self.customer_combo.count() > 1:
                     self.customer_combo.removeItem(1)
@@ -6,8 +6,34 @@ from datetime import datetime
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
                            QTableWidget, QTableWidgetItem, QHeaderView, QComboBox,
                            QLineEdit, QDateEdit, QFormLayout, QDialog, QMessageBox,
-                           QSpinBox, QDoubleSpinBox, QTextEdit, QGroupBox, QTabWidget)
-from PyQt6.QtCore import Qt, pyqtSignal, QDate
+                           QSpinBox, QDoubleSpinBox, QTextEdit, QGroupBox, QTabWidget,
+                           QFileDialog, QProgressDialog)
+from PyQt6.QtCore import Qt, pyqtSignal, QDate, QTimer
+
+from .reference_data import get_reference_data
+
+# 每页加载的财务记录数量
+PAGE_SIZE = 200
+
+# 导出下载时每次写入磁盘的字节数
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+
+def count_csv_rows(chunk, in_quotes=False):
+    """统计一段CSV字节中结束的记录数，返回 (记录数, 结束时是否仍在引号内)
+
+    csv 模块写出的字段中，引号内的换行属于字段内容，字段内的引号写成两个引号，
+    因此换行前累计的引号个数为偶数时才是一条记录的结束。in_quotes 在分块之间传递。
+    """
+    rows = 0
+    lines = chunk.split(b"\n")
+    for line in lines[:-1]:
+        in_quotes ^= line.count(b'"') % 2 == 1
+        if not in_quotes:
+            rows += 1
+    in_quotes ^= lines[-1].count(b'"') % 2 == 1
+    return rows, in_quotes
+
 
 class FinancialRecordView(QWidget):
     """财务记录管理视图"""
@@ -18,6 +44,8 @@ class FinancialRecordView(QWidget):
         self.user_data = user_data
         self.account_subjects = []
         self.business_events = []
+        self.data = []
+        self.next_cursor = None
         self.init_ui()
         self.load_account_subjects()
         self.load_business_events()
@@ -42,12 +70,22 @@ class FinancialRecordView(QWidget):
         self.search_input.setPlaceholderText("搜索项目名称...")
         self.search_input.textChanged.connect(self.search_data)
         self.search_input.setMaximumWidth(200)
+        # 输入停止300毫秒后再向服务端查询
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(300)
+        self.search_timer.timeout.connect(self.load_data)
         top_layout.addWidget(self.search_input)
         
         # 新建按钮
         self.add_button = QPushButton("新建财务记录")
         self.add_button.clicked.connect(self.show_add_dialog)
         top_layout.addWidget(self.add_button)
+
+        # 导出按钮
+        self.export_button = QPushButton("导出")
+        self.export_button.clicked.connect(self.export_data)
+        top_layout.addWidget(self.export_button)
         
         main_layout.addLayout(top_layout)
         
@@ -94,6 +132,12 @@ class FinancialRecordView(QWidget):
         self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
         self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
         records_layout.addWidget(self.table)
+
+        # 加载下一页
+        self.load_more_button = QPushButton("加载更多")
+        self.load_more_button.setEnabled(False)
+        self.load_more_button.clicked.connect(self.load_more)
+        records_layout.addWidget(self.load_more_button)
         
         # 添加选项卡
         self.tabs.addTab(self.pending_tab, "待处理业务")
@@ -104,55 +148,40 @@ class FinancialRecordView(QWidget):
     def load_account_subjects(self):
         """加载会计科目数据"""
         try:
-            response = requests.get(
-                "http://localhost:8000/account_subjects",
-                headers={"Authorization": f"Bearer {self.token}"}
-            )
+            account_subjects = get_reference_data("/account_subjects", self.token)
             
-            if response.status_code == 200:
-                self.account_subjects = response.json()
+            if account_subjects is not None:
+                self.account_subjects = account_subjects
             else:
                 QMessageBox.warning(self, "加载失败", "无法加载会计科目数据")
         except Exception as e:
             QMessageBox.warning(self, "错误", f"加载会计科目数据时发生错误: {str(e)}")
     
     def load_business_events(self):
-        """加载已审批的业务事件数据"""
+        """加载已审批但未创建财务记录的业务事件"""
         try:
-            response = requests.get(
-                "http://localhost:8000/business_events",
-                headers={"Authorization": f"Bearer {self.token}"}
-            )
-            
-            if response.status_code == 200:
-                # 只保留已审批但未创建财务记录的业务事件
-                all_events = response.json()
-                self.business_events = []
-                
-                for event in all_events:
-                    if event["status"] == "已审批":
-                        # 检查是否已有财务记录
-                        has_finance = False
-                        try:
-                            # 查询关联的财务记录
-                            fin_response = requests.get(
-                                f"http://localhost:8000/business_events/{event['id']}/related",
-                                headers={"Authorization": f"Bearer {self.token}"}
-                            )
-                            
-                            if fin_response.status_code == 200:
-                                related_data = fin_response.json()
-                                has_finance = len(related_data.get("financial_records", [])) > 0
-                        except:
-                            pass
-                        
-                        if not has_finance:
-                            self.business_events.append(event)
-                
-                # 更新待处理业务表格
-                self.display_pending_events()
-            else:
-                QMessageBox.warning(self, "加载失败", "无法加载业务事件数据")
+            params = {"limit": 1000}
+            business_events = []
+            while True:
+                response = requests.get(
+                    "http://localhost:8000/business_events/unposted",
+                    params=params,
+                    headers={"Authorization": f"Bearer {self.token}"}
+                )
+                if response.status_code != 200:
+                    QMessageBox.warning(self, "加载失败", "无法加载业务事件数据")
+                    return
+
+                page = response.json()
+                business_events.extend(page["items"])
+                if not page["next_cursor"]:
+                    break
+                params["cursor"] = page["next_cursor"]
+
+            self.business_events = business_events
+
+            # 更新待处理业务表格
+            self.display_pending_events()
         except Exception as e:
             QMessageBox.warning(self, "错误", f"加载业务事件数据时发生错误: {str(e)}")
     
@@ -203,16 +232,30 @@ class FinancialRecordView(QWidget):
             
             self.pending_table.setCellWidget(row, 5, btn_widget)
     
-    def load_data(self):
-        """加载财务记录数据"""
+    def load_data(self, cursor=None):
+        """加载财务记录数据（搜索在服务端完成，cursor为空时重新加载第一页）"""
+        params = {"limit": PAGE_SIZE}
+        if cursor:
+            params["cursor"] = cursor
+        search_text = self.search_input.text().strip()
+        if search_text:
+            params["keyword"] = search_text
+
         try:
             response = requests.get(
                 "http://localhost:8000/financial_records",
+                params=params,
                 headers={"Authorization": f"Bearer {self.token}"}
             )
             
             if response.status_code == 200:
-                self.data = response.json()
+                page = response.json()
+                if cursor:
+                    self.data.extend(page["items"])
+                else:
+                    self.data = page["items"]
+                self.next_cursor = page["next_cursor"]
+                self.load_more_button.setEnabled(bool(self.next_cursor))
                 self.display_data(self.data)
             else:
                 QMessageBox.warning(self, "加载失败", "无法加载财务记录数据")
@@ -272,19 +315,84 @@ class FinancialRecordView(QWidget):
             
             self.table.setCellWidget(row, 7, btn_widget)
     
+    def load_more(self):
+        """加载下一页"""
+        if self.next_cursor:
+            self.load_data(self.next_cursor)
+
     def search_data(self):
-        """搜索数据"""
-        search_text = self.search_input.text().lower()
-        
-        filtered_data = []
-        for item in self.data:
-            project_name = item.get("project_name", "").lower()
-            account_name = item["account_name"].lower()
-            
-            if search_text in project_name or search_text in account_name:
-                filtered_data.append(item)
-        
-        self.display_data(filtered_data)
+        """搜索数据（延迟后由服务端按项目名称或科目名称筛选）"""
+        self.search_timer.start()
+
+    def export_data(self):
+        """按当前搜索条件导出财务记录，边下载边写入文件并显示进度"""
+        path, _ = QFileDialog.getSaveFileName(
+            self, "导出财务记录", f"财务记录_{datetime.now().strftime('%Y%m%d')}.xlsx",
+            "Excel 文件 (*.xlsx);;CSV 文件 (*.csv)"
+        )
+        if not path:
+            return
+
+        params = {"format": "csv" if path.lower().endswith(".csv") else "xlsx"}
+        search_text = self.search_input.text().strip()
+        if search_text:
+            params["keyword"] = search_text
+
+        progress = QProgressDialog("正在导出财务记录...", "取消", 0, 100, self)
+        progress.setWindowTitle("导出")
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setMinimumDuration(0)
+        progress.setValue(0)
+
+        canceled = False
+        try:
+            with requests.get(
+                "http://localhost:8000/financial_records/export",
+                params=params,
+                headers={"Authorization": f"Bearer {self.token}"},
+                stream=True
+            ) as response:
+                if response.status_code != 200:
+                    progress.close()
+                    QMessageBox.warning(self, "导出失败", response.json().get("detail", "无法导出财务记录"))
+                    return
+
+                # Excel 文件有 Content-Length，按字节计算进度；CSV 为流式响应，按已收到的记录数计算
+                # （字段内可能有换行，不能直接数换行符）
+                total_bytes = 0
+                if "Content-Encoding" not in response.headers:
+                    total_bytes = int(response.headers.get("Content-Length", 0))
+                total_rows = int(response.headers.get("X-Total-Count", 0))
+                received_bytes = 0
+                received_rows = 0
+                in_quotes = False
+
+                with open(path, "wb") as f:
+                    for chunk in response.iter_content(EXPORT_CHUNK_SIZE):
+                        f.write(chunk)
+                        received_bytes += len(chunk)
+                        rows, in_quotes = count_csv_rows(chunk, in_quotes)
+                        received_rows += rows
+                        if total_bytes:
+                            progress.setValue(min(99, received_bytes * 100 // total_bytes))
+                        elif total_rows:
+                            # 第一行是表头
+                            progress.setValue(min(99, received_rows * 100 // (total_rows + 1)))
+                        if progress.wasCanceled():
+                            canceled = True
+                            break
+        except Exception as e:
+            progress.close()
+            QMessageBox.warning(self, "错误", f"导出时发生错误: {str(e)}")
+            return
+
+        if canceled:
+            if os.path.exists(path):
+                os.remove(path)
+            return
+
+        progress.setValue(100)
+        QMessageBox.information(self, "导出成功", f"已导出到 {path}")
     
     def show_add_dialog(self):
         """显示添加财务记录对话框"""
@@ -0,0 +1,29 @@
+# 业财融合管理系统 - 参考数据缓存
+# 部门、会计科目、客户数据在本地缓存，再次加载时携带 If-None-Match，
+# 服务端数据未变化时返回 304，直接使用缓存
+
+import requests
+
+API_BASE_URL = "http://localhost:8000"
+
+# 接口路径 -> (ETag, 数据)
+_cache = {}
+
+def get_reference_data(path, token):
+    """获取参考数据，失败时返回None"""
+    headers = {"Authorization": f"Bearer {token}"}
+    cached = _cache.get(path)
+    if cached:
+        headers["If-None-Match"] = cached[0]
+
+    response = requests.get(f"{API_BASE_URL}{path}", headers=headers)
+
+    if response.status_code == 304 and cached:
+        return cached[1]
+    if response.status_code == 200:
+        data = response.json()
+        etag = response.headers.get("ETag")
+        if etag:
+            _cache[path] = (etag, data)
+        return data
+    return None
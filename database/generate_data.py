@@ -0,0 +1,546 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+业财融合管理系统 - 容量测试数据生成工具
+
+sample_data.sql 只有少量示例数据，无法复现生产规模下的性能问题。本工具按指定规模
+（例如 1万 / 100万 / 1000万 个业务事件）生成一个完整的数据库：
+- 在 schema.sql 与 sample_data.sql 的基础上生成部门、用户、客户与审批配置
+- 业务事件的日期按月份季节性、工作日与逐年增长分布，金额按事件类型取对数正态分布，
+  部门与客户按长尾（Zipf）分布
+- 审批链按审批配置生成（与提交审批的规则一致），越近期的事件越可能仍在审批中；
+  状态历史、审批记录与业务事件状态相互一致
+- 审批通过的事件按借贷成对生成财务记录；预算按各部门每月的实际支出生成
+随机数使用固定种子，相同的参数与截止日期生成相同的数据。
+
+导入方式：关闭日志与同步（journal_mode=OFF, synchronous=OFF）、独占锁，单个事务内
+按批 executemany；索引、触发器与汇总表在数据导入之后由迁移脚本一次性创建，
+最后全量对账预算已用金额、ANALYZE 并切换为WAL模式。
+
+用法:
+    python generate_data.py [数据库路径] [--events 1m] [--years 3] [--seed 42] [--force]
+服务端使用生成的数据库:
+    FINANCE_DB_PATH=../data/finance_capacity.db python app.py
+"""
+
+import argparse
+import math
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import date, timedelta
+
+from migrate import migrate, MigrationError
+from reconcile import reconcile_budgets
+
+# 事务编号的缩写与格式使用服务端的定义，生成的编号与 allocate_codes 分配的编号一致
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "server"))
+from sequences import event_type_prefix, format_code
+
+# 定义路径
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+DEFAULT_DB_PATH = os.path.join(DATA_DIR, 'finance_capacity.db')
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'schema.sql')
+SAMPLE_DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sample_data.sql')
+
+# 导入期间的连接设置：不写回滚日志、不等待落盘
+BULK_LOAD_PRAGMAS = (
+    ("journal_mode", "OFF"),
+    ("synchronous", "OFF"),
+    ("locking_mode", "EXCLUSIVE"),
+    ("temp_store", "MEMORY"),
+    ("cache_size", -262144),         # 约256MB页缓存
+)
+
+# 每批生成并写入的业务事件数量
+BATCH_EVENTS = 20000
+
+# 事件类型: (占比, 金额中位数, 对数标准差, 最小金额, 最大金额)
+EVENT_TYPES = {
+    "报销": (0.45, 1200.0, 0.9, 20.0, 200000.0),
+    "销售": (0.25, 60000.0, 1.0, 500.0, 20000000.0),
+    "采购": (0.20, 25000.0, 1.1, 200.0, 10000000.0),
+    "合同": (0.10, 250000.0, 0.9, 5000.0, 50000000.0),
+}
+
+# 财务记录：事件类型 -> (业务科目候选, 结算科目, 方向)，每个事件生成一借一贷两条记录
+RECORD_TEMPLATES = {
+    "销售": ([("4001001", "产品销售收入"), ("4001002", "服务收入")], ("1002001", "工商银行"), "收入"),
+    "合同": ([("4001002", "服务收入")], ("1002001", "工商银行"), "收入"),
+    "采购": ([("5001001", "原材料成本"), ("6001001", "办公费用")], ("1002002", "建设银行"), "支出"),
+    "报销": ([("6001002", "差旅费用"), ("6602002", "业务招待费"), ("6001001", "办公费用")],
+             ("1001001", "人民币现金"), "支出"),
+}
+
+# 月份季节性（2月春节淡季，年末冲量）与周末权重
+MONTH_WEIGHTS = (0.9, 0.6, 1.0, 1.0, 1.0, 1.1, 1.0, 0.9, 1.0, 1.0, 1.1, 1.4)
+WEEKEND_WEIGHT = 0.15
+
+# 业务量逐年增长率
+ANNUAL_GROWTH = 0.25
+
+# 流程参数
+NEW_RATE = 0.03                 # 创建后尚未提交审批的比例
+SUBMIT_DELAY_HOURS = 4          # 创建到提交的平均间隔
+APPROVAL_DELAY_HOURS = 20       # 每一级审批的平均耗时
+REJECT_RATE = 0.07              # 审批链被拒绝的概率
+POSTING_DELAY_HOURS = 48        # 审批通过到入账的平均间隔
+POSTING_RATE = 0.97             # 审批通过后最终入账的比例
+
+# 审批配置：事件类型 -> [(审批级别, 金额阈值), ...]
+APPROVAL_LEVELS = {
+    "报销": [(1, 0.0), (2, 5000.0)],
+    "销售": [(1, 10000.0), (2, 100000.0), (3, 1000000.0)],
+    "采购": [(1, 0.0), (2, 50000.0), (3, 500000.0)],
+    "合同": [(1, 0.0), (2, 200000.0), (3, 2000000.0)],
+}
+
+# 用户角色分布
+USER_ROLES = (("业务", 0.70), ("财务", 0.15), ("审批", 0.12), ("管理员", 0.03))
+
+# 长尾分布的指数
+ZIPF_EXPONENT = 1.1
+
+CITIES = ("北京", "上海", "广州", "深圳", "杭州", "南京", "成都", "武汉", "西安", "苏州", "天津", "重庆")
+COMPANY_WORDS = ("宏达", "华信", "恒通", "新锐", "金源", "瑞丰", "博远", "中科", "天成", "海纳", "启明", "东方")
+COMPANY_SUFFIXES = ("科技有限公司", "贸易有限公司", "电子有限公司", "软件有限公司", "实业有限公司", "网络科技有限公司")
+PROJECT_NAMES = {
+    "报销": ("差旅费报销", "办公用品报销", "业务招待报销", "培训费报销", "交通费报销"),
+    "销售": ("软件产品销售", "硬件设备销售", "技术服务销售", "系统集成销售"),
+    "采购": ("办公设备采购", "原材料采购", "服务器采购", "软件许可采购"),
+    "合同": ("技术服务合同", "运维服务合同", "咨询服务合同", "定制开发合同"),
+}
+SURNAMES = "王李张刘陈杨黄赵吴周徐孙马朱胡郭何高林罗"
+
+
+def parse_count(value):
+    """解析规模参数：10000 / 10k / 1m / 1.5m"""
+    text = value.strip().lower()
+    multiplier = 1
+    if text.endswith("k"):
+        multiplier, text = 1000, text[:-1]
+    elif text.endswith("m"):
+        multiplier, text = 1000000, text[:-1]
+    try:
+        count = int(float(text) * multiplier)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"无效的数量: {value}")
+    if count < 0:
+        raise argparse.ArgumentTypeError(f"无效的数量: {value}")
+    return count
+
+
+def zipf_weights(count):
+    """长尾分布的累积权重"""
+    total = 0.0
+    cumulative = []
+    for rank in range(1, count + 1):
+        total += 1.0 / rank ** ZIPF_EXPONENT
+        cumulative.append(total)
+    return cumulative
+
+
+class Clock:
+    """以开始日期零点为原点的秒数与时间字符串之间的转换（比 datetime 格式化快）"""
+
+    def __init__(self, start_date, days):
+        self.start_date = start_date
+        self.days = [start_date + timedelta(days=i) for i in range(days)]
+        self.day_strings = [d.isoformat() for d in self.days]
+
+    def timestamp(self, seconds):
+        day, rest = divmod(int(seconds), 86400)
+        hours, rest = divmod(rest, 3600)
+        minutes, secs = divmod(rest, 60)
+        return f"{self.day_strings[day]} {hours:02d}:{minutes:02d}:{secs:02d}"
+
+    def day(self, seconds):
+        return self.days[int(seconds) // 86400]
+
+
+class Generator:
+    """按批生成业务事件及其审批、状态历史与财务记录"""
+
+    def __init__(self, conn, args):
+        self.conn = conn
+        self.rng = random.Random(args.seed)
+        self.events = args.events
+        self.end_date = args.end_date
+        self.start_date = date(args.end_date.year - args.years + 1, 1, 1)
+        self.span_days = (self.end_date - self.start_date).days + 1
+        # 时间可能越过截止日期（尚未发生），预留足够的天数
+        self.clock = Clock(self.start_date, self.span_days + 400)
+        self.now = self.span_days * 86400
+        self.users_count = args.users
+        self.customers_count = args.customers
+        self.departments_count = args.departments
+
+        # (部门, 年, 月) -> 支出合计，用于生成预算
+        self.spend = {}
+        # (缩写, 日期) -> 已分配的事务编号序号
+        self.sequences = {}
+
+    def _next_id(self, table):
+        return self.conn.execute(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {table}").fetchone()[0]
+
+    # ---- 基础数据 ----
+
+    def generate_reference_data(self):
+        rng = self.rng
+        conn = self.conn
+
+        # 部门：在示例的一级部门下增加小组
+        top_departments = conn.execute(
+            "SELECT id, name, code FROM departments WHERE parent_id IS NULL AND code != 'SYS001' ORDER BY id"
+        ).fetchall()
+        department_rows = []
+        for i in range(self.departments_count):
+            parent_id, parent_name, parent_code = top_departments[i % len(top_departments)]
+            number = i // len(top_departments) + 1
+            department_rows.append((f"{parent_name}第{number}组", f"{parent_code[:3]}{200 + number}", parent_id))
+        conn.executemany("INSERT INTO departments (name, code, parent_id) VALUES (?, ?, ?)", department_rows)
+
+        # 叶子部门承担业务
+        self.departments = [row[0] for row in conn.execute("""
+            SELECT id FROM departments d
+            WHERE code != 'SYS001' AND NOT EXISTS (SELECT 1 FROM departments c WHERE c.parent_id = d.id)
+            ORDER BY id
+        """)]
+        rng.shuffle(self.departments)
+        self.department_weights = zipf_weights(len(self.departments))
+        department_names = {row[0]: row[1] for row in conn.execute("SELECT id, name FROM departments")}
+
+        # 用户
+        roles = [role for role, _ in USER_ROLES]
+        role_weights = [weight for _, weight in USER_ROLES]
+        user_rows = []
+        for i in range(self.users_count):
+            role = rng.choices(roles, role_weights)[0]
+            department_id = rng.choice(self.departments)
+            user_rows.append((f"user{i + 1:06d}", "password123", role, department_names[department_id],
+                              f"user{i + 1:06d}@example.com", f"139{rng.randrange(10 ** 8):08d}"))
+        conn.executemany("""
+            INSERT INTO users (username, password, role, department, email, phone) VALUES (?, ?, ?, ?, ?, ?)
+        """, user_rows)
+
+        users = conn.execute("SELECT id, username, role FROM users ORDER BY id").fetchall()
+        self.usernames = {user_id: username for user_id, username, _ in users}
+        self.business_users = [user_id for user_id, _, role in users if role in ("业务", "业务人员")]
+        self.finance_users = [user_id for user_id, _, role in users if role in ("财务", "财务人员")]
+        self.approvers = [user_id for user_id, _, role in users if role in ("审批", "管理员")]
+        self.admin_id = next(user_id for user_id, _, role in users if role == "管理员")
+
+        # 客户
+        customer_rows = []
+        for i in range(self.customers_count):
+            name = f"{rng.choice(CITIES)}{rng.choice(COMPANY_WORDS)}{rng.choice(COMPANY_SUFFIXES)}{i + 1}"
+            contact = f"{rng.choice(SURNAMES)}经理"
+            customer_rows.append((name, f"CUST{i + 1000:06d}", contact, f"138{rng.randrange(10 ** 8):08d}",
+                                  f"{rng.choice(CITIES)}市", f"contact{i + 1}@example.com"))
+        conn.executemany("""
+            INSERT INTO customers (name, code, contact_person, contact_phone, address, email) VALUES (?, ?, ?, ?, ?, ?)
+        """, customer_rows)
+        self.customers = [row[0] for row in conn.execute("SELECT id FROM customers ORDER BY id")]
+        rng.shuffle(self.customers)
+        self.customer_weights = zipf_weights(len(self.customers))
+
+        # 审批配置：每个 (事件类型, 部门) 的审批级别
+        config_rows = []
+        for department_id in self.departments:
+            for event_type, levels in APPROVAL_LEVELS.items():
+                for level, threshold in levels:
+                    config_rows.append((event_type, department_id, rng.choice(self.approvers), level, threshold))
+        conn.executemany("""
+            INSERT INTO approval_configs (event_type, department_id, approver_id, approval_level, amount_threshold, is_active)
+            VALUES (?, ?, ?, ?, ?, 1)
+        """, config_rows)
+
+        # 审批路由：(事件类型, 部门) -> [(金额阈值, 审批人, 级别), ...]（与提交审批的查询规则一致）
+        self.routes = {}
+        for event_type, department_id, approver_id, level, threshold in conn.execute("""
+            SELECT event_type, department_id, approver_id, approval_level, amount_threshold
+            FROM approval_configs WHERE is_active = 1 ORDER BY approval_level
+        """):
+            self.routes.setdefault((event_type, department_id), []).append((threshold, approver_id, level))
+
+    # ---- 业务数据 ----
+
+    def _day_counts(self):
+        """各天的事件数：按季节性、工作日与增长率分配，总数恰好为 events"""
+        weights = []
+        for i in range(self.span_days):
+            day = self.clock.days[i]
+            weight = MONTH_WEIGHTS[day.month - 1] * (WEEKEND_WEIGHT if day.weekday() >= 5 else 1.0)
+            weights.append(weight * (1 + ANNUAL_GROWTH) ** (i / 365))
+        total = sum(weights)
+        counts = []
+        expected = 0.0
+        assigned = 0
+        for weight in weights:
+            expected += self.events * weight / total
+            count = int(round(expected)) - assigned
+            counts.append(count)
+            assigned += count
+        return counts
+
+    def _route(self, event_type, department_id, amount):
+        chain = [(approver_id, level) for threshold, approver_id, level in self.routes.get((event_type, department_id), ())
+                 if threshold is None or threshold <= amount]
+        # 没有匹配的配置时由管理员审批
+        return chain or [(self.admin_id, 1)]
+
+    def _project_code(self, event_type, day):
+        prefix = event_type_prefix(event_type)
+        key = (prefix, day)
+        sequence = self.sequences.get(key, 0) + 1
+        self.sequences[key] = sequence
+        return format_code(prefix, day.strftime("%Y%m%d"), sequence)
+
+    def generate_events(self):
+        rng = self.rng
+        clock = self.clock
+        now = self.now
+        timestamp = clock.timestamp
+
+        event_types = list(EVENT_TYPES)
+        type_weights = [EVENT_TYPES[t][0] for t in event_types]
+        amount_params = {t: (math.log(median), sigma, low, high)
+                         for t, (_, median, sigma, low, high) in EVENT_TYPES.items()}
+
+        event_id = self._next_id("business_events")
+        approval_id = self._next_id("approvals")
+        history_id = self._next_id("status_history")
+        record_id = self._next_id("financial_records")
+
+        events, approvals, history, records = [], [], [], []
+        counts = {"business_events": 0, "approvals": 0, "status_history": 0, "financial_records": 0}
+        generated = 0
+        start = time.perf_counter()
+
+        for day_index, day_count in enumerate(self._day_counts()):
+            if not day_count:
+                continue
+            day = clock.days[day_index]
+            day_start = day_index * 86400
+            # 当天的事件按创建时间排序，id 与创建时间同序
+            created_times = sorted(day_start + rng.randint(30600, 68400) for _ in range(day_count))
+            types = rng.choices(event_types, type_weights, k=day_count)
+            departments = rng.choices(self.departments, cum_weights=self.department_weights, k=day_count)
+
+            for created, event_type, department_id in zip(created_times, types, departments):
+                mu, sigma, low, high = amount_params[event_type]
+                amount = round(min(max(rng.lognormvariate(mu, sigma), low), high), 2)
+                creator = rng.choice(self.business_users)
+                customer_id = None
+                if event_type in ("销售", "合同"):
+                    customer_id = rng.choices(self.customers, cum_weights=self.customer_weights)[0]
+                project_code = self._project_code(event_type, day)
+                project_name = rng.choice(PROJECT_NAMES[event_type])
+                status = "新建"
+                updated = created
+
+                submitted = created + rng.expovariate(1 / (SUBMIT_DELAY_HOURS * 3600))
+                if rng.random() >= NEW_RATE and submitted <= now:
+                    status = "待审批"
+                    updated = submitted
+                    history.append((history_id, event_id, timestamp(submitted), "待审批",
+                                    self.usernames[creator], "提交到审批流程"))
+                    history_id += 1
+
+                    chain = self._route(event_type, department_id, amount)
+                    rejected = rng.random() < REJECT_RATE
+                    rejected_level = rng.randrange(len(chain)) if rejected else -1
+                    decided = submitted
+                    for index, (approver_id, level) in enumerate(chain):
+                        approval_status = "待审批"
+                        approval_date = None
+                        comment = None
+                        if status in ("待审批", "审批中"):
+                            decided += rng.expovariate(1 / (APPROVAL_DELAY_HOURS * 3600))
+                            if decided <= now:
+                                approval_date = timestamp(decided)
+                                operator = self.usernames[approver_id]
+                                updated = decided
+                                if index == rejected_level:
+                                    approval_status, comment, status = "已拒绝", "不符合要求", "已拒绝"
+                                    history.append((history_id, event_id, approval_date, "已拒绝", operator, "审批拒绝"))
+                                else:
+                                    approval_status, comment = "已通过", "同意"
+                                    status = "已审批" if index == len(chain) - 1 else "审批中"
+                                    history.append((history_id, event_id, approval_date, status, operator, "审批通过"))
+                                history_id += 1
+                            else:
+                                # 尚未审批到该级
+                                decided = now + 1
+                        approvals.append((approval_id, event_id, approver_id, level, approval_status, comment,
+                                          approval_date, timestamp(submitted), approval_date or timestamp(submitted)))
+                        approval_id += 1
+
+                    # 审批通过后入账：一借一贷两条记录
+                    posted = decided + rng.expovariate(1 / (POSTING_DELAY_HOURS * 3600))
+                    if status == "已审批" and posted <= now and rng.random() < POSTING_RATE:
+                        subjects, settlement, direction = RECORD_TEMPLATES[event_type]
+                        record_day = clock.day(posted)
+                        record_date = record_day.isoformat()
+                        posted_at = timestamp(posted)
+                        finance_user = rng.choice(self.finance_users)
+                        for account_code, account_name in (rng.choice(subjects), settlement):
+                            records.append((record_id, event_id, account_code, account_name, amount, direction,
+                                            record_date, record_day.year, record_day.month,
+                                            project_name, finance_user, posted_at, posted_at))
+                            record_id += 1
+                        if direction == "支出":
+                            key = (department_id, record_day.year, record_day.month)
+                            self.spend[key] = self.spend.get(key, 0) + amount * 2
+
+                events.append((event_id, event_type, project_name, project_code, customer_id, amount,
+                               day.isoformat(), f"{project_name}（{project_code}）", department_id, creator,
+                               status, timestamp(created), timestamp(updated)))
+                event_id += 1
+
+            if len(events) >= BATCH_EVENTS:
+                self._flush(events, approvals, history, records, counts)
+                generated = counts["business_events"]
+                rate = generated / (time.perf_counter() - start)
+                print(f"已生成业务事件 {generated:,}/{self.events:,}（{rate:,.0f} 条/秒）")
+
+        self._flush(events, approvals, history, records, counts)
+        return counts
+
+    def _flush(self, events, approvals, history, records, counts):
+        conn = self.conn
+        conn.executemany("""
+            INSERT INTO business_events (id, event_type, project_name, project_code, customer_id, amount,
+            event_date, description, department_id, created_by, status, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, events)
+        conn.executemany("""
+            INSERT INTO approvals (id, business_event_id, approver_id, approval_level, status, comment,
+            approval_date, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, approvals)
+        conn.executemany("""
+            INSERT INTO status_history (id, business_event_id, timestamp, status, operator, remarks)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, history)
+        conn.executemany("""
+            INSERT INTO financial_records (id, business_event_id, account_code, account_name, amount, direction,
+            record_date, fiscal_year, fiscal_period, description, created_by, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, records)
+        counts["business_events"] += len(events)
+        counts["approvals"] += len(approvals)
+        counts["status_history"] += len(history)
+        counts["financial_records"] += len(records)
+        for rows in (events, approvals, history, records):
+            rows.clear()
+
+    def generate_budgets(self):
+        """各叶子部门每月的预算：实际支出上下浮动，已用金额由对账计算"""
+        rng = self.rng
+        subject = self.conn.execute("SELECT id FROM account_subjects WHERE code = '6001'").fetchone()
+        subject_id = subject[0] if subject else None
+        rows = []
+        for year in range(self.start_date.year, self.end_date.year + 1):
+            for month in range(1, 13):
+                for department_id in self.departments:
+                    spend = self.spend.get((department_id, year, month), 0)
+                    amount = max(round(spend * rng.uniform(0.85, 1.35), -2), 10000.0)
+                    rows.append((department_id, year, month, subject_id, amount, self.admin_id))
+        self.conn.executemany("""
+            INSERT INTO budgets (department_id, year, month, account_subject_id, amount, used_amount, created_by)
+            VALUES (?, ?, ?, ?, ?, 0, ?)
+        """, rows)
+        return len(rows)
+
+
+def build_database(db_path, args):
+    """生成数据库，返回各表生成的行数"""
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        for pragma, value in BULK_LOAD_PRAGMAS:
+            conn.execute(f"PRAGMA {pragma} = {value}")
+
+        with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
+            conn.executescript(f.read())
+        with open(SAMPLE_DATA_PATH, 'r', encoding='utf-8') as f:
+            conn.executescript(f.read())
+
+        # 数据在同一事务中导入，此时还没有迁移创建的索引与触发器
+        generator = Generator(conn, args)
+        conn.execute("BEGIN")
+        generator.generate_reference_data()
+        counts = generator.generate_events()
+        counts["budgets"] = generator.generate_budgets()
+        conn.execute("COMMIT")
+
+        # 数据导入后一次性创建索引、触发器并初始化汇总表
+        print("正在创建索引与汇总表...")
+        migrate(conn)
+
+        print("正在对账预算已用金额...")
+        reconcile_budgets(conn, full=True)
+        conn.execute("COMMIT")
+
+        print("正在更新统计信息...")
+        conn.execute("PRAGMA analysis_limit = 1000")
+        conn.execute("ANALYZE")
+        conn.execute("PRAGMA locking_mode = NORMAL")
+        conn.execute("PRAGMA journal_mode = WAL")
+        return counts
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成容量测试数据库")
+    parser.add_argument("db_path", nargs="?", default=DEFAULT_DB_PATH, help="生成的数据库路径")
+    parser.add_argument("--events", type=parse_count, default=parse_count("100k"),
+                        help="业务事件数量，例如 10k、1m、10m（默认 100k）")
+    parser.add_argument("--years", type=int, default=3, help="覆盖的年数（默认 3）")
+    parser.add_argument("--end-date", type=date.fromisoformat, default=date.today(),
+                        help="截止日期 YYYY-MM-DD（默认今天；复现数据时需固定）")
+    parser.add_argument("--users", type=parse_count, help="生成的用户数（默认随规模增长）")
+    parser.add_argument("--customers", type=parse_count, help="生成的客户数（默认随规模增长）")
+    parser.add_argument("--departments", type=int, default=24, help="生成的部门小组数（默认 24）")
+    parser.add_argument("--seed", type=int, default=42, help="随机数种子（默认 42）")
+    parser.add_argument("--force", action="store_true", help="覆盖已存在的数据库文件")
+    args = parser.parse_args()
+
+    if args.users is None:
+        args.users = min(max(args.events // 500, 20), 5000)
+    if args.customers is None:
+        args.customers = min(max(args.events // 100, 50), 100000)
+
+    if os.path.exists(args.db_path):
+        if not args.force:
+            print(f"数据库文件已存在: {args.db_path}（使用 --force 覆盖）")
+            return False
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(args.db_path + suffix):
+                os.remove(args.db_path + suffix)
+    directory = os.path.dirname(os.path.abspath(args.db_path))
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+
+    print(f"数据库: {args.db_path}")
+    print(f"业务事件: {args.events:,}，用户: {args.users:,}，客户: {args.customers:,}，"
+          f"截止日期: {args.end_date}，种子: {args.seed}")
+    start = time.perf_counter()
+    try:
+        counts = build_database(args.db_path, args)
+    except (MigrationError, sqlite3.Error) as e:
+        print(f"生成数据失败: {str(e)}")
+        return False
+
+    for table, count in counts.items():
+        print(f"  {table}: {count:,} 行")
+    print(f"完成，用时 {time.perf_counter() - start:.1f} 秒")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
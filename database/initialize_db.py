@@ -13,6 +13,8 @@ import shutil
 import time
 from datetime import datetime
 
+from migrate import migrate, MigrationError
+
 # 定义路径
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
 DB_PATH = os.path.join(DATA_DIR, 'finance.db')
@@ -160,6 +162,15 @@ def initialize_database(auto_yes=False):
                 print("正在导入示例数据...")
                 execute_sql_file(conn, cursor, SAMPLE_DATA_PATH, continue_on_error=True)
                 print("示例数据导入成功完成！")
+            
+            # 执行数据库迁移（索引等）
+            print("正在执行数据库迁移...")
+            try:
+                for version, name in migrate(conn):
+                    print(f"已执行迁移: {version:04d}_{name}")
+                print("数据库迁移完成。")
+            except MigrationError as e:
+                print(str(e))
         
         # 关闭数据库连接
         cursor.close()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+业财融合管理系统 - 数据库迁移工具
+
+迁移脚本放在 migrations 目录，文件名格式为 "四位版本号_说明.sql"，例如 0001_hot_query_indexes.sql。
+已执行的版本记录在 schema_version 表中，每次只按版本号顺序执行尚未执行的脚本，
+每个脚本在单独的事务中执行，失败时整体回滚。
+
+服务端启动时会自动执行迁移，也可以手动运行:
+    python migrate.py [数据库路径]
+"""
+
+import os
+import re
+import sys
+import sqlite3
+
+# 迁移脚本目录
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+
+# 默认数据库路径（与服务端使用的数据库一致）
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'finance.db')
+
+MIGRATION_FILE_PATTERN = re.compile(r'^(\d{4})_(\w+)\.sql$')
+
+
+class MigrationError(Exception):
+    """迁移脚本执行失败"""
+
+
+def list_migrations():
+    """按版本号返回所有迁移脚本 [(版本号, 名称, 路径), ...]"""
+    migrations = []
+    for file_name in os.listdir(MIGRATIONS_DIR):
+        match = MIGRATION_FILE_PATTERN.match(file_name)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), os.path.join(MIGRATIONS_DIR, file_name)))
+    migrations.sort()
+    return migrations
+
+
+def ensure_version_table(conn):
+    """创建版本记录表"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,                -- 迁移版本号
+            name TEXT NOT NULL,                         -- 迁移名称
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.commit()
+
+
+def current_version(conn):
+    """当前数据库版本（未执行过迁移时为0）"""
+    ensure_version_table(conn)
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+
+def migrate(conn):
+    """执行所有未执行的迁移，返回本次执行的 [(版本号, 名称), ...]"""
+    ensure_version_table(conn)
+    applied = {row[0] for row in conn.execute("SELECT version FROM schema_version")}
+
+    executed = []
+    for version, name, path in list_migrations():
+        if version in applied:
+            continue
+
+        with open(path, 'r', encoding='utf-8') as f:
+            script = f.read()
+
+        try:
+            # executescript 会先提交当前事务，脚本自身以 BEGIN 开启事务，
+            # 版本记录与脚本在同一事务中提交
+            conn.executescript("BEGIN;\n" + script)
+            conn.execute("INSERT INTO schema_version (version, name) VALUES (?, ?)", (version, name))
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            raise MigrationError(f"迁移 {version:04d}_{name} 执行失败: {str(e)}") from e
+
+        executed.append((version, name))
+
+    if executed:
+        # 新建索引后更新查询规划器的统计信息
+        conn.execute("PRAGMA optimize")
+    return executed
+
+
+def main():
+    db_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_DB_PATH
+    if not os.path.exists(db_path):
+        print(f"数据库文件不存在: {db_path}")
+        return False
+
+    conn = sqlite3.connect(db_path)
+    try:
+        print(f"数据库: {db_path}")
+        print(f"当前版本: {current_version(conn)}")
+        executed = migrate(conn)
+        for version, name in executed:
+            print(f"已执行迁移: {version:04d}_{name}")
+        if not executed:
+            print("数据库已是最新版本。")
+        print(f"迁移后版本: {current_version(conn)}")
+        return True
+    except MigrationError as e:
+        print(str(e))
+        return False
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
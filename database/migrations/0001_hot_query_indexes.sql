@@ -0,0 +1,39 @@
+-- 为服务端高频查询添加索引
+-- 普通索引的末尾隐含 rowid，(created_at) 索引即可支持 (created_at, id) 键集分页
+
+-- 业务事件列表：按创建时间倒序分页，以及按状态/部门/类型筛选后分页
+CREATE INDEX IF NOT EXISTS idx_business_events_created_at ON business_events (created_at);
+CREATE INDEX IF NOT EXISTS idx_business_events_status_created ON business_events (status, created_at);
+CREATE INDEX IF NOT EXISTS idx_business_events_department_created ON business_events (department_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_business_events_type_created ON business_events (event_type, created_at);
+
+-- 事务编号前缀查询（project_code LIKE 'XS-20250101-%'）
+-- LIKE 默认不区分大小写，只有 NOCASE 排序规则的索引才能用于前缀匹配
+CREATE INDEX IF NOT EXISTS idx_business_events_project_code ON business_events (project_code COLLATE NOCASE);
+
+-- 财务记录：按业务事件查询（详情、关联信息、是否已入账），以及列表分页
+CREATE INDEX IF NOT EXISTS idx_financial_records_event ON financial_records (business_event_id);
+CREATE INDEX IF NOT EXISTS idx_financial_records_created_at ON financial_records (created_at);
+
+-- 审批：按业务事件查询审批链（覆盖 approval_level 与 status，查找下一级待审批无需回表）
+CREATE INDEX IF NOT EXISTS idx_approvals_event_level ON approvals (business_event_id, approval_level, status);
+
+-- 审批列表：管理员按创建时间分页，审批人查看自己的审批
+CREATE INDEX IF NOT EXISTS idx_approvals_created_at ON approvals (created_at);
+CREATE INDEX IF NOT EXISTS idx_approvals_approver_created ON approvals (approver_id, created_at);
+
+-- 待审批部分索引：只包含状态为待审批的行，体积小且随审批完成自动移出
+CREATE INDEX IF NOT EXISTS idx_approvals_pending ON approvals (approver_id, created_at) WHERE status = '待审批';
+
+-- 状态历史：按业务事件按时间排序
+CREATE INDEX IF NOT EXISTS idx_status_history_event ON status_history (business_event_id, timestamp);
+
+-- 预算：入账时按 (部门, 年, 月) 更新已用金额；列表按年、月倒序分页
+CREATE INDEX IF NOT EXISTS idx_budgets_department_period ON budgets (department_id, year, month);
+CREATE INDEX IF NOT EXISTS idx_budgets_period ON budgets (year, month);
+
+-- 审批配置：按 (事件类型, 部门) 查找启用的审批级别
+CREATE INDEX IF NOT EXISTS idx_approval_configs_route ON approval_configs (event_type, department_id, approval_level) WHERE is_active = 1;
+
+-- 用户：提交审批时查找默认审批人（管理员）
+CREATE INDEX IF NOT EXISTS idx_users_role ON users (role);
@@ -0,0 +1,17 @@
+-- 事务编号序号表：以 (类型缩写, 日期) 为主键原子递增，替代按 project_code 前缀 LIKE 查询最大序号
+CREATE TABLE IF NOT EXISTS code_sequences (
+    prefix TEXT NOT NULL,                       -- 事件类型缩写：XS/CG/HT/BX/QT
+    seq_date TEXT NOT NULL,                     -- 日期（YYYYMMDD）
+    last_value INTEGER NOT NULL DEFAULT 0,      -- 已分配的最大序号
+    PRIMARY KEY (prefix, seq_date)
+) WITHOUT ROWID;
+
+-- 以现有事务编号的最大序号作为初始值，避免与已有编号重复
+INSERT OR IGNORE INTO code_sequences (prefix, seq_date, last_value)
+SELECT SUBSTR(project_code, 1, 2), SUBSTR(project_code, 4, 8), MAX(CAST(SUBSTR(project_code, 13) AS INTEGER))
+FROM business_events
+WHERE project_code GLOB '[A-Z][A-Z]-[0-9][0-9][0-9][0-9][0-9][0-9][0-9][0-9]-[0-9]*'
+GROUP BY SUBSTR(project_code, 1, 2), SUBSTR(project_code, 4, 8);
+
+-- 不再需要为前缀查询准备的 NOCASE 索引
+DROP INDEX IF EXISTS idx_business_events_project_code;
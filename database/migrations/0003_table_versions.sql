@@ -0,0 +1,24 @@
+-- 表版本号：数据变化时由触发器递增，服务端据此使进程内缓存失效
+CREATE TABLE IF NOT EXISTS table_versions (
+    table_name TEXT PRIMARY KEY,                -- 表名
+    version INTEGER NOT NULL DEFAULT 0,         -- 版本号，每次变更加1
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+) WITHOUT ROWID;
+
+INSERT OR IGNORE INTO table_versions (table_name) VALUES ('users');
+
+-- 用户信息或角色变化时，认证缓存需要失效
+CREATE TRIGGER IF NOT EXISTS trg_users_version_insert AFTER INSERT ON users
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE table_name = 'users';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_users_version_update AFTER UPDATE ON users
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE table_name = 'users';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_users_version_delete AFTER DELETE ON users
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE table_name = 'users';
+END;
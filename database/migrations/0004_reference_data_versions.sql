@@ -0,0 +1,50 @@
+-- 参考数据（部门、会计科目、客户）的版本号，用于 ETag/Last-Modified 条件请求
+INSERT OR IGNORE INTO table_versions (table_name) VALUES ('departments'), ('account_subjects'), ('customers');
+
+-- 部门
+CREATE TRIGGER IF NOT EXISTS trg_departments_version_insert AFTER INSERT ON departments
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE table_name = 'departments';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_departments_version_update AFTER UPDATE ON departments
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE table_name = 'departments';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_departments_version_delete AFTER DELETE ON departments
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE table_name = 'departments';
+END;
+
+-- 会计科目
+CREATE TRIGGER IF NOT EXISTS trg_account_subjects_version_insert AFTER INSERT ON account_subjects
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE table_name = 'account_subjects';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_account_subjects_version_update AFTER UPDATE ON account_subjects
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE table_name = 'account_subjects';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_account_subjects_version_delete AFTER DELETE ON account_subjects
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE table_name = 'account_subjects';
+END;
+
+-- 客户
+CREATE TRIGGER IF NOT EXISTS trg_customers_version_insert AFTER INSERT ON customers
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE table_name = 'customers';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_customers_version_update AFTER UPDATE ON customers
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE table_name = 'customers';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_customers_version_delete AFTER DELETE ON customers
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE table_name = 'customers';
+END;
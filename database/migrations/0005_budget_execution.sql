@@ -0,0 +1,23 @@
+-- 预算执行汇总：按 (部门, 会计科目, 年度, 月份) 物化的财务记录发生额，
+-- 由入账逻辑在同一事务中增量维护，查询预算执行情况时不需要扫描 financial_records
+CREATE TABLE IF NOT EXISTS budget_execution (
+    department_id INTEGER NOT NULL,             -- 部门ID（业务事件所属部门）
+    account_code TEXT NOT NULL,                 -- 会计科目编码
+    year INTEGER NOT NULL,                      -- 财年
+    month INTEGER NOT NULL,                     -- 会计期间（月份）
+    expense_amount REAL NOT NULL DEFAULT 0,     -- 支出合计
+    income_amount REAL NOT NULL DEFAULT 0,      -- 收入合计
+    record_count INTEGER NOT NULL DEFAULT 0,    -- 财务记录数
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (year, month, department_id, account_code)
+) WITHOUT ROWID;
+
+-- 以现有财务记录初始化
+INSERT OR IGNORE INTO budget_execution (department_id, account_code, year, month, expense_amount, income_amount, record_count)
+SELECT be.department_id, fr.account_code, fr.fiscal_year, fr.fiscal_period,
+       SUM(CASE WHEN fr.direction = '支出' THEN fr.amount ELSE 0 END),
+       SUM(CASE WHEN fr.direction = '收入' THEN fr.amount ELSE 0 END),
+       COUNT(*)
+FROM financial_records fr
+JOIN business_events be ON fr.business_event_id = be.id
+GROUP BY be.department_id, fr.account_code, fr.fiscal_year, fr.fiscal_period;
@@ -0,0 +1,9 @@
+-- 后台任务的高水位线：记录任务已处理到的最大行id，下次只处理新增的行
+CREATE TABLE IF NOT EXISTS job_high_water_marks (
+    job_name TEXT PRIMARY KEY,                  -- 任务名称
+    last_id INTEGER NOT NULL DEFAULT 0,         -- 已处理的最大行id
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+) WITHOUT ROWID;
+
+-- 预算对账：按会计期间重新汇总财务记录
+CREATE INDEX IF NOT EXISTS idx_financial_records_period ON financial_records (fiscal_year, fiscal_period);
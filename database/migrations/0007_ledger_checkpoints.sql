@@ -0,0 +1,22 @@
+-- 科目余额检查点：按 (科目编码, 财年, 会计期间) 汇总的借方/贷方发生额，
+-- 由入账逻辑在同一事务中增量维护；试算平衡与期初/期末余额由检查点累加得到，不扫描财务记录
+-- 借贷方向：资产类科目（编码以1开头）收入记借方、支出记贷方；其他科目收入记贷方、支出记借方
+CREATE TABLE IF NOT EXISTS ledger_checkpoints (
+    account_code TEXT NOT NULL,                 -- 会计科目编码
+    fiscal_year INTEGER NOT NULL,               -- 财年
+    fiscal_period INTEGER NOT NULL,             -- 会计期间（月份）
+    debit_amount REAL NOT NULL DEFAULT 0,       -- 借方发生额
+    credit_amount REAL NOT NULL DEFAULT 0,      -- 贷方发生额
+    record_count INTEGER NOT NULL DEFAULT 0,    -- 财务记录数
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (fiscal_year, fiscal_period, account_code)
+) WITHOUT ROWID;
+
+-- 以现有财务记录初始化
+INSERT OR IGNORE INTO ledger_checkpoints (account_code, fiscal_year, fiscal_period, debit_amount, credit_amount, record_count)
+SELECT account_code, fiscal_year, fiscal_period,
+       SUM(CASE WHEN (account_code LIKE '1%') = (direction = '收入') THEN amount ELSE 0 END),
+       SUM(CASE WHEN (account_code LIKE '1%') = (direction = '收入') THEN 0 ELSE amount END),
+       COUNT(*)
+FROM financial_records
+GROUP BY account_code, fiscal_year, fiscal_period;
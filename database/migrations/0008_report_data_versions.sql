@@ -0,0 +1,130 @@
+-- 报表数据依赖的表的版本号：报表结果按所读表的版本号缓存，数据变化后自动失效
+INSERT OR IGNORE INTO table_versions (table_name) VALUES ('business_events'), ('financial_records'), ('approvals'), ('budgets'), ('status_history'), ('approval_configs'), ('budget_execution'), ('ledger_checkpoints');
+
+-- 业务事件
+CREATE TRIGGER IF NOT EXISTS trg_business_events_version_insert AFTER INSERT ON business_events
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE table_name = 'business_events';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_business_events_version_update AFTER UPDATE ON business_events
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE table_name = 'business_events';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_business_events_version_delete AFTER DELETE ON business_events
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE table_name = 'business_events';
+END;
+
+-- 财务记录
+CREATE TRIGGER IF NOT EXISTS trg_financial_records_version_insert AFTER INSERT ON financial_records
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE table_name = 'financial_records';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_financial_records_version_update AFTER UPDATE ON financial_records
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE table_name = 'financial_records';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_financial_records_version_delete AFTER DELETE ON financial_records
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE table_name = 'financial_records';
+END;
+
+-- 审批记录
+CREATE TRIGGER IF NOT EXISTS trg_approvals_version_insert AFTER INSERT ON approvals
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE table_name = 'approvals';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_approvals_version_update AFTER UPDATE ON approvals
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE table_name = 'approvals';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_approvals_version_delete AFTER DELETE ON approvals
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE table_name = 'approvals';
+END;
+
+-- 预算
+CREATE TRIGGER IF NOT EXISTS trg_budgets_version_insert AFTER INSERT ON budgets
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE table_name = 'budgets';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_budgets_version_update AFTER UPDATE ON budgets
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE table_name = 'budgets';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_budgets_version_delete AFTER DELETE ON budgets
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE table_name = 'budgets';
+END;
+
+-- 状态历史
+CREATE TRIGGER IF NOT EXISTS trg_status_history_version_insert AFTER INSERT ON status_history
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE table_name = 'status_history';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_status_history_version_update AFTER UPDATE ON status_history
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE table_name = 'status_history';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_status_history_version_delete AFTER DELETE ON status_history
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE table_name = 'status_history';
+END;
+
+-- 审批配置
+CREATE TRIGGER IF NOT EXISTS trg_approval_configs_version_insert AFTER INSERT ON approval_configs
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE table_name = 'approval_configs';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_approval_configs_version_update AFTER UPDATE ON approval_configs
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE table_name = 'approval_configs';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_approval_configs_version_delete AFTER DELETE ON approval_configs
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE table_name = 'approval_configs';
+END;
+
+-- 预算执行汇总
+CREATE TRIGGER IF NOT EXISTS trg_budget_execution_version_insert AFTER INSERT ON budget_execution
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE table_name = 'budget_execution';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_budget_execution_version_update AFTER UPDATE ON budget_execution
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE table_name = 'budget_execution';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_budget_execution_version_delete AFTER DELETE ON budget_execution
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE table_name = 'budget_execution';
+END;
+
+-- 科目余额检查点
+CREATE TRIGGER IF NOT EXISTS trg_ledger_checkpoints_version_insert AFTER INSERT ON ledger_checkpoints
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE table_name = 'ledger_checkpoints';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_ledger_checkpoints_version_update AFTER UPDATE ON ledger_checkpoints
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE table_name = 'ledger_checkpoints';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_ledger_checkpoints_version_delete AFTER DELETE ON ledger_checkpoints
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE table_name = 'ledger_checkpoints';
+END;
@@ -0,0 +1,225 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+业财融合管理系统 - 预算对账工具
+
+budgets.used_amount 与 budget_execution 只在入账时累加，修改、删除财务记录或请求失败后
+可能与财务记录不一致。对账以一次 GROUP BY（财务记录关联业务事件）重新汇总实际发生额，
+与现有值比较后在同一事务中批量更正：
+- budgets.used_amount: 同一 (部门, 财年, 会计期间) 的支出合计
+- budget_execution:    按 (部门, 会计科目, 财年, 会计期间) 的支出、收入与记录数
+
+增量模式（默认）使用 financial_records.id 的高水位线：只重新汇总上次对账后新增记录所在的会计期间。
+修改或删除历史记录后需要执行一次全量对账。
+
+服务端提供 POST /system/budget_reconciliation，也可以手动或由计划任务每晚运行:
+    python reconcile.py [数据库路径] [--full] [--dry-run]
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+
+from migrate import migrate, MigrationError
+
+# 默认数据库路径（与服务端使用的数据库一致）
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'finance.db')
+
+# 高水位线中的任务名称
+JOB_NAME = 'budget_reconciliation'
+
+# 金额差异小于该值视为一致（按分计）
+AMOUNT_TOLERANCE = 0.005
+
+ACTUAL_SQL = """
+    SELECT be.department_id, fr.account_code, fr.fiscal_year, fr.fiscal_period,
+           SUM(CASE WHEN fr.direction = '支出' THEN fr.amount ELSE 0 END) AS expense_amount,
+           SUM(CASE WHEN fr.direction = '收入' THEN fr.amount ELSE 0 END) AS income_amount,
+           COUNT(*) AS record_count
+    FROM {source}
+    JOIN business_events be ON fr.business_event_id = be.id
+    GROUP BY be.department_id, fr.account_code, fr.fiscal_year, fr.fiscal_period
+"""
+
+# 限定会计期间：参数为 [[财年, 期间], ...] 的JSON；CROSS JOIN 让期间列表作为外层循环，
+# 按 (年, 月) 索引查找各期间的行
+PERIODS_SOURCE = """(
+        SELECT json_extract(value, '$[0]') AS year, json_extract(value, '$[1]') AS month FROM json_each(?)
+    ) p
+    CROSS JOIN {table} ON {alias}.{year_column} = p.year AND {alias}.{month_column} = p.month"""
+
+
+def _period_source(table, alias, year_column, month_column, periods):
+    """返回 (FROM子句中的数据源, 参数)；periods 为 None 时不限定期间"""
+    if periods is None:
+        return f"{table} {alias}", ()
+    source = PERIODS_SOURCE.format(table=f"{table} {alias}", alias=alias,
+                                   year_column=year_column, month_column=month_column)
+    return source, (json.dumps(periods),)
+
+
+def _differs(a, b):
+    return abs((a or 0) - (b or 0)) >= AMOUNT_TOLERANCE
+
+
+def reconcile_budgets(conn, full=False, dry_run=False):
+    """执行预算对账，返回对账结果
+
+    在调用方的连接上执行，不提交事务（服务端由 Database.write 提交，命令行由 main 提交）。
+    """
+    # 读取与更正在同一事务中完成，期间不会有新的入账
+    if not conn.in_transaction:
+        conn.execute("BEGIN" if dry_run else "BEGIN IMMEDIATE")
+
+    row = conn.execute("SELECT last_id FROM job_high_water_marks WHERE job_name = ?", (JOB_NAME,)).fetchone()
+    from_id = 0 if full or row is None else row[0]
+    to_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM financial_records").fetchone()[0]
+
+    if full:
+        periods = None
+    else:
+        # 新增记录所在的会计期间（主键范围扫描）
+        periods = [list(period) for period in conn.execute("""
+            SELECT DISTINCT fiscal_year, fiscal_period FROM financial_records WHERE id > ? AND id <= ?
+        """, (from_id, to_id))]
+
+    result = {
+        "mode": "full" if full else "incremental",
+        "dry_run": dry_run,
+        "from_id": from_id,
+        "to_id": to_id,
+        "periods": len(periods) if periods is not None else None,
+        "budgets_checked": 0,
+        "budgets_corrected": 0,
+        "execution_rows_corrected": 0,
+        "corrections": [],
+    }
+
+    if periods is None or periods:
+        # 一次 GROUP BY 得到实际发生额
+        source, params = _period_source("financial_records", "fr", "fiscal_year", "fiscal_period", periods)
+        actual = {}
+        spend = {}
+        for row in conn.execute(ACTUAL_SQL.format(source=source), params):
+            department_id, account_code, year, month, expense, income, count = row
+            actual[(department_id, account_code, year, month)] = (expense, income, count)
+            spend[(department_id, year, month)] = spend.get((department_id, year, month), 0) + expense
+
+        # 预算已用金额
+        source, params = _period_source("budgets", "b", "year", "month", periods)
+        budget_updates = []
+        for budget_id, department_id, year, month, used_amount in conn.execute(
+                f"SELECT b.id, b.department_id, b.year, b.month, b.used_amount FROM {source}", params):
+            result["budgets_checked"] += 1
+            expected = round(spend.get((department_id, year, month), 0), 2)
+            if _differs(used_amount, expected):
+                budget_updates.append((expected, budget_id))
+                result["corrections"].append({
+                    "budget_id": budget_id,
+                    "department_id": department_id,
+                    "year": year,
+                    "month": month,
+                    "used_amount": used_amount,
+                    "actual_amount": expected,
+                })
+
+        # 预算执行汇总
+        source, params = _period_source("budget_execution", "e", "year", "month", periods)
+        existing = {
+            (row[0], row[1], row[2], row[3]): (row[4], row[5], row[6])
+            for row in conn.execute(f"""
+                SELECT e.department_id, e.account_code, e.year, e.month,
+                       e.expense_amount, e.income_amount, e.record_count
+                FROM {source}
+            """, params)
+        }
+        execution_upserts = [
+            key + totals for key, totals in actual.items()
+            if key not in existing
+            or _differs(existing[key][0], totals[0])
+            or _differs(existing[key][1], totals[1])
+            or existing[key][2] != totals[2]
+        ]
+        execution_deletes = [key for key in existing if key not in actual]
+
+        result["budgets_corrected"] = len(budget_updates)
+        result["execution_rows_corrected"] = len(execution_upserts) + len(execution_deletes)
+
+        if not dry_run:
+            conn.executemany(
+                "UPDATE budgets SET used_amount = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+                budget_updates,
+            )
+            conn.executemany("""
+                INSERT INTO budget_execution (department_id, account_code, year, month,
+                expense_amount, income_amount, record_count)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (year, month, department_id, account_code) DO UPDATE SET
+                    expense_amount = excluded.expense_amount,
+                    income_amount = excluded.income_amount,
+                    record_count = excluded.record_count,
+                    updated_at = CURRENT_TIMESTAMP
+            """, execution_upserts)
+            conn.executemany("""
+                DELETE FROM budget_execution
+                WHERE department_id = ? AND account_code = ? AND year = ? AND month = ?
+            """, execution_deletes)
+
+    if not dry_run:
+        conn.execute("""
+            INSERT INTO job_high_water_marks (job_name, last_id) VALUES (?, ?)
+            ON CONFLICT (job_name) DO UPDATE SET last_id = excluded.last_id, updated_at = CURRENT_TIMESTAMP
+        """, (JOB_NAME, to_id))
+
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="预算对账")
+    parser.add_argument("db_path", nargs="?", default=DEFAULT_DB_PATH, help="数据库路径")
+    parser.add_argument("--full", action="store_true", help="全量对账（忽略高水位线）")
+    parser.add_argument("--dry-run", action="store_true", help="只报告差异，不更正")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db_path):
+        print(f"数据库文件不存在: {args.db_path}")
+        return False
+
+    conn = sqlite3.connect(args.db_path)
+    try:
+        # 确保对账所需的表已创建
+        migrate(conn)
+        result = reconcile_budgets(conn, full=args.full, dry_run=args.dry_run)
+        if args.dry_run:
+            conn.rollback()
+        else:
+            conn.commit()
+    except MigrationError as e:
+        print(str(e))
+        return False
+    except sqlite3.Error as e:
+        conn.rollback()
+        print(f"预算对账失败: {str(e)}")
+        return False
+    finally:
+        conn.close()
+
+    mode = "全量" if args.full else "增量"
+    print(f"{mode}对账: 财务记录 id {result['from_id']} - {result['to_id']}")
+    if result["periods"] is not None:
+        print(f"涉及会计期间: {result['periods']} 个")
+    print(f"检查预算: {result['budgets_checked']} 条，需要更正: {result['budgets_corrected']} 条")
+    for item in result["corrections"]:
+        print(f"  预算 {item['budget_id']}（部门 {item['department_id']}，{item['year']}/{item['month']}）: "
+              f"{item['used_amount']:,.2f} -> {item['actual_amount']:,.2f}")
+    print(f"预算执行汇总需要更正: {result['execution_rows_corrected']} 行")
+    if args.dry_run:
+        print("试运行，未做任何更改。")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
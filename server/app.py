@@ -1,19 +1,48 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Query, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from typing import List, Optional, Dict, Any
-import sqlite3
+from typing import List, Optional, Dict, Any, Union
 import os
 import json
-from pydantic import BaseModel
-from datetime import datetime, timedelta
+import time
+import logging
+from pydantic import BaseModel, ValidationError, field_validator
+from datetime import date, datetime, timedelta
 import jwt
 from passlib.context import CryptContext
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi import Request
+from db import get_db, pool_metrics, run_migrations, warm_up, close_pools
+from pagination import PageParams, fetch_page, list_query, count_rows
+from filters import BusinessEventFilters, FinancialRecordFilters, ApprovalFilters, BudgetFilters
+from sequences import next_code, allocate_codes
+from versions import VersionWatcher
+from auth_cache import principal_cache
+from posting import post_records
+from event_relations import EVENT_LIST_RELATIONS_SQL, fetch_event_details
+from reference_data import ReferenceData
+from approval_routing import approval_routing
+from responses import FastJSONResponse, CompressionMiddleware, json_response, stream_response
+from export import export_response, BUSINESS_EVENT_COLUMNS, FINANCIAL_RECORD_COLUMNS
+from budget_execution import fetch_budget_execution
+from reconcile import reconcile_budgets
+from ledger import trial_balance
+from reports import run_report, report_cache, ReportError, ReportTimeoutError
+from app_logging import setup_logging, get_logger
+from profiler import SQL_PROFILE, profiler
+from metrics import MetricsMiddleware, request_metrics, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from tracing import TRACE_FILE, TraceMiddleware, TraceWriter
+
+# 日志：写入队列，由后台线程输出
+setup_logging()
+logger = get_logger("app")
 
 # 创建FastAPI实例
-app = FastAPI(title="业财融合管理系统API", description="业财融合管理系统的后端API")
+app = FastAPI(
+    title="业财融合管理系统API",
+    description="业财融合管理系统的后端API",
+    default_response_class=FastJSONResponse,
+)
 
 # 配置CORS
 app.add_middleware(
@@ -24,17 +53,69 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 响应压缩（br / gzip）
+app.add_middleware(CompressionMiddleware)
+
+# 中间件后添加的在外层，从外到内依次为：请求指标 -> 请求轨迹 -> 压缩 -> CORS
+
+# 请求轨迹记录（设置 TRACE_FILE 时），供 benchmarks/replay.py 回放；
+# 位于压缩之外，记录的响应字节数为压缩后的大小
+trace_writer = TraceWriter(TRACE_FILE) if TRACE_FILE else None
+if trace_writer is not None:
+    app.add_middleware(TraceMiddleware, writer=trace_writer)
+
+# 请求指标（最外层，耗时包含压缩与轨迹记录）
+app.add_middleware(MetricsMiddleware)
+
+# 设置后访问 /metrics 需要携带 Authorization: Bearer <METRICS_TOKEN>
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
 # 配置JWT认证
 SECRET_KEY = "your_secret_key"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# 批量导入单次最多行数
+MAX_BULK_SIZE = 10000
+
+# 批量查询详情单次最多事件数
+MAX_DETAIL_BATCH = 500
+
+# 财务记录的收支方向
+FINANCIAL_DIRECTIONS = ("收入", "支出")
+
+# 列表查询：(SELECT子句, FROM子句, 排序键)，分页接口与流式导出共用
+BUSINESS_EVENT_LIST = (
+    "SELECT be.*",
+    "FROM business_events be",
+    [("be.created_at", "created_at"), ("be.id", "id")],
+)
+FINANCIAL_RECORD_LIST = (
+    "SELECT fr.*, be.project_name, be.event_type",
+    "FROM financial_records fr JOIN business_events be ON fr.business_event_id = be.id",
+    [("fr.created_at", "created_at"), ("fr.id", "id")],
+)
+APPROVAL_LIST = (
+    "SELECT a.*, be.project_name, be.event_type, be.amount, be.department_id, u.username as approver_name",
+    """FROM approvals a
+    JOIN business_events be ON a.business_event_id = be.id
+    JOIN users u ON a.approver_id = u.id""",
+    [("a.created_at", "created_at"), ("a.id", "id")],
+)
+
 # 密码加密
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
-# 数据库路径
-DATABASE_PATH = os.path.join("..", "database", "finance.db")
+# 表版本监视：users 表变化时清空认证缓存
+version_watcher = VersionWatcher(get_db())
+version_watcher.subscribe("users", principal_cache.clear)
+version_watcher.subscribe("approval_configs", approval_routing.invalidate)
+
+# 参考数据：支持 ETag/Last-Modified 条件请求
+customers_data = ReferenceData("customers", "SELECT * FROM customers ORDER BY name")
+departments_data = ReferenceData("departments", "SELECT * FROM departments")
+account_subjects_data = ReferenceData("account_subjects", "SELECT * FROM account_subjects")
 
 # 数据模型
 class User(BaseModel):
@@ -77,6 +158,26 @@ class FinancialRecord(BaseModel):
     description: Optional[str] = None
     created_by: int
 
+    @field_validator("direction")
+    @classmethod
+    def check_direction(cls, value):
+        # 入账时只有“支出”计入预算已用金额，其他值会被当作收入，因此单条与批量创建都在这里拒绝
+        if value not in FINANCIAL_DIRECTIONS:
+            raise ValueError("只能是收入或支出")
+        return value
+
+class BusinessEventBulk(BaseModel):
+    # 逐行校验，单行错误不影响其他行
+    events: List[Dict[str, Any]]
+
+class FinancialRecordBulk(BaseModel):
+    # 逐行校验，单行错误不影响其他行
+    records: List[Dict[str, Any]]
+
+class ReportRun(BaseModel):
+    # 命名参数（:name）或位置参数（?），只允许标量值
+    params: Optional[Union[Dict[str, Any], List[Any]]] = None
+
 class StatusHistory(BaseModel):
     timestamp: str
     status: str
@@ -99,27 +200,37 @@ class BusinessEventDetail(BaseModel):
     finance_id: Optional[int] = None
     status_history: Optional[List[StatusHistory]] = None
 
-# 数据库连接函数
-def get_db_connection():
-    conn = sqlite3.connect(DATABASE_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+# 应用启动与关闭
+@app.on_event("startup")
+async def startup():
+    for version, name in run_migrations():
+        logger.info("已执行数据库迁移: %04d_%s", version, name)
+    warm_up()
+    await get_db().read(approval_routing.load)
+    await version_watcher.start()
+    if SQL_PROFILE:
+        profiler.start(get_db())
+    if trace_writer is not None:
+        trace_writer.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await version_watcher.stop()
+    await profiler.stop()
+    if trace_writer is not None:
+        trace_writer.stop()
+    close_pools()
 
 # 验证用户
 def verify_password(plain_password, hashed_password):
     # 简化版本：仅比较明文密码
     return plain_password == hashed_password
 
-def get_user(username: str):
-    conn = get_db_connection()
-    user = conn.execute("SELECT * FROM users WHERE username = ?", (username,)).fetchone()
-    conn.close()
-    if user:
-        return dict(user)
-    return None
+async def get_user(db, username: str):
+    return await db.fetchone("SELECT * FROM users WHERE username = ?", (username,))
 
-def authenticate_user(username: str, password: str):
-    user = get_user(username)
+async def authenticate_user(db, username: str, password: str):
+    user = await get_user(db, username)
     if not user:
         return False
     if not verify_password(password, user["password"]):
@@ -135,12 +246,18 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 # 获取当前用户
-async def get_current_user(token: str = Depends(oauth2_scheme)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db = Depends(get_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="无效的认证凭据",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+    # 已验证过的 token 直接使用缓存的用户信息
+    user = principal_cache.get(token)
+    if user is not None:
+        return user
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
@@ -149,15 +266,16 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         token_data = TokenData(username=username)
     except jwt.PyJWTError:
         raise credentials_exception
-    user = get_user(username=token_data.username)
+    user = await get_user(db, username=token_data.username)
     if user is None:
         raise credentials_exception
+    principal_cache.put(token, user, payload["exp"])
     return user
 
 # 认证接口
 @app.post("/token", response_model=Token)
-async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
-    user = authenticate_user(form_data.username, form_data.password)
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db = Depends(get_db)):
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -176,264 +294,439 @@ async def read_users_me(current_user = Depends(get_current_user)):
 
 # 业务事件API
 @app.get("/business_events")
-async def get_business_events(current_user = Depends(get_current_user)):
-    conn = get_db_connection()
-    events = conn.execute("SELECT * FROM business_events ORDER BY created_at DESC").fetchall()
-    conn.close()
-    return [dict(event) for event in events]
+async def get_business_events(
+    filters: BusinessEventFilters = Depends(),
+    page: PageParams = Depends(),
+    current_user = Depends(get_current_user),
+    db = Depends(get_db)
+):
+    # 每行附带 approval_id / finance_id / latest_status，整页只需一条SQL
+    select_sql, from_sql, order_by = BUSINESS_EVENT_LIST
+    return json_response(await db.read(
+        fetch_page, select_sql, from_sql, filters.build(), order_by, page, EVENT_LIST_RELATIONS_SQL,
+    ))
+
+@app.get("/business_events/stream")
+async def stream_business_events(
+    filters: BusinessEventFilters = Depends(),
+    output_format: str = Query("ndjson", alias="format", pattern="^(ndjson|json)$"),
+    current_user = Depends(get_current_user),
+    db = Depends(get_db)
+):
+    """流式导出全部符合条件的业务事件（NDJSON 或 JSON 数组），不附带关联信息"""
+    select_sql, from_sql, order_by = BUSINESS_EVENT_LIST
+    sql, params = list_query(select_sql, from_sql, filters.build(), order_by)
+    return stream_response(db.stream(sql, params), output_format)
+
+@app.get("/business_events/export")
+async def export_business_events(
+    filters: BusinessEventFilters = Depends(),
+    output_format: str = Query("xlsx", alias="format", pattern="^(csv|xlsx)$"),
+    current_user = Depends(get_current_user),
+    db = Depends(get_db)
+):
+    """按列表筛选条件导出业务事件（CSV 或 Excel）"""
+    select_sql, from_sql, order_by = BUSINESS_EVENT_LIST
+    query_filters = filters.build()
+    total = await db.read(count_rows, from_sql, query_filters)
+    sql, params = list_query(select_sql, from_sql, query_filters, order_by)
+    return await export_response(db, sql, params, total, BUSINESS_EVENT_COLUMNS,
+                                 "business_events", "业务事件", output_format)
+
+@app.get("/business_events/unposted")
+async def get_unposted_business_events(
+    filters: BusinessEventFilters = Depends(),
+    page: PageParams = Depends(),
+    current_user = Depends(get_current_user),
+    db = Depends(get_db)
+):
+    """已审批但尚未创建财务记录的业务事件（财务待处理队列）"""
+    filters.status = "已审批"
+    query_filters = filters.build()
+    # 反连接：由 idx_business_events_status_created 与 idx_financial_records_event 支持
+    query_filters.add("NOT EXISTS (SELECT 1 FROM financial_records fr WHERE fr.business_event_id = be.id)")
+    select_sql, from_sql, order_by = BUSINESS_EVENT_LIST
+    return json_response(await db.read(fetch_page, select_sql, from_sql, query_filters, order_by, page))
+
+@app.get("/business_events/details", response_model=List[BusinessEventDetail])
+async def get_business_event_details(
+    ids: List[int] = Query(..., description="业务事件ID，可重复传入多个"),
+    current_user = Depends(get_current_user),
+    db = Depends(get_db)
+):
+    """批量获取业务事件详情（包含关联信息和状态历史），按传入顺序返回，不存在的ID被忽略"""
+    if len(ids) > MAX_DETAIL_BATCH:
+        raise HTTPException(status_code=400, detail=f"单次最多查询 {MAX_DETAIL_BATCH} 个业务事件")
+    details = await db.read(fetch_event_details, ids)
+    return [details[event_id] for event_id in dict.fromkeys(ids) if event_id in details]
 
 @app.get("/business_events/{event_id}")
-async def get_business_event(event_id: int, current_user = Depends(get_current_user)):
-    conn = get_db_connection()
-    event = conn.execute("SELECT * FROM business_events WHERE id = ?", (event_id,)).fetchone()
-    conn.close()
+async def get_business_event(event_id: int, current_user = Depends(get_current_user), db = Depends(get_db)):
+    event = await db.fetchone("SELECT * FROM business_events WHERE id = ?", (event_id,))
     if event is None:
         raise HTTPException(status_code=404, detail="业务事件不存在")
-    return dict(event)
+    return event
 
 @app.post("/business_events")
-async def create_business_event(event: BusinessEvent, current_user = Depends(get_current_user)):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # 生成唯一事务编号
-    # 格式: 事件类型缩写-年月日-4位序号
-    # 例如: XS-20230615-0001 (销售-2023年6月15日-0001号)
-
-    # 获取当前日期
-    current_date = datetime.now()
-    date_str = current_date.strftime("%Y%m%d")
-
-    # 事件类型映射
-    event_type_map = {
-        "销售": "XS",
-        "采购": "CG",
-        "合同": "HT",
-        "报销": "BX"
-    }
+async def create_business_event(event: BusinessEvent, current_user = Depends(get_current_user), db = Depends(get_db)):
+    def create(conn):
+        cursor = conn.cursor()
 
-    # 获取事件类型缩写
-    event_type_code = event_type_map.get(event.event_type, "QT")  # 默认为"其他"
+        # 生成唯一事务编号（序号在当前事务中原子分配）
+        # 格式: 事件类型缩写-年月日-4位序号
+        # 例如: XS-20230615-0001 (销售-2023年6月15日-0001号)
+        transaction_code = next_code(conn, event.event_type)
+
+        # 将生成的事务编号赋值给 project_code
+        event.project_code = transaction_code
+
+        # 插入业务事件
+        cursor.execute("""
+            INSERT INTO business_events (event_type, project_name, project_code, amount, event_date,
+            description, department_id, created_by, status, customer_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (event.event_type, event.project_name, event.project_code, event.amount,
+              event.event_date, event.description, event.department_id, current_user["id"], "待审批", event.customer_id))
+
+        event_id = cursor.lastrowid
+
+        # 创建审批流程（审批链来自内存中的审批路由索引）
+        chain = approval_routing.route(conn, event.event_type, event.department_id, event.amount)
+        cursor.executemany("""
+            INSERT INTO approvals (business_event_id, approver_id, approval_level, status)
+            VALUES (?, ?, ?, '待审批')
+        """, [(event_id, approver_id, level) for approver_id, level in chain])
+
+        return event_id, transaction_code
+
+    event_id, transaction_code = await db.write(create)
+
+    logger.info("业务事件已创建", extra={"event_id": event_id, "transaction_code": transaction_code,
+                                      "user": current_user["username"]})
 
-    # 查询当天最大序号
-    max_seq_query = """
-        SELECT MAX(SUBSTR(project_code, -4)) as max_seq
-        FROM business_events
-        WHERE project_code LIKE ?
-    """
-    cursor.execute(max_seq_query, (f"{event_type_code}-{date_str}-%",))
-    result = cursor.fetchone()
-    
-    # 添加调试输出
-    print(f"SQL查询: {max_seq_query}")
-    print(f"查询参数: {event_type_code}-{date_str}-%")
-    print(f"查询结果: {result}")
-
-    # 确定新序号
-    if result and result["max_seq"]:
-        next_seq = int(result["max_seq"]) + 1
-    else:
-        next_seq = 1
-    
-    # 生成完整事务编号
-    transaction_code = f"{event_type_code}-{date_str}-{next_seq:04d}"
-    
-    # 添加调试输出
-    print(f"生成的事务编号: {transaction_code}")
-
-    # 将生成的事务编号赋值给 project_code
-    event.project_code = transaction_code
-    
-    # 插入业务事件
-    cursor.execute("""
-        INSERT INTO business_events (event_type, project_name, project_code, amount, event_date, 
-        description, department_id, created_by, status, customer_id)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (event.event_type, event.project_name, event.project_code, event.amount, 
-          event.event_date, event.description, event.department_id, current_user["id"], "待审批", event.customer_id))
-    
-    event_id = cursor.lastrowid
-    
-    # 创建审批流程
-    cursor.execute("""
-        INSERT INTO approvals (business_event_id, approver_id, approval_level, status)
-        SELECT ?, approver_id, approval_level, '待审批'
-        FROM approval_configs
-        WHERE event_type = ? AND department_id = ? AND is_active = 1
-        AND (amount_threshold IS NULL OR amount_threshold <= ?)
-        ORDER BY approval_level
-    """, (event_id, event.event_type, event.department_id, event.amount))
-    
-    conn.commit()
-    conn.close()
-    
-    # 添加调试输出
-    print(f"事件ID: {event_id}")
-    print(f"返回数据: {{'id': {event_id}, 'transaction_code': '{transaction_code}', 'message': '业务事件创建成功'}}")
-    
     # 确保返回的数据结构清晰
     return {
-        "id": event_id, 
-        "transaction_code": transaction_code, 
+        "id": event_id,
+        "transaction_code": transaction_code,
         "message": "业务事件创建成功"
     }
-    
+
+def validation_message(error: ValidationError):
+    """把校验错误整理为一行文字"""
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}" for err in error.errors()
+    )
+
+@app.post("/business_events/bulk")
+async def create_business_events_bulk(payload: BusinessEventBulk, current_user = Depends(get_current_user), db = Depends(get_db)):
+    """批量创建业务事件
+
+    所有有效行在同一个事务中写入：按事件类型整段预分配事务编号，
+    executemany 插入业务事件，再用一次 executemany 插入本批事件的审批流程。
+    返回逐行结果，无效行不影响其他行。
+    """
+    if len(payload.events) > MAX_BULK_SIZE:
+        raise HTTPException(status_code=400, detail=f"单次最多导入 {MAX_BULK_SIZE} 条业务事件")
+
+    start = time.perf_counter()
+
+    # 逐行校验数据格式
+    results = [None] * len(payload.events)
+    valid = []
+    for index, row in enumerate(payload.events):
+        try:
+            valid.append((index, BusinessEvent.model_validate(row)))
+        except ValidationError as e:
+            results[index] = {"index": index, "success": False, "error": validation_message(e)}
+
+    def create(conn):
+        # 校验部门与客户是否存在
+        department_ids = {row["id"] for row in conn.execute("SELECT id FROM departments")}
+        customer_ids = {row["id"] for row in conn.execute("SELECT id FROM customers")}
+        rows = []
+        for index, event in valid:
+            if event.department_id not in department_ids:
+                results[index] = {"index": index, "success": False, "error": "部门不存在"}
+            elif event.customer_id is not None and event.customer_id not in customer_ids:
+                results[index] = {"index": index, "success": False, "error": "客户不存在"}
+            else:
+                rows.append((index, event))
+        if not rows:
+            return 0
+
+        # 按事件类型整段分配事务编号
+        by_type = {}
+        for index, event in rows:
+            by_type.setdefault(event.event_type, []).append(event)
+        for event_type, events in by_type.items():
+            for event, code in zip(events, allocate_codes(conn, event_type, len(events))):
+                event.project_code = code
+
+        # 写事务（BEGIN IMMEDIATE，见 Database.write）内新插入行的id一定大于插入前的最大id，且按插入顺序递增
+        max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM business_events").fetchone()[0]
+        conn.executemany("""
+            INSERT INTO business_events (event_type, project_name, project_code, amount, event_date,
+            description, department_id, created_by, status, customer_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, '待审批', ?)
+        """, [(event.event_type, event.project_name, event.project_code, event.amount, event.event_date,
+               event.description, event.department_id, current_user["id"], event.customer_id)
+              for _, event in rows])
+        new_ids = [row["id"] for row in conn.execute(
+            "SELECT id FROM business_events WHERE id > ? ORDER BY id", (max_id,))]
+        if len(new_ids) != len(rows):
+            raise RuntimeError(f"新业务事件数量不符: 插入 {len(rows)} 条，查询到 {len(new_ids)} 条")
+
+        # 为本批事件创建审批流程（审批链来自内存中的审批路由索引，一次插入）
+        approvals = []
+        for (_, event), event_id in zip(rows, new_ids):
+            chain = approval_routing.route(conn, event.event_type, event.department_id, event.amount)
+            approvals.extend((event_id, approver_id, level) for approver_id, level in chain)
+        conn.executemany("""
+            INSERT INTO approvals (business_event_id, approver_id, approval_level, status)
+            VALUES (?, ?, ?, '待审批')
+        """, approvals)
+
+        for (index, event), event_id in zip(rows, new_ids):
+            results[index] = {"index": index, "success": True, "id": event_id, "transaction_code": event.project_code}
+        return len(rows)
+
+    created = await db.write(create) if valid else 0
+
+    elapsed = time.perf_counter() - start
+    return {
+        "total": len(payload.events),
+        "created": created,
+        "failed": len(payload.events) - created,
+        "elapsed_ms": round(elapsed * 1000, 3),
+        "events_per_second": round(created / elapsed, 1) if elapsed > 0 else 0.0,
+        "results": results,
+    }
+
 @app.get("/customers")
-async def get_customers(current_user = Depends(get_current_user)):
-    conn = get_db_connection()
-    customers = conn.execute("SELECT * FROM customers ORDER BY name").fetchall()
-    conn.close()
-    return [dict(customer) for customer in customers]
+async def get_customers(request: Request, current_user = Depends(get_current_user), db = Depends(get_db)):
+    return await customers_data.response(request, db)
 
 # 财务记录API
 @app.get("/financial_records")
-async def get_financial_records(current_user = Depends(get_current_user)):
-    conn = get_db_connection()
-    records = conn.execute("""
-        SELECT fr.*, be.project_name, be.event_type
-        FROM financial_records fr
-        JOIN business_events be ON fr.business_event_id = be.id
-        ORDER BY fr.created_at DESC
-    """).fetchall()
-    conn.close()
-    return [dict(record) for record in records]
+async def get_financial_records(
+    filters: FinancialRecordFilters = Depends(),
+    page: PageParams = Depends(),
+    current_user = Depends(get_current_user),
+    db = Depends(get_db)
+):
+    select_sql, from_sql, order_by = FINANCIAL_RECORD_LIST
+    return json_response(await db.read(fetch_page, select_sql, from_sql, filters.build(), order_by, page))
+
+@app.get("/financial_records/stream")
+async def stream_financial_records(
+    filters: FinancialRecordFilters = Depends(),
+    output_format: str = Query("ndjson", alias="format", pattern="^(ndjson|json)$"),
+    current_user = Depends(get_current_user),
+    db = Depends(get_db)
+):
+    """流式导出全部符合条件的财务记录（NDJSON 或 JSON 数组），例如一个财年的全部记录"""
+    select_sql, from_sql, order_by = FINANCIAL_RECORD_LIST
+    sql, params = list_query(select_sql, from_sql, filters.build(), order_by)
+    return stream_response(db.stream(sql, params), output_format)
+
+@app.get("/financial_records/export")
+async def export_financial_records(
+    filters: FinancialRecordFilters = Depends(),
+    output_format: str = Query("xlsx", alias="format", pattern="^(csv|xlsx)$"),
+    current_user = Depends(get_current_user),
+    db = Depends(get_db)
+):
+    """按列表筛选条件导出财务记录（CSV 或 Excel）"""
+    select_sql, from_sql, order_by = FINANCIAL_RECORD_LIST
+    query_filters = filters.build()
+    total = await db.read(count_rows, from_sql, query_filters)
+    sql, params = list_query(select_sql, from_sql, query_filters, order_by)
+    return await export_response(db, sql, params, total, FINANCIAL_RECORD_COLUMNS,
+                                 "financial_records", "财务记录", output_format)
 
 @app.get("/financial_records/{record_id}")
-async def get_financial_record(record_id: int, current_user = Depends(get_current_user)):
-    conn = get_db_connection()
-    record = conn.execute("SELECT * FROM financial_records WHERE id = ?", (record_id,)).fetchone()
-    conn.close()
+async def get_financial_record(record_id: int, current_user = Depends(get_current_user), db = Depends(get_db)):
+    record = await db.fetchone("SELECT * FROM financial_records WHERE id = ?", (record_id,))
     if record is None:
         raise HTTPException(status_code=404, detail="财务记录不存在")
-    return dict(record)
+    return record
 
 @app.post("/financial_records")
-async def create_financial_record(record: FinancialRecord, current_user = Depends(get_current_user)):
+async def create_financial_record(record: FinancialRecord, current_user = Depends(get_current_user), db = Depends(get_db)):
     # 检查用户是否有财务角色
     if current_user["role"] != "财务人员" and current_user["role"] != "管理员":
         raise HTTPException(status_code=403, detail="没有权限创建财务记录")
-    
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # 检查关联的业务事件是否存在且已审批
-    event = cursor.execute("SELECT * FROM business_events WHERE id = ?", 
-                          (record.business_event_id,)).fetchone()
-    if not event:
-        conn.close()
-        raise HTTPException(status_code=404, detail="关联的业务事件不存在")
-    
-    if dict(event)["status"] != "已审批":
-        conn.close()
-        raise HTTPException(status_code=400, detail="关联的业务事件尚未审批通过")
-    
-    # 插入财务记录
-    cursor.execute("""
-        INSERT INTO financial_records (business_event_id, account_code, account_name, 
-        amount, direction, record_date, fiscal_year, fiscal_period, description, created_by)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (record.business_event_id, record.account_code, record.account_name, 
-          record.amount, record.direction, record.record_date, record.fiscal_year, 
-          record.fiscal_period, record.description, current_user["id"]))
-    
-    # 更新预算使用情况
-    if record.direction == "支出":
-        cursor.execute("""
-            UPDATE budgets
-            SET used_amount = used_amount + ?
-            WHERE department_id = (SELECT department_id FROM business_events WHERE id = ?)
-            AND year = ? AND month = ?
-        """, (record.amount, record.business_event_id, record.fiscal_year, record.fiscal_period))
-    
-    record_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
-    
+
+    def create(conn):
+        cursor = conn.cursor()
+
+        # 检查关联的业务事件是否存在且已审批
+        event = cursor.execute("SELECT * FROM business_events WHERE id = ?",
+                              (record.business_event_id,)).fetchone()
+        if not event:
+            raise HTTPException(status_code=404, detail="关联的业务事件不存在")
+
+        if dict(event)["status"] != "已审批":
+            raise HTTPException(status_code=400, detail="关联的业务事件尚未审批通过")
+
+        # 插入财务记录并更新预算使用情况
+        return post_records(conn, [(record, event["department_id"])], current_user["id"])[0]
+
+    record_id = await db.write(create)
+
     return {"id": record_id, "message": "财务记录创建成功"}
 
+@app.post("/financial_records/bulk")
+async def create_financial_records_bulk(payload: FinancialRecordBulk, current_user = Depends(get_current_user), db = Depends(get_db)):
+    """批量创建财务记录
+
+    一次查询校验所有关联的业务事件，有效行在同一个事务中入账，
+    预算按 (部门, 年, 月) 汇总后更新。返回逐行结果，无效行不影响其他行。
+    """
+    # 检查用户是否有财务角色
+    if current_user["role"] != "财务人员" and current_user["role"] != "管理员":
+        raise HTTPException(status_code=403, detail="没有权限创建财务记录")
+
+    if len(payload.records) > MAX_BULK_SIZE:
+        raise HTTPException(status_code=400, detail=f"单次最多导入 {MAX_BULK_SIZE} 条财务记录")
+
+    start = time.perf_counter()
+
+    # 逐行校验数据格式
+    results = [None] * len(payload.records)
+    valid = []
+    for index, row in enumerate(payload.records):
+        try:
+            record = FinancialRecord.model_validate(row)
+        except ValidationError as e:
+            results[index] = {"index": index, "success": False, "error": validation_message(e)}
+            continue
+        valid.append((index, record))
+
+    def create(conn):
+        # 一次查询所有关联的业务事件
+        event_ids = sorted({record.business_event_id for _, record in valid})
+        events = {row["id"]: row for row in conn.execute("""
+            SELECT id, status, department_id FROM business_events
+            WHERE id IN (SELECT value FROM json_each(?))
+        """, (json.dumps(event_ids),))}
+
+        lines = []
+        for index, record in valid:
+            event = events.get(record.business_event_id)
+            if event is None:
+                results[index] = {"index": index, "success": False, "error": "关联的业务事件不存在"}
+            elif event["status"] != "已审批":
+                results[index] = {"index": index, "success": False, "error": "关联的业务事件尚未审批通过"}
+            else:
+                lines.append((index, record, event["department_id"]))
+
+        record_ids = post_records(conn, [(record, department_id) for _, record, department_id in lines],
+                                  current_user["id"])
+        for (index, _, _), record_id in zip(lines, record_ids):
+            results[index] = {"index": index, "success": True, "id": record_id}
+        return len(record_ids)
+
+    created = await db.write(create) if valid else 0
+
+    elapsed = time.perf_counter() - start
+    return {
+        "total": len(payload.records),
+        "created": created,
+        "failed": len(payload.records) - created,
+        "elapsed_ms": round(elapsed * 1000, 3),
+        "records_per_second": round(created / elapsed, 1) if elapsed > 0 else 0.0,
+        "results": results,
+    }
+
 # 审批API
 @app.get("/approvals")
-async def get_approvals(status: str = None, current_user = Depends(get_current_user)):
-    conn = get_db_connection()
-    
-    # 构建基本查询
-    query = """
-        SELECT a.*, be.project_name, be.event_type, be.amount, u.username as approver_name
+async def get_approvals(
+    filters: ApprovalFilters = Depends(),
+    page: PageParams = Depends(),
+    current_user = Depends(get_current_user),
+    db = Depends(get_db)
+):
+    query_filters = filters.build()
+
+    # 非管理员只能查看自己的审批
+    if current_user["role"] != "管理员":
+        query_filters.add("a.approver_id = ?", current_user["id"])
+
+    select_sql, from_sql, order_by = APPROVAL_LIST
+    return json_response(await db.read(fetch_page, select_sql, from_sql, query_filters, order_by, page))
+
+@app.get("/approvals/stream")
+async def stream_approvals(
+    filters: ApprovalFilters = Depends(),
+    output_format: str = Query("ndjson", alias="format", pattern="^(ndjson|json)$"),
+    current_user = Depends(get_current_user),
+    db = Depends(get_db)
+):
+    """流式导出全部符合条件的审批记录（NDJSON 或 JSON 数组）"""
+    query_filters = filters.build()
+
+    # 非管理员只能查看自己的审批
+    if current_user["role"] != "管理员":
+        query_filters.add("a.approver_id = ?", current_user["id"])
+
+    select_sql, from_sql, order_by = APPROVAL_LIST
+    sql, params = list_query(select_sql, from_sql, query_filters, order_by)
+    return stream_response(db.stream(sql, params), output_format)
+
+@app.get("/approvals/{approval_id}")
+async def get_approval(approval_id: int, current_user = Depends(get_current_user), db = Depends(get_db)):
+    approval = await db.fetchone("""
+        SELECT a.*, be.project_name, be.event_type, be.amount, be.department_id, u.username as approver_name
         FROM approvals a
         JOIN business_events be ON a.business_event_id = be.id
         JOIN users u ON a.approver_id = u.id
-    """
-    params = []
-    
-    # 添加条件
-    conditions = []
-    
-    # 非管理员只能查看自己的审批
-    if current_user["role"] != "管理员":
-        conditions.append("a.approver_id = ?")
-        params.append(current_user["id"])
-    
-    # 如果指定了状态，添加状态筛选
-    if status:
-        conditions.append("a.status = ?")
-        params.append(status)
-    
-    # 组合条件
-    if conditions:
-        query += " WHERE " + " AND ".join(conditions)
-    
-    # 添加排序
-    query += " ORDER BY a.created_at DESC"
-    
-    # 执行查询
-    approvals = conn.execute(query, params).fetchall()
-    conn.close()
-    
-    return [dict(approval) for approval in approvals]
+        WHERE a.id = ?
+    """, (approval_id,))
+    if approval is None:
+        raise HTTPException(status_code=404, detail="审批记录不存在")
+    return approval
 
 @app.post("/approvals/{approval_id}/approve")
-async def approve(approval_id: int, current_user = Depends(get_current_user)):
-    conn = None
-    try:
-        print(f"开始处理审批通过请求，审批ID: {approval_id}, 用户: {current_user['username']}")
-        
-        conn = get_db_connection()
+async def approve(approval_id: int, current_user = Depends(get_current_user), db = Depends(get_db)):
+    def do_approve(conn):
         cursor = conn.cursor()
-        
+
         # 验证审批流程是否存在
         approval = cursor.execute("""
-            SELECT a.*, e.id as event_id, e.status as event_status 
+            SELECT a.*, e.id as event_id, e.status as event_status
             FROM approvals a
             JOIN business_events e ON a.business_event_id = e.id
             WHERE a.id = ?
         """, (approval_id,)).fetchone()
-        
-        print(f"查询审批记录结果: {approval}")
-        
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("审批记录: %s", dict(approval) if approval else None)
+
         if not approval:
             raise HTTPException(status_code=404, detail="审批记录不存在")
-        
+
         # 验证用户是否有权限审批
         if approval["approver_id"] != current_user["id"] and current_user["role"] != "管理员":
             raise HTTPException(status_code=403, detail="您没有权限执行此审批")
-        
+
         # 检查审批流程状态
         if approval["status"] != "待审批":
             raise HTTPException(status_code=400, detail="此审批已处理，无法重复操作")
-        
+
         # 更新审批状态 - 修正列名为approval_date
         cursor.execute(
             "UPDATE approvals SET status = '已通过', approval_date = datetime('now') WHERE id = ?",
             (approval_id,)
         )
-        
+
         # 检查是否有下一级审批
         next_approval = cursor.execute("""
-            SELECT id FROM approvals 
+            SELECT id FROM approvals
             WHERE business_event_id = ? AND approval_level > ? AND status = '待审批'
             ORDER BY approval_level LIMIT 1
         """, (approval["business_event_id"], approval["approval_level"])).fetchone()
-        
+
         # 根据是否有下一级审批更新业务事件状态
         if next_approval:
             # 还有下一级审批，业务事件状态保持"审批中"
@@ -441,427 +734,473 @@ async def approve(approval_id: int, current_user = Depends(get_current_user)):
         else:
             # 所有审批已完成，业务事件状态更新为"已审批"
             new_status = "已审批"
-        
-        print(f"更新业务事件状态为: {new_status}")
-        
+
+        logger.debug("更新业务事件状态为: %s", new_status)
+
         # 更新业务事件状态
         cursor.execute(
             "UPDATE business_events SET status = ? WHERE id = ?",
             (new_status, approval["business_event_id"])
         )
-        
+
         # 记录状态变更历史
         try:
-            print("尝试记录状态历史...")
             cursor.execute("""
                 INSERT INTO status_history (business_event_id, timestamp, status, operator, remarks)
                 VALUES (?, datetime('now'), ?, ?, '审批通过')
             """, (approval["business_event_id"], new_status, current_user["username"]))
-            print("状态历史记录成功")
         except Exception as e:
             # 记录错误但不中断流程
-            print(f"记录状态历史失败: {str(e)}")
-        
-        print("提交事务...")
-        conn.commit()
-        print("审批处理完成")
-        
-        return {"message": "审批已通过", "next_approval": next_approval is not None}
+            logger.warning("记录状态历史失败: %s", e, extra={"approval_id": approval_id})
+
+        return next_approval is not None
+
+    try:
+        has_next = await db.write(do_approve)
+        logger.info("审批已通过", extra={"approval_id": approval_id, "user": current_user["username"],
+                                      "next_approval": has_next})
+
+        return {"message": "审批已通过", "next_approval": has_next}
     except HTTPException as e:
         # 重新抛出HTTP异常
         raise e
     except Exception as e:
         # 记录错误并返回友好的错误信息
-        print(f"审批过程中发生错误: {str(e)}")
+        logger.exception("审批过程中发生错误", extra={"approval_id": approval_id})
         raise HTTPException(status_code=500, detail=f"审批处理失败: {str(e)}")
-    finally:
-        # 确保连接被关闭
-        if conn:
-            conn.close()
 
 @app.post("/approvals/{approval_id}/reject")
-async def reject(approval_id: int, current_user = Depends(get_current_user)):
-    conn = None
-    try:
-        print(f"开始处理审批拒绝请求，审批ID: {approval_id}, 用户: {current_user['username']}")
-        
-        conn = get_db_connection()
+async def reject(approval_id: int, current_user = Depends(get_current_user), db = Depends(get_db)):
+    def do_reject(conn):
         cursor = conn.cursor()
-        
+
         # 验证审批流程是否存在
         approval = cursor.execute("""
-            SELECT a.*, e.id as event_id 
+            SELECT a.*, e.id as event_id
             FROM approvals a
             JOIN business_events e ON a.business_event_id = e.id
             WHERE a.id = ?
         """, (approval_id,)).fetchone()
-        
-        print(f"查询审批记录结果: {approval}")
-        
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("审批记录: %s", dict(approval) if approval else None)
+
         if not approval:
             raise HTTPException(status_code=404, detail="审批记录不存在")
-        
+
         # 验证用户是否有权限审批
         if approval["approver_id"] != current_user["id"] and current_user["role"] != "管理员":
             raise HTTPException(status_code=403, detail="您没有权限执行此审批")
-        
+
         # 检查审批流程状态
         if approval["status"] != "待审批":
             raise HTTPException(status_code=400, detail="此审批已处理，无法重复操作")
-        
+
         # 更新审批状态 - 修正列名为approval_date
         cursor.execute(
             "UPDATE approvals SET status = '已拒绝', approval_date = datetime('now') WHERE id = ?",
             (approval_id,)
         )
-        
+
         # 更新业务事件状态为"已拒绝"
         cursor.execute(
             "UPDATE business_events SET status = '已拒绝' WHERE id = ?",
             (approval["business_event_id"],)
         )
-        
+
         # 记录状态变更历史
         try:
-            print("尝试记录状态历史...")
             cursor.execute("""
                 INSERT INTO status_history (business_event_id, timestamp, status, operator, remarks)
                 VALUES (?, datetime('now'), '已拒绝', ?, '审批拒绝')
             """, (approval["business_event_id"], current_user["username"]))
-            print("状态历史记录成功")
         except Exception as e:
             # 记录错误但不中断流程
-            print(f"记录状态历史失败: {str(e)}")
-        
-        print("提交事务...")
-        conn.commit()
-        print("审批拒绝处理完成")
-        
+            logger.warning("记录状态历史失败: %s", e, extra={"approval_id": approval_id})
+
+    try:
+        await db.write(do_reject)
+        logger.info("审批已拒绝", extra={"approval_id": approval_id, "user": current_user["username"]})
+
         return {"message": "审批已拒绝"}
     except HTTPException as e:
         # 重新抛出HTTP异常
         raise e
     except Exception as e:
         # 记录错误并返回友好的错误信息
-        print(f"审批拒绝过程中发生错误: {str(e)}")
+        logger.exception("审批拒绝过程中发生错误", extra={"approval_id": approval_id})
         raise HTTPException(status_code=500, detail=f"审批拒绝失败: {str(e)}")
-    finally:
-        # 确保连接被关闭
-        if conn:
-            conn.close()
 
 # 预算API
 @app.get("/budgets")
-async def get_budgets(year: int = None, month: int = None, current_user = Depends(get_current_user)):
-    conn = get_db_connection()
-    query = """
-        SELECT b.*, d.name as department_name, a.name as account_name
-        FROM budgets b
+async def get_budgets(
+    filters: BudgetFilters = Depends(),
+    page: PageParams = Depends(),
+    current_user = Depends(get_current_user),
+    db = Depends(get_db)
+):
+    # 预算按年度、月份倒序展示，键集取 (year, month, id)
+    return json_response(await db.read(
+        fetch_page,
+        "SELECT b.*, d.name as department_name, a.name as account_name",
+        """FROM budgets b
         JOIN departments d ON b.department_id = d.id
-        LEFT JOIN account_subjects a ON b.account_subject_id = a.id
+        LEFT JOIN account_subjects a ON b.account_subject_id = a.id""",
+        filters.build(),
+        [("b.year", "year"), ("b.month", "month"), ("b.id", "id")],
+        page,
+    ))
+
+@app.get("/budgets/execution")
+async def get_budget_execution(
+    filters: BudgetFilters = Depends(),
+    rollup: bool = False,
+    current_user = Depends(get_current_user),
+    db = Depends(get_db)
+):
+    """预算执行情况：预算金额、执行数（支出）、剩余金额与执行率
+
+    执行数来自预算执行汇总表，按科目（含下级科目）匹配；rollup=true 时包含下级部门
+    """
+    return json_response(await db.read(fetch_budget_execution, filters.build(), rollup))
+
+# 报表API
+@app.get("/reports/trial_balance")
+async def get_trial_balance(
+    fiscal_year: Optional[int] = None,
+    fiscal_period: Optional[int] = Query(None, ge=1, le=12),
+    as_of: Optional[date] = None,
+    account_code: Optional[str] = None,
+    current_user = Depends(get_current_user),
+    db = Depends(get_db)
+):
+    """试算平衡表：各科目期初余额、本期借贷发生额与期末余额
+
+    as_of 为截止日期，未指定财年/期间时取截止日期所在的年月；account_code 只统计该科目及其下级科目
     """
-    params = []
-    
-    if year:
-        query += " WHERE b.year = ?"
-        params.append(year)
-        if month:
-            query += " AND b.month = ?"
-            params.append(month)
-    
-    query += " ORDER BY b.year DESC, b.month DESC"
-    
-    budgets = conn.execute(query, params).fetchall()
-    conn.close()
-    return [dict(budget) for budget in budgets]
+    if as_of is not None:
+        fiscal_year = fiscal_year or as_of.year
+        fiscal_period = fiscal_period or as_of.month
+    if fiscal_year is None or fiscal_period is None:
+        raise HTTPException(status_code=400, detail="请指定财年与会计期间，或指定截止日期")
+    return json_response(await db.read(
+        trial_balance, fiscal_year, fiscal_period, as_of and as_of.isoformat(), account_code,
+    ))
+
+@app.get("/reports")
+async def get_reports(current_user = Depends(get_current_user), db = Depends(get_db)):
+    """已启用的报表配置"""
+    return await db.fetchall("""
+        SELECT id, report_name, report_type, description, updated_at
+        FROM report_configs WHERE is_active = 1 ORDER BY report_type, id
+    """)
+
+@app.post("/reports/{report_id}/run")
+async def execute_report(
+    report_id: int,
+    run: Optional[ReportRun] = None,
+    current_user = Depends(get_current_user),
+    db = Depends(get_db)
+):
+    """执行报表（只读、限时、限行数），数据未变化时返回缓存结果"""
+    params = (run.params if run else None) or {}
+    values = params.values() if isinstance(params, dict) else params
+    if any(value is not None and not isinstance(value, (str, int, float, bool)) for value in values):
+        raise HTTPException(status_code=400, detail="报表参数只能是字符串、数字、布尔值或null")
+    try:
+        result = await db.read(run_report, report_id, params)
+    except ReportTimeoutError as e:
+        raise HTTPException(status_code=504, detail=f"报表执行超时: {str(e)}")
+    except ReportError as e:
+        raise HTTPException(status_code=400, detail=f"报表执行失败: {str(e)}")
+    if result is None:
+        raise HTTPException(status_code=404, detail="报表不存在或已停用")
+    return json_response(result)
 
 @app.get("/departments")
-async def get_departments(current_user = Depends(get_current_user)):
-    conn = get_db_connection()
-    departments = conn.execute("SELECT * FROM departments").fetchall()
-    conn.close()
-    return [dict(dept) for dept in departments]
+async def get_departments(request: Request, current_user = Depends(get_current_user), db = Depends(get_db)):
+    return await departments_data.response(request, db)
 
 @app.get("/account_subjects")
-async def get_account_subjects(current_user = Depends(get_current_user)):
-    conn = get_db_connection()
-    subjects = conn.execute("SELECT * FROM account_subjects").fetchall()
-    conn.close()
-    return [dict(subject) for subject in subjects]
+async def get_account_subjects(request: Request, current_user = Depends(get_current_user), db = Depends(get_db)):
+    return await account_subjects_data.response(request, db)
 
 # 获取业务事件详情（包含关联信息和状态历史）
 @app.get("/business_events/{event_id}/detail", response_model=BusinessEventDetail)
-async def get_business_event_detail(event_id: int, current_user = Depends(get_current_user)):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # 获取业务事件基本信息
-    event = conn.execute("SELECT * FROM business_events WHERE id = ?", (event_id,)).fetchone()
-    if event is None:
-        conn.close()
+async def get_business_event_detail(event_id: int, current_user = Depends(get_current_user), db = Depends(get_db)):
+    details = await db.read(fetch_event_details, [event_id])
+    if event_id not in details:
         raise HTTPException(status_code=404, detail="业务事件不存在")
-    
-    event_data = dict(event)
-    
-    # 获取关联的审批信息
-    approval = conn.execute("""
-        SELECT id FROM approvals 
-        WHERE business_event_id = ? 
-        ORDER BY approval_level DESC LIMIT 1
-    """, (event_id,)).fetchone()
-    
-    if approval:
-        event_data["approval_id"] = approval["id"]
-    
-    # 获取关联的财务记录
-    finance = conn.execute("""
-        SELECT id FROM financial_records 
-        WHERE business_event_id = ? 
-        LIMIT 1
-    """, (event_id,)).fetchone()
-    
-    if finance:
-        event_data["finance_id"] = finance["id"]
-    
-    # 获取状态历史（示例：实际中应从状态历史表中获取）
-    # 注意：这里假设有一个status_history表，如果没有，则需要通过其他方式模拟
-    try:
-        history = conn.execute("""
-            SELECT * FROM status_history 
-            WHERE business_event_id = ? 
-            ORDER BY timestamp
-        """, (event_id,)).fetchall()
-        
-        if history:
-            event_data["status_history"] = [dict(record) for record in history]
-        else:
-            # 如果没有历史记录，创建一个基本的历史记录
-            event_data["status_history"] = [{
-                "timestamp": event_data["created_at"],
-                "status": "新建",
-                "operator": "系统",
-                "remarks": "业务事件创建"
-            }]
-    except:
-        # 如果没有状态历史表，则不返回历史记录
-        event_data["status_history"] = []
-    
-    conn.close()
-    return event_data
+    return details[event_id]
 
 # 获取业务事件状态
 @app.get("/business_events/{event_id}/status")
-async def get_business_event_status(event_id: int, current_user = Depends(get_current_user)):
-    conn = get_db_connection()
-    event = conn.execute("SELECT status FROM business_events WHERE id = ?", (event_id,)).fetchone()
-    conn.close()
-    
+async def get_business_event_status(event_id: int, current_user = Depends(get_current_user), db = Depends(get_db)):
+    event = await db.fetchone("SELECT status FROM business_events WHERE id = ?", (event_id,))
+
     if event is None:
         raise HTTPException(status_code=404, detail="业务事件不存在")
-    
+
     return {"status": event["status"]}
 
 # 获取业务事件关联数据
 @app.get("/business_events/{event_id}/related")
-async def get_business_event_related(event_id: int, current_user = Depends(get_current_user)):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # 查询关联的审批记录
-    approvals = cursor.execute("""
-        SELECT a.id, a.status, a.approval_level, a.approver_id, a.created_at, u.username as approver_name
-        FROM approvals a
-        LEFT JOIN users u ON a.approver_id = u.id
-        WHERE a.business_event_id = ?
-        ORDER BY a.approval_level
-    """, (event_id,)).fetchall()
-    
-    # 查询关联的财务记录
-    financial_records = cursor.execute("""
-        SELECT id, account_name, amount, direction, record_date
-        FROM financial_records
-        WHERE business_event_id = ?
-    """, (event_id,)).fetchall()
-    
-    conn.close()
-    
-    return {
-        "approvals": [dict(a) for a in approvals] if approvals else [],
-        "financial_records": [dict(f) for f in financial_records] if financial_records else []
-    }
+async def get_business_event_related(event_id: int, current_user = Depends(get_current_user), db = Depends(get_db)):
+    def query(conn):
+        cursor = conn.cursor()
+
+        # 查询关联的审批记录
+        approvals = cursor.execute("""
+            SELECT a.id, a.status, a.approval_level, a.approver_id, a.created_at, u.username as approver_name
+            FROM approvals a
+            LEFT JOIN users u ON a.approver_id = u.id
+            WHERE a.business_event_id = ?
+            ORDER BY a.approval_level
+        """, (event_id,)).fetchall()
+
+        # 查询关联的财务记录
+        financial_records = cursor.execute("""
+            SELECT id, account_name, amount, direction, record_date
+            FROM financial_records
+            WHERE business_event_id = ?
+        """, (event_id,)).fetchall()
+
+        return {
+            "approvals": [dict(a) for a in approvals] if approvals else [],
+            "financial_records": [dict(f) for f in financial_records] if financial_records else []
+        }
+
+    return await db.read(query)
 
 # 提交业务事件到审批流程
 @app.post("/business_events/{event_id}/submit-to-approval")
-async def submit_to_approval(event_id: int, current_user = Depends(get_current_user)):
-    print(f"提交业务事件 {event_id} 到审批流程，用户: {current_user['username']}")
-    
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # 检查业务事件是否存在
-    event = cursor.execute("SELECT * FROM business_events WHERE id = ?", (event_id,)).fetchone()
-    if not event:
-        conn.close()
-        print(f"业务事件 {event_id} 不存在")
-        raise HTTPException(status_code=404, detail="业务事件不存在")
-    
-    event_data = dict(event)
-    print(f"业务事件数据: {event_data}")
-    
-    # 检查当前状态是否允许提交审批
-    if event_data["status"] not in ["新建", "待审批"]:
-        conn.close()
-        print(f"业务事件状态 {event_data['status']} 不允许提交审批")
-        raise HTTPException(status_code=400, detail="当前状态不允许提交审批")
-    
-    # 创建审批任务（如果尚未创建）
-    existing_approvals = cursor.execute(
-        "SELECT COUNT(*) as count FROM approvals WHERE business_event_id = ?", 
-        (event_id,)
-    ).fetchone()
-    
-    print(f"现有审批数量: {existing_approvals['count']}")
-    
-    if existing_approvals["count"] == 0:
-        # 查询匹配的审批配置
-        configs = cursor.execute("""
-            SELECT * FROM approval_configs
-            WHERE event_type = ? AND department_id = ? AND is_active = 1
-            AND (amount_threshold IS NULL OR amount_threshold <= ?)
-            ORDER BY approval_level
-        """, (event_data["event_type"], event_data["department_id"], event_data["amount"])).fetchall()
-        
-        print(f"匹配的审批配置数量: {len(configs) if configs else 0}")
-        
-        # 如果没有找到匹配的审批配置，使用默认配置
-        if not configs or len(configs) == 0:
-            print("没有找到匹配的审批配置，使用默认配置")
-            # 默认分配给管理员审批
-            cursor.execute("""
-                INSERT INTO approvals (business_event_id, approver_id, approval_level, status)
-                SELECT ?, id, 1, '待审批'
-                FROM users
-                WHERE role = '管理员'
-                LIMIT 1
-            """, (event_id,))
-            
-            inserted = cursor.execute("SELECT changes() as changes").fetchone()["changes"]
-            if inserted == 0:
-                print("警告: 无法找到管理员用户")
-                # 尝试分配给创建者本人审批
+async def submit_to_approval(event_id: int, current_user = Depends(get_current_user), db = Depends(get_db)):
+    def submit(conn):
+        cursor = conn.cursor()
+
+        # 检查业务事件是否存在
+        event = cursor.execute("SELECT * FROM business_events WHERE id = ?", (event_id,)).fetchone()
+        if not event:
+            raise HTTPException(status_code=404, detail="业务事件不存在")
+
+        event_data = dict(event)
+        logger.debug("业务事件数据: %s", event_data)
+
+        # 检查当前状态是否允许提交审批
+        if event_data["status"] not in ["新建", "待审批"]:
+            logger.debug("业务事件状态 %s 不允许提交审批", event_data["status"], extra={"event_id": event_id})
+            raise HTTPException(status_code=400, detail="当前状态不允许提交审批")
+
+        # 创建审批任务（如果尚未创建）
+        existing_approvals = cursor.execute(
+            "SELECT COUNT(*) as count FROM approvals WHERE business_event_id = ?",
+            (event_id,)
+        ).fetchone()
+
+        logger.debug("现有审批数量: %s", existing_approvals["count"])
+
+        if existing_approvals["count"] == 0:
+            # 匹配的审批链
+            chain = approval_routing.route(conn, event_data["event_type"], event_data["department_id"], event_data["amount"])
+
+            logger.debug("匹配的审批配置数量: %s", len(chain))
+
+            # 如果没有找到匹配的审批配置，使用默认配置
+            if not chain:
+                logger.debug("没有找到匹配的审批配置，使用默认配置", extra={"event_id": event_id})
+                # 默认分配给管理员审批
                 cursor.execute("""
                     INSERT INTO approvals (business_event_id, approver_id, approval_level, status)
-                    VALUES (?, ?, 1, '待审批')
-                """, (event_id, current_user["id"]))
-        else:
-            # 创建审批流程
-            for config in configs:
-                config_dict = dict(config)
-                print(f"创建审批任务: 审批人ID={config_dict['approver_id']}, 级别={config_dict['approval_level']}")
-                cursor.execute("""
+                    SELECT ?, id, 1, '待审批'
+                    FROM users
+                    WHERE role = '管理员'
+                    LIMIT 1
+                """, (event_id,))
+
+                inserted = cursor.execute("SELECT changes() as changes").fetchone()["changes"]
+                if inserted == 0:
+                    logger.warning("无法找到管理员用户，由提交人审批", extra={"event_id": event_id})
+                    # 尝试分配给创建者本人审批
+                    cursor.execute("""
+                        INSERT INTO approvals (business_event_id, approver_id, approval_level, status)
+                        VALUES (?, ?, 1, '待审批')
+                    """, (event_id, current_user["id"]))
+            else:
+                # 创建审批流程
+                logger.debug("创建审批任务: %s", chain, extra={"event_id": event_id})
+                cursor.executemany("""
                     INSERT INTO approvals (business_event_id, approver_id, approval_level, status)
                     VALUES (?, ?, ?, '待审批')
-                """, (event_id, config_dict["approver_id"], config_dict["approval_level"]))
-    
-    # 更新业务事件状态
-    cursor.execute(
-        "UPDATE business_events SET status = '待审批' WHERE id = ?",
-        (event_id,)
-    )
-    
-    # 记录状态变更历史（如果有状态历史表）
-    try:
-        cursor.execute("""
-            INSERT INTO status_history (business_event_id, timestamp, status, operator, remarks)
-            VALUES (?, datetime('now'), ?, ?, '提交到审批流程')
-        """, (event_id, "待审批", current_user["username"]))
-    except:
-        # 如果没有状态历史表，则忽略此步骤
-        pass
-    
-    conn.commit()
-    conn.close()
-    
+                """, [(event_id, approver_id, level) for approver_id, level in chain])
+
+        # 更新业务事件状态
+        cursor.execute(
+            "UPDATE business_events SET status = '待审批' WHERE id = ?",
+            (event_id,)
+        )
+
+        # 记录状态变更历史（如果有状态历史表）
+        try:
+            cursor.execute("""
+                INSERT INTO status_history (business_event_id, timestamp, status, operator, remarks)
+                VALUES (?, datetime('now'), ?, ?, '提交到审批流程')
+            """, (event_id, "待审批", current_user["username"]))
+        except:
+            # 如果没有状态历史表，则忽略此步骤
+            pass
+
+    await db.write(submit)
+    logger.info("业务事件已提交审批", extra={"event_id": event_id, "user": current_user["username"]})
+
     return {"message": "业务事件已成功提交到审批流程"}
 
 # 更新关联业务事件状态（供审批流程使用）
 @app.post("/approvals/{approval_id}/update-business-status")
 async def update_business_status(
-    approval_id: int, 
+    approval_id: int,
     status_data: Dict[str, Any],
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    db = Depends(get_db)
 ):
     new_status = status_data.get("status")
     remarks = status_data.get("remarks", "")
-    
+
     if not new_status:
         raise HTTPException(status_code=400, detail="缺少状态参数")
-    
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # 获取关联的业务事件ID
-    approval = cursor.execute(
-        "SELECT business_event_id FROM approvals WHERE id = ?", 
-        (approval_id,)
-    ).fetchone()
-    
-    if not approval:
-        conn.close()
-        raise HTTPException(status_code=404, detail="审批记录不存在")
-    
-    business_event_id = approval["business_event_id"]
-    
-    # 更新业务事件状态
-    cursor.execute(
-        "UPDATE business_events SET status = ? WHERE id = ?",
-        (new_status, business_event_id)
-    )
-    
-    # 记录状态变更历史（如果有状态历史表）
-    try:
-        cursor.execute("""
-            INSERT INTO status_history (business_event_id, timestamp, status, operator, remarks)
-            VALUES (?, datetime('now'), ?, ?, ?)
-        """, (business_event_id, new_status, current_user["username"], remarks))
-    except:
-        # 如果没有状态历史表，则忽略此步骤
-        pass
-    
-    conn.commit()
-    conn.close()
-    
+
+    def update(conn):
+        cursor = conn.cursor()
+
+        # 获取关联的业务事件ID
+        approval = cursor.execute(
+            "SELECT business_event_id FROM approvals WHERE id = ?",
+            (approval_id,)
+        ).fetchone()
+
+        if not approval:
+            raise HTTPException(status_code=404, detail="审批记录不存在")
+
+        business_event_id = approval["business_event_id"]
+
+        # 更新业务事件状态
+        cursor.execute(
+            "UPDATE business_events SET status = ? WHERE id = ?",
+            (new_status, business_event_id)
+        )
+
+        # 记录状态变更历史（如果有状态历史表）
+        try:
+            cursor.execute("""
+                INSERT INTO status_history (business_event_id, timestamp, status, operator, remarks)
+                VALUES (?, datetime('now'), ?, ?, ?)
+            """, (business_event_id, new_status, current_user["username"], remarks))
+        except:
+            # 如果没有状态历史表，则忽略此步骤
+            pass
+
+    await db.write(update)
+
     return {"message": f"业务事件状态已更新为 {new_status}"}
 
 @app.get("/business_events/{event_id}/approvals")
-async def get_business_approvals(event_id: int, current_user = Depends(get_current_user)):
+async def get_business_approvals(event_id: int, current_user = Depends(get_current_user), db = Depends(get_db)):
     """获取特定业务事件的所有审批任务"""
-    conn = get_db_connection()
-    
-    approvals = conn.execute("""
+
+    approvals = await db.fetchall("""
         SELECT a.*, be.project_name, be.event_type, be.amount, u.username as approver_name
         FROM approvals a
         JOIN business_events be ON a.business_event_id = be.id
         JOIN users u ON a.approver_id = u.id
         WHERE a.business_event_id = ?
         ORDER BY a.approval_level
-    """, (event_id,)).fetchall()
-    
-    conn.close()
-    
+    """, (event_id,))
+
     if not approvals:
         return {"message": "没有找到与此业务事件关联的审批记录", "approvals": []}
-    
-    return [dict(approval) for approval in approvals]
+
+    return approvals
+
+# 系统监控API
+@app.get("/system/db_pool")
+async def get_db_pool_metrics(current_user = Depends(get_current_user)):
+    """获取数据库连接池指标（仅管理员）"""
+    if current_user["role"] != "管理员":
+        raise HTTPException(status_code=403, detail="没有权限查看系统监控数据")
+    return pool_metrics()
+
+@app.get("/system/auth_cache")
+async def get_auth_cache_metrics(current_user = Depends(get_current_user)):
+    """获取认证缓存指标（仅管理员）"""
+    if current_user["role"] != "管理员":
+        raise HTTPException(status_code=403, detail="没有权限查看系统监控数据")
+    return principal_cache.metrics()
+
+@app.get("/system/report_cache")
+async def get_report_cache_metrics(current_user = Depends(get_current_user)):
+    """获取报表缓存指标（仅管理员）"""
+    if current_user["role"] != "管理员":
+        raise HTTPException(status_code=403, detail="没有权限查看系统监控数据")
+    return report_cache.metrics()
+
+@app.get("/system/sql_profile")
+async def get_sql_profile(
+    limit: int = Query(20, ge=1, le=200),
+    order_by: str = Query("total_time", pattern="^(total_time|max_time|calls|rows|slow_calls)$"),
+    explain: bool = False,
+    current_user = Depends(get_current_user),
+    db = Depends(get_db)
+):
+    """SQL性能分析：按归一化SQL汇总的前N条语句（仅管理员，需以 SQL_PROFILE=1 启动）
+
+    explain=true 时立即对尚未检查的语句执行 EXPLAIN QUERY PLAN
+    """
+    if current_user["role"] != "管理员":
+        raise HTTPException(status_code=403, detail="没有权限查看系统监控数据")
+    if not SQL_PROFILE:
+        return {"enabled": False, "statements": []}
+    if explain:
+        await db.read(profiler.explain_top)
+    return profiler.summary(limit, order_by)
+
+@app.delete("/system/sql_profile")
+async def reset_sql_profile(current_user = Depends(get_current_user)):
+    """清空SQL性能分析的统计（仅管理员）"""
+    if current_user["role"] != "管理员":
+        raise HTTPException(status_code=403, detail="没有权限清空SQL性能分析数据")
+    profiler.reset()
+    return {"message": "SQL性能分析数据已清空"}
+
+@app.post("/system/budget_reconciliation")
+async def run_budget_reconciliation(
+    full: bool = False,
+    dry_run: bool = False,
+    current_user = Depends(get_current_user),
+    db = Depends(get_db)
+):
+    """预算对账：按财务记录重新汇总预算已用金额与预算执行汇总并批量更正（仅管理员）
+
+    默认只处理上次对账后新增记录所在的会计期间；full=true 时全量对账；dry_run=true 时只报告差异
+    """
+    if current_user["role"] != "管理员":
+        raise HTTPException(status_code=403, detail="没有权限执行预算对账")
+    if dry_run:
+        return await db.read_long(reconcile_budgets, full, True)
+    return await db.write(reconcile_budgets, full, False)
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics(request: Request):
+    """Prometheus 格式的请求指标与连接池指标"""
+    if METRICS_TOKEN and request.headers.get("authorization") != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="无效的监控令牌")
+    # 直接给出 Content-Type：按 media_type 传入时 Starlette 会再追加一次 charset
+    return PlainTextResponse(request_metrics.render(pool_metrics()), headers={"Content-Type": METRICS_CONTENT_TYPE})
 
 # 全局异常处理器
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     # 记录异常
-    print(f"全局异常: {str(exc)}")
-    import traceback
-    traceback.print_exc()
-    
+    logger.error("全局异常: %s", exc, exc_info=exc, extra={"path": request.url.path})
+
     # 返回友好的错误信息
     return JSONResponse(
         status_code=500,
@@ -870,4 +1209,4 @@ async def global_exception_handler(request: Request, exc: Exception):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,103 @@
+"""
+业财融合管理系统 - 日志
+
+替代请求处理中的 print()：
+- 分级日志，级别由环境变量 LOG_LEVEL 控制（默认 INFO），SQL、参数、行数据等明细只在 DEBUG 级别输出
+- 非阻塞：请求线程只把日志记录放入队列（QueueHandler），由后台线程（QueueListener）写入控制台或文件
+- 结构化：extra 中的字段以 key=value 追加在消息后；LOG_FORMAT=json 时每行输出一个JSON对象
+被禁用级别的日志调用只做一次级别比较；参数使用 %s 占位符延迟格式化，
+需要额外计算的明细先用 logger.isEnabledFor(logging.DEBUG) 判断。
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "text")
+# 为空时输出到标准错误
+LOG_FILE = os.environ.get("LOG_FILE", "")
+
+# 服务端日志的根记录器名称
+ROOT_LOGGER = "finance"
+
+# LogRecord 的标准属性，其余属性来自 extra
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+def _extra_fields(record):
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES}
+
+
+class KeyValueFormatter(logging.Formatter):
+    """文本格式：时间 级别 记录器 消息 key=value ..."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s %(message)s")
+
+    def format(self, record):
+        text = super().format(record)
+        fields = _extra_fields(record)
+        if fields:
+            text += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return text
+
+
+class JSONFormatter(logging.Formatter):
+    """JSON格式：每条日志一行"""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(_extra_fields(record))
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+_listener = None
+
+
+def setup_logging(level=LOG_LEVEL, log_format=LOG_FORMAT, log_file=LOG_FILE):
+    """配置 finance.* 记录器：队列处理器 + 后台监听线程，重复调用无效"""
+    global _listener
+    if _listener is not None:
+        return
+
+    if log_file:
+        output = logging.FileHandler(log_file, encoding="utf-8")
+    else:
+        output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(JSONFormatter() if log_format == "json" else KeyValueFormatter())
+
+    log_queue = queue.SimpleQueue()
+    logger = logging.getLogger(ROOT_LOGGER)
+    logger.setLevel(level)
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    # 进程退出前写完队列中剩余的日志
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """停止后台线程（会先写完队列中的日志）"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def get_logger(name):
+    """服务端模块的记录器，例如 get_logger("approvals") -> finance.approvals"""
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
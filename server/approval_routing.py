@@ -0,0 +1,98 @@
+"""
+业财融合管理系统 - 审批路由索引
+
+创建业务事件与提交审批时需要按 (事件类型, 部门, 金额) 找出审批链，原来每次都查询 approval_configs。
+启动时把启用的配置编译为内存索引：
+- (事件类型, 部门ID) -> 按金额阈值升序的阈值列表，以及每个阈值对应的完整审批链
+  （阈值不超过该值的所有配置，按审批级别排序）
+- 查找时对阈值列表二分，直接得到审批链，不查询数据库
+approval_configs 的任意变化都会使版本号递增（见 versions.VersionWatcher），索引标记为过期，
+下一次查找时在当前连接上重新编译。
+"""
+
+import threading
+from bisect import bisect_right
+
+from app_logging import get_logger
+
+logger = get_logger("approval_routing")
+
+# 未设置金额阈值的配置对任意金额都生效
+NO_THRESHOLD = float("-inf")
+
+
+def compile_configs(rows):
+    """配置行 -> {(事件类型, 部门ID): (阈值列表, 审批链列表)}
+
+    审批链为 ((审批人ID, 审批级别), ...)；阈值列表中第 i 个阈值对应的审批链包含阈值不超过它的全部配置
+    """
+    grouped = {}
+    for row in rows:
+        threshold = row["amount_threshold"]
+        grouped.setdefault((row["event_type"], row["department_id"]), []).append(
+            (NO_THRESHOLD if threshold is None else threshold, row["approval_level"], row["id"], row["approver_id"])
+        )
+
+    index = {}
+    for key, configs in grouped.items():
+        configs.sort()
+        thresholds = []
+        chains = []
+        active = []
+        for i, (threshold, level, config_id, approver_id) in enumerate(configs):
+            active.append((level, config_id, approver_id))
+            # 相同阈值只保留一个位置，对应包含全部同阈值配置的审批链
+            if i + 1 < len(configs) and configs[i + 1][0] == threshold:
+                continue
+            thresholds.append(threshold)
+            chains.append(tuple((approver_id, level) for level, _, approver_id in sorted(active)))
+        index[key] = (thresholds, chains)
+    return index
+
+
+class ApprovalRouting:
+    """approval_configs 的内存索引"""
+
+    def __init__(self):
+        self._index = {}
+        self._lock = threading.Lock()
+        # 失效次数与已编译的失效次数不同时需要重新编译
+        self._generation = 0
+        self._compiled_generation = -1
+
+        # 指标
+        self.compilations = 0
+        self.rule_count = 0
+
+    def invalidate(self):
+        """标记为过期（approval_configs 变化时由 VersionWatcher 调用）"""
+        self._generation += 1
+
+    def load(self, conn):
+        """从数据库读取启用的配置并编译索引"""
+        with self._lock:
+            generation = self._generation
+            rows = conn.execute("""
+                SELECT id, event_type, department_id, approver_id, approval_level, amount_threshold
+                FROM approval_configs
+                WHERE is_active = 1
+            """).fetchall()
+            self._index = compile_configs(rows)
+            self._compiled_generation = generation
+            self.compilations += 1
+            self.rule_count = len(rows)
+        logger.info("审批路由已编译", extra={"rules": len(rows), "routes": len(self._index)})
+
+    def route(self, conn, event_type, department_id, amount):
+        """返回审批链 ((审批人ID, 审批级别), ...)；没有匹配的配置时返回空元组"""
+        if self._compiled_generation != self._generation:
+            self.load(conn)
+        entry = self._index.get((event_type, department_id))
+        if entry is None:
+            return ()
+        thresholds, chains = entry
+        position = bisect_right(thresholds, amount)
+        return chains[position - 1] if position else ()
+
+
+approval_routing = ApprovalRouting()
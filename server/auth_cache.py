@@ -0,0 +1,83 @@
+"""
+业财融合管理系统 - 认证用户缓存
+
+缓存 token 到用户信息的映射，命中时既不需要解码JWT，也不需要查询 users 表。
+- 容量有限，按最近使用淘汰（LRU）
+- 每条缓存在 token 的过期时间（exp）失效
+- users 表任意一行变化（包括角色变化）时整体清空，见 versions.VersionWatcher
+
+服务端没有修改用户的接口，用户、角色与密码只会在数据库中直接修改，因此只能通过表版本号感知。
+失效存在延迟：修改后最多 VERSION_POLL_INTERVAL 秒（默认1秒）内，
+已缓存的 token 仍按修改前的角色通过认证（被删除的用户也仍可访问）。
+需要立即生效时调小 VERSION_POLL_INTERVAL，或重启服务端。
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# 最多缓存的 token 数量
+AUTH_CACHE_SIZE = int(os.environ.get("AUTH_CACHE_SIZE", "1024"))
+
+
+class PrincipalCache:
+    """token -> 用户信息 的有界缓存"""
+
+    def __init__(self, max_size=AUTH_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        # 指标
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, token):
+        """返回缓存的用户信息（副本），未命中或已过期时返回None"""
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self.misses += 1
+                return None
+            principal, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[token]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return dict(principal)
+
+    def put(self, token, principal, expires_at):
+        """缓存用户信息直到 expires_at（Unix时间戳）"""
+        with self._lock:
+            self._entries[token] = (dict(principal), expires_at)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def metrics(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+principal_cache = PrincipalCache()
@@ -0,0 +1,63 @@
+"""
+业财融合管理系统 - 预算执行情况
+
+预算执行数取自物化的 budget_execution 表（由 posting.post_records 在入账事务中维护），
+每个预算只关联同一期间的少量汇总行，不扫描财务记录：
+- 科目：预算科目及其下级科目（编码前缀相同）的支出；预算未指定科目时为全部科目
+- 部门：rollup=True 时包含全部下级部门（按 departments.parent_id 递归）
+"""
+
+# 部门树：每个部门与其自身及全部下级部门
+DEPARTMENT_TREE_CTE = """
+    department_tree(root_id, department_id) AS (
+        SELECT id, id FROM departments
+        UNION ALL
+        SELECT t.root_id, d.id FROM departments d JOIN department_tree t ON d.parent_id = t.department_id
+    )
+"""
+
+BUDGET_EXECUTION_SQL = """
+    WITH RECURSIVE {department_tree}
+    SELECT b.*, d.name AS department_name, a.code AS account_code, a.name AS account_name,
+           COALESCE(SUM(e.expense_amount), 0) AS executed_amount,
+           COALESCE(SUM(e.income_amount), 0) AS income_amount,
+           COALESCE(SUM(e.record_count), 0) AS record_count
+    FROM budgets b
+    JOIN departments d ON b.department_id = d.id
+    LEFT JOIN account_subjects a ON b.account_subject_id = a.id
+    LEFT JOIN budget_execution e
+        ON e.year = b.year AND e.month = b.month
+        AND {department_condition}
+        AND (a.code IS NULL OR substr(e.account_code, 1, length(a.code)) = a.code)
+    {where}
+    GROUP BY b.id
+    ORDER BY b.year DESC, b.month DESC, b.id DESC
+"""
+
+
+def fetch_budget_execution(conn, filters, rollup=False):
+    """查询预算及其执行情况
+
+    filters: BudgetFilters.build() 生成的条件
+    返回预算行，附带 executed_amount / income_amount / record_count / remaining_amount / execution_rate
+    """
+    if rollup:
+        department_condition = ("e.department_id IN "
+                                "(SELECT department_id FROM department_tree WHERE root_id = b.department_id)")
+    else:
+        department_condition = "e.department_id = b.department_id"
+    sql = BUDGET_EXECUTION_SQL.format(
+        department_tree=DEPARTMENT_TREE_CTE,
+        department_condition=department_condition,
+        where=filters.where(),
+    )
+
+    budgets = []
+    for row in conn.execute(sql, filters.params):
+        budget = dict(row)
+        budget["remaining_amount"] = budget["amount"] - budget["executed_amount"]
+        budget["execution_rate"] = (
+            round(budget["executed_amount"] / budget["amount"] * 100, 2) if budget["amount"] > 0 else 0.0
+        )
+        budgets.append(budget)
+    return budgets
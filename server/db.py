@@ -0,0 +1,337 @@
+"""
+业财融合管理系统 - 数据库连接池
+
+为每个请求复用预先调优过的SQLite连接，替代“每个请求新建连接再关闭”的方式：
+- 读写分离：只读连接池（PRAGMA query_only）与读写连接池
+- 启用WAL日志模式，并调优 synchronous / cache_size / mmap_size / temp_store
+- 每个连接保留语句缓存（cached_statements）
+- 记录连接池指标：已创建连接数、使用中连接数、借出次数、等待时间
+
+并提供异步数据访问层 Database：查询在专用的数据库线程池中执行，
+不会阻塞事件循环。读/写并发度分别等于对应连接池的大小。
+每次调用的耗时（含排队等待）计入当前请求的数据库耗时指标。
+全量导出等流式查询使用单独的只读连接池，长时间占用连接不会影响普通请求。
+"""
+
+import asyncio
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+# 迁移工具位于 database 目录
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "database"))
+from migrate import migrate
+from metrics import record_db_time
+from profiler import SQL_PROFILE, ProfilingConnection
+
+# 数据库路径（可通过环境变量 FINANCE_DB_PATH 覆盖）
+DATABASE_PATH = os.environ.get("FINANCE_DB_PATH", os.path.join("..", "database", "finance.db"))
+
+# 连接池大小（同时也是读/写线程池的并发度）
+READ_POOL_SIZE = int(os.environ.get("DB_READ_POOL_SIZE", "8"))
+WRITE_POOL_SIZE = int(os.environ.get("DB_WRITE_POOL_SIZE", "2"))
+STREAM_POOL_SIZE = int(os.environ.get("DB_STREAM_POOL_SIZE", "2"))
+
+# 流式查询每次从游标读取的行数
+STREAM_CHUNK_ROWS = 1000
+
+# 获取连接的最长等待时间（秒）
+CHECKOUT_TIMEOUT = 30.0
+
+# 每个连接缓存的预编译语句数量
+STATEMENT_CACHE_SIZE = 256
+
+# 连接级PRAGMA设置
+CONNECTION_PRAGMAS = (
+    ("busy_timeout", 5000),          # 写锁冲突时等待5秒而不是立即报错
+    ("synchronous", "NORMAL"),       # WAL模式下NORMAL即可保证一致性
+    ("cache_size", -32000),          # 约32MB页缓存
+    ("mmap_size", 268435456),        # 256MB内存映射
+    ("temp_store", "MEMORY"),        # 临时表与排序使用内存
+)
+
+
+class PoolTimeoutError(Exception):
+    """在等待时间内无法获取数据库连接"""
+
+
+class ConnectionPool:
+    """SQLite连接池
+
+    连接按需创建，最多 max_size 个；归还后放回池中复用。
+    readonly=True 时连接设置 PRAGMA query_only，禁止写操作。
+    """
+
+    def __init__(self, database_path, max_size, readonly=False, name=None):
+        self.database_path = database_path
+        self.max_size = max_size
+        self.readonly = readonly
+        self.name = name or ("read" if readonly else "write")
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+
+        # 指标
+        self.created = 0
+        self.in_use = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def _create_connection(self):
+        """创建并调优一个新连接"""
+        conn = sqlite3.connect(
+            self.database_path,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+            # 开启SQL性能分析时使用记录语句耗时的连接
+            factory=ProfilingConnection if SQL_PROFILE else sqlite3.Connection,
+        )
+        conn.row_factory = sqlite3.Row
+        if not self.readonly:
+            # 日志模式是数据库级设置，由写连接负责开启
+            conn.execute("PRAGMA journal_mode = WAL")
+        for pragma, value in CONNECTION_PRAGMAS:
+            conn.execute(f"PRAGMA {pragma} = {value}")
+        if self.readonly:
+            conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    def acquire(self, timeout=CHECKOUT_TIMEOUT):
+        """从池中借出一个连接"""
+        start = time.perf_counter()
+        conn = None
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                if self.created < self.max_size:
+                    self.created += 1
+                    create = True
+                else:
+                    create = False
+            if create:
+                try:
+                    conn = self._create_connection()
+                except Exception:
+                    with self._lock:
+                        self.created -= 1
+                    raise
+            else:
+                try:
+                    conn = self._idle.get(timeout=timeout)
+                except queue.Empty:
+                    with self._lock:
+                        self.timeouts += 1
+                    raise PoolTimeoutError(f"等待数据库连接超时（连接池: {self.name}）")
+
+        waited = time.perf_counter() - start
+        with self._lock:
+            self.in_use += 1
+            self.checkouts += 1
+            self.wait_time_total += waited
+            if waited > self.wait_time_max:
+                self.wait_time_max = waited
+        return conn
+
+    def release(self, conn):
+        """归还连接，未提交的事务会被回滚"""
+        with self._lock:
+            self.in_use -= 1
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            # 连接已损坏，丢弃并允许重新创建
+            conn.close()
+            with self._lock:
+                self.created -= 1
+            return
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """借出连接的上下文管理器"""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        """关闭池中所有空闲连接（之后仍可按需重新创建）"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self.created -= 1
+
+    def metrics(self):
+        """返回连接池指标"""
+        with self._lock:
+            return {
+                "pool": self.name,
+                "max_size": self.max_size,
+                "created": self.created,
+                "in_use": self.in_use,
+                "idle": self._idle.qsize(),
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_time_total_ms": round(self.wait_time_total * 1000, 3),
+                "wait_time_max_ms": round(self.wait_time_max * 1000, 3),
+                "wait_time_avg_ms": round(self.wait_time_total * 1000 / self.checkouts, 3) if self.checkouts else 0.0,
+            }
+
+
+class Database:
+    """异步数据访问层
+
+    每个查询都提交到有界的专用线程池执行：读操作使用只读连接池，
+    写操作使用读写连接池，以 BEGIN IMMEDIATE 开启事务（函数中的读取与写入处于同一写锁下）并提交。
+    事件循环只负责等待结果。
+    """
+
+    def __init__(self, read_pool, write_pool, stream_pool):
+        self.read_pool = read_pool
+        self.write_pool = write_pool
+        self.stream_pool = stream_pool
+        self._read_executor = ThreadPoolExecutor(max_workers=read_pool.max_size, thread_name_prefix="db-read")
+        self._write_executor = ThreadPoolExecutor(max_workers=write_pool.max_size, thread_name_prefix="db-write")
+        self._stream_executor = ThreadPoolExecutor(max_workers=stream_pool.max_size, thread_name_prefix="db-stream")
+
+    @staticmethod
+    def _run_read(pool, fn, args):
+        with pool.connection() as conn:
+            return fn(conn, *args)
+
+    @staticmethod
+    def _run_write(pool, fn, args):
+        with pool.connection() as conn:
+            try:
+                # 立即取得写锁：sqlite3 默认在第一条写语句前才开启延迟事务，之前的查询不在事务中，
+                # 两个写连接可能同时通过“先查后改”的状态检查（例如同一审批被重复通过）
+                conn.execute("BEGIN IMMEDIATE")
+                result = fn(conn, *args)
+                conn.commit()
+                return result
+            except BaseException:
+                conn.rollback()
+                raise
+
+    @staticmethod
+    async def _submit(executor, fn, *args):
+        """在线程池中执行并记录耗时"""
+        start = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+        finally:
+            record_db_time(time.perf_counter() - start)
+
+    async def read(self, fn, *args):
+        """在读线程中执行 fn(conn, *args)"""
+        return await self._submit(self._read_executor, self._run_read, self.read_pool, fn, args)
+
+    async def write(self, fn, *args):
+        """在写线程中以事务方式执行 fn(conn, *args)，成功提交，异常回滚"""
+        return await self._submit(self._write_executor, self._run_write, self.write_pool, fn, args)
+
+    async def fetchone(self, sql, params=()):
+        """查询单行，返回字典或None"""
+        def query(conn):
+            row = conn.execute(sql, params).fetchone()
+            return dict(row) if row else None
+        return await self.read(query)
+
+    async def fetchall(self, sql, params=()):
+        """查询多行，返回字典列表"""
+        def query(conn):
+            return [dict(row) for row in conn.execute(sql, params).fetchall()]
+        return await self.read(query)
+
+    async def read_long(self, fn, *args):
+        """在流式线程中使用流式连接池执行耗时的只读操作，例如生成导出文件"""
+        return await self._submit(self._stream_executor, self._run_read, self.stream_pool, fn, args)
+
+    async def stream(self, sql, params=(), chunk_size=STREAM_CHUNK_ROWS):
+        """流式查询：逐批产出字典列表，每批最多 chunk_size 行
+
+        整个查询占用流式连接池的一个连接，同一条SELECT在WAL模式下读取一致的快照；
+        内存中只保留当前一批数据。
+        """
+        # 同一连接上的读取与清理可能落在不同线程，用锁保证串行
+        lock = threading.Lock()
+        state = {}
+
+        def open_cursor():
+            with lock:
+                state["conn"] = self.stream_pool.acquire()
+                state["cursor"] = state["conn"].execute(sql, params)
+
+        def fetch():
+            with lock:
+                return [dict(row) for row in state["cursor"].fetchmany(chunk_size)]
+
+        def close():
+            with lock:
+                if "cursor" in state:
+                    state["cursor"].close()
+                if "conn" in state:
+                    self.stream_pool.release(state["conn"])
+
+        try:
+            await self._submit(self._stream_executor, open_cursor)
+            while True:
+                rows = await self._submit(self._stream_executor, fetch)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            # 客户端断开时这里可能在读取线程仍在执行时被调用，清理交给线程池在读取结束后完成
+            self._stream_executor.submit(close)
+
+
+# 全局连接池与数据访问层
+write_pool = ConnectionPool(DATABASE_PATH, WRITE_POOL_SIZE, readonly=False)
+read_pool = ConnectionPool(DATABASE_PATH, READ_POOL_SIZE, readonly=True)
+stream_pool = ConnectionPool(DATABASE_PATH, STREAM_POOL_SIZE, readonly=True, name="stream")
+database = Database(read_pool, write_pool, stream_pool)
+
+
+# FastAPI依赖项
+def get_db():
+    """数据访问层"""
+    return database
+
+
+def run_migrations():
+    """执行尚未执行的数据库迁移，返回本次执行的 [(版本号, 名称), ...]"""
+    with write_pool.connection() as conn:
+        return migrate(conn)
+
+
+def warm_up():
+    """预热连接池：先由写连接开启WAL模式，再创建一个只读连接"""
+    with write_pool.connection():
+        pass
+    with read_pool.connection():
+        pass
+
+
+def pool_metrics():
+    """所有连接池的指标"""
+    return [read_pool.metrics(), write_pool.metrics(), stream_pool.metrics()]
+
+
+def close_pools():
+    """关闭所有连接池的空闲连接"""
+    read_pool.close()
+    write_pool.close()
+    stream_pool.close()
@@ -0,0 +1,93 @@
+"""
+业财融合管理系统 - 业务事件关联信息
+
+在一条SQL中为一批业务事件补充关联信息，避免逐个事件查询：
+- approval_id:    最高审批级别的审批记录（窗口函数 ROW_NUMBER 取每个事件的第一行）
+- finance_id:     关联的第一条财务记录
+- latest_status:  状态历史中的最新状态
+- status_history: 完整状态历史（json_group_array 聚合，仅详情）
+关联子查询都限定在本批事件的id范围内，由各表的 business_event_id 索引支持。
+"""
+
+import json
+
+# 列表：包装 fetch_page 的本页结果（CTE "page"），补充 approval_id / finance_id / latest_status
+EVENT_LIST_RELATIONS_SQL = """
+    SELECT page.*, la.approval_id, ff.finance_id, ls.latest_status
+    FROM page
+    LEFT JOIN (
+        SELECT business_event_id, id AS approval_id,
+               ROW_NUMBER() OVER (PARTITION BY business_event_id ORDER BY approval_level DESC, id DESC) AS rn
+        FROM approvals
+        WHERE business_event_id IN (SELECT id FROM page)
+    ) la ON la.business_event_id = page.id AND la.rn = 1
+    LEFT JOIN (
+        SELECT business_event_id, MIN(id) AS finance_id
+        FROM financial_records
+        WHERE business_event_id IN (SELECT id FROM page)
+        GROUP BY business_event_id
+    ) ff ON ff.business_event_id = page.id
+    LEFT JOIN (
+        SELECT business_event_id, status AS latest_status,
+               ROW_NUMBER() OVER (PARTITION BY business_event_id ORDER BY timestamp DESC, id DESC) AS rn
+        FROM status_history
+        WHERE business_event_id IN (SELECT id FROM page)
+    ) ls ON ls.business_event_id = page.id AND ls.rn = 1
+    ORDER BY page.created_at DESC, page.id DESC
+"""
+
+# 详情：按id批量查询业务事件及全部关联信息
+EVENT_DETAILS_SQL = """
+    WITH ids(id) AS (SELECT value FROM json_each(?)),
+    latest_approval AS (
+        SELECT business_event_id, approval_id FROM (
+            SELECT business_event_id, id AS approval_id,
+                   ROW_NUMBER() OVER (PARTITION BY business_event_id ORDER BY approval_level DESC, id DESC) AS rn
+            FROM approvals
+            WHERE business_event_id IN (SELECT id FROM ids)
+        ) WHERE rn = 1
+    ),
+    first_finance AS (
+        SELECT business_event_id, MIN(id) AS finance_id
+        FROM financial_records
+        WHERE business_event_id IN (SELECT id FROM ids)
+        GROUP BY business_event_id
+    ),
+    history AS (
+        SELECT business_event_id,
+               json_group_array(json_object(
+                   'timestamp', timestamp, 'status', status, 'operator', operator, 'remarks', remarks
+               )) AS status_history
+        FROM (
+            SELECT * FROM status_history
+            WHERE business_event_id IN (SELECT id FROM ids)
+            ORDER BY business_event_id, timestamp, id
+        )
+        GROUP BY business_event_id
+    )
+    SELECT be.*, la.approval_id, ff.finance_id, h.status_history
+    FROM business_events be
+    LEFT JOIN latest_approval la ON la.business_event_id = be.id
+    LEFT JOIN first_finance ff ON ff.business_event_id = be.id
+    LEFT JOIN history h ON h.business_event_id = be.id
+    WHERE be.id IN (SELECT id FROM ids)
+"""
+
+
+def fetch_event_details(conn, event_ids):
+    """批量查询业务事件详情，返回 {事件ID: 详情}"""
+    details = {}
+    for row in conn.execute(EVENT_DETAILS_SQL, (json.dumps(list(event_ids)),)):
+        event = dict(row)
+        if event["status_history"]:
+            event["status_history"] = json.loads(event["status_history"])
+        else:
+            # 没有历史记录时，以创建作为第一条记录
+            event["status_history"] = [{
+                "timestamp": event["created_at"],
+                "status": "新建",
+                "operator": "系统",
+                "remarks": "业务事件创建"
+            }]
+        details[event["id"]] = event
+    return details
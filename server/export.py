@@ -0,0 +1,124 @@
+"""
+业财融合管理系统 - 列表导出
+
+按列表接口相同的筛选条件导出 CSV / Excel，内存占用与导出行数无关：
+- CSV: 直接从数据库游标逐批编码并流式发送（UTF-8 带 BOM，Excel 可直接打开）
+- XLSX: openpyxl 只写模式（write_only）逐行写入临时文件，生成后以文件响应发送并删除
+响应头 X-Total-Count 给出导出行数，客户端据此显示进度。
+"""
+
+import csv
+import io
+import os
+import tempfile
+from datetime import datetime
+
+from fastapi import HTTPException
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.background import BackgroundTask
+
+try:
+    from openpyxl import Workbook
+except ImportError:  # pragma: no cover - 可选依赖
+    Workbook = None
+
+# 导出格式与内容类型
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+# 导出列：(结果列名, 表头)
+BUSINESS_EVENT_COLUMNS = [
+    ("id", "ID"),
+    ("project_code", "项目编号"),
+    ("event_type", "事件类型"),
+    ("project_name", "项目名称"),
+    ("amount", "金额"),
+    ("event_date", "事件日期"),
+    ("department_id", "部门ID"),
+    ("customer_id", "客户ID"),
+    ("status", "状态"),
+    ("description", "描述"),
+    ("created_by", "创建人ID"),
+    ("created_at", "创建时间"),
+]
+
+FINANCIAL_RECORD_COLUMNS = [
+    ("id", "ID"),
+    ("business_event_id", "业务事件ID"),
+    ("project_name", "业务项目"),
+    ("event_type", "事件类型"),
+    ("account_code", "科目编码"),
+    ("account_name", "科目名称"),
+    ("amount", "金额"),
+    ("direction", "方向"),
+    ("record_date", "记账日期"),
+    ("fiscal_year", "财年"),
+    ("fiscal_period", "会计期间"),
+    ("description", "描述"),
+    ("created_by", "创建人ID"),
+    ("created_at", "创建时间"),
+]
+
+
+def export_filename(name, output_format):
+    return f"{name}_{datetime.now().strftime('%Y%m%d%H%M%S')}.{output_format}"
+
+
+async def _encode_csv(chunks, columns):
+    keys = [key for key, _ in columns]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([title for _, title in columns])
+    yield ("\ufeff" + buffer.getvalue()).encode("utf-8")
+    async for rows in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([row[key] for key in keys] for row in rows)
+        yield buffer.getvalue().encode("utf-8")
+
+
+def write_xlsx(conn, sql, params, columns, path, sheet_title):
+    """只写模式生成工作簿：行直接写入临时文件，不在内存中保留"""
+    keys = [key for key, _ in columns]
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(sheet_title)
+    sheet.append([title for _, title in columns])
+    for row in conn.execute(sql, params):
+        sheet.append([row[key] for key in keys])
+    workbook.save(path)
+
+
+async def export_response(db, sql, params, total, columns, name, sheet_title, output_format):
+    """生成导出响应
+
+    sql/params: list_query() 生成的不分页查询；total: 导出行数
+    """
+    filename = export_filename(name, output_format)
+    headers = {"X-Total-Count": str(total)}
+
+    if output_format == "csv":
+        headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return StreamingResponse(
+            _encode_csv(db.stream(sql, params), columns),
+            media_type=EXPORT_FORMATS["csv"],
+            headers=headers,
+        )
+
+    if Workbook is None:
+        raise HTTPException(status_code=501, detail="服务器未安装 openpyxl，无法导出Excel")
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        await db.read_long(write_xlsx, sql, params, columns, path, sheet_title)
+    except BaseException:
+        os.remove(path)
+        raise
+    return FileResponse(
+        path,
+        media_type=EXPORT_FORMATS["xlsx"],
+        filename=filename,
+        headers=headers,
+        background=BackgroundTask(os.remove, path),
+    )
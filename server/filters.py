@@ -0,0 +1,161 @@
+"""
+业财融合管理系统 - 列表筛选条件
+
+各列表接口的查询参数定义为FastAPI依赖项，并转换为 QueryFilters。
+日期区间为闭区间；金额区间为闭区间；keyword 对项目名称做模糊匹配。
+"""
+
+from datetime import date
+from typing import Optional
+
+from pagination import QueryFilters
+
+
+class BusinessEventFilters:
+    """业务事件筛选条件"""
+
+    def __init__(
+        self,
+        status: Optional[str] = None,
+        event_type: Optional[str] = None,
+        department_id: Optional[int] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        amount_min: Optional[float] = None,
+        amount_max: Optional[float] = None,
+        keyword: Optional[str] = None,
+    ):
+        self.status = status
+        self.event_type = event_type
+        self.department_id = department_id
+        self.date_from = date_from
+        self.date_to = date_to
+        self.amount_min = amount_min
+        self.amount_max = amount_max
+        self.keyword = keyword
+
+    def build(self):
+        filters = QueryFilters()
+        filters.add_if(self.status, "be.status = ?")
+        filters.add_if(self.event_type, "be.event_type = ?")
+        filters.add_if(self.department_id, "be.department_id = ?")
+        filters.add_if(self.date_from and self.date_from.isoformat(), "be.event_date >= ?")
+        filters.add_if(self.date_to and self.date_to.isoformat(), "be.event_date <= ?")
+        filters.add_if(self.amount_min, "be.amount >= ?")
+        filters.add_if(self.amount_max, "be.amount <= ?")
+        if self.keyword:
+            filters.add("(be.project_name LIKE ? OR be.project_code LIKE ?)",
+                        f"%{self.keyword}%", f"%{self.keyword}%")
+        return filters
+
+
+class FinancialRecordFilters:
+    """财务记录筛选条件（事件类型、部门、状态取自关联的业务事件）"""
+
+    def __init__(
+        self,
+        status: Optional[str] = None,
+        event_type: Optional[str] = None,
+        department_id: Optional[int] = None,
+        direction: Optional[str] = None,
+        account_code: Optional[str] = None,
+        fiscal_year: Optional[int] = None,
+        fiscal_period: Optional[int] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        amount_min: Optional[float] = None,
+        amount_max: Optional[float] = None,
+        keyword: Optional[str] = None,
+    ):
+        self.status = status
+        self.event_type = event_type
+        self.department_id = department_id
+        self.direction = direction
+        self.account_code = account_code
+        self.fiscal_year = fiscal_year
+        self.fiscal_period = fiscal_period
+        self.date_from = date_from
+        self.date_to = date_to
+        self.amount_min = amount_min
+        self.amount_max = amount_max
+        self.keyword = keyword
+
+    def build(self):
+        filters = QueryFilters()
+        filters.add_if(self.status, "be.status = ?")
+        filters.add_if(self.event_type, "be.event_type = ?")
+        filters.add_if(self.department_id, "be.department_id = ?")
+        filters.add_if(self.direction, "fr.direction = ?")
+        filters.add_if(self.account_code, "fr.account_code = ?")
+        filters.add_if(self.fiscal_year, "fr.fiscal_year = ?")
+        filters.add_if(self.fiscal_period, "fr.fiscal_period = ?")
+        filters.add_if(self.date_from and self.date_from.isoformat(), "fr.record_date >= ?")
+        filters.add_if(self.date_to and self.date_to.isoformat(), "fr.record_date <= ?")
+        filters.add_if(self.amount_min, "fr.amount >= ?")
+        filters.add_if(self.amount_max, "fr.amount <= ?")
+        if self.keyword:
+            filters.add("(be.project_name LIKE ? OR fr.account_name LIKE ?)",
+                        f"%{self.keyword}%", f"%{self.keyword}%")
+        return filters
+
+
+class ApprovalFilters:
+    """审批记录筛选条件（日期区间按审批创建时间）"""
+
+    def __init__(
+        self,
+        status: Optional[str] = None,
+        event_type: Optional[str] = None,
+        department_id: Optional[int] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        amount_min: Optional[float] = None,
+        amount_max: Optional[float] = None,
+        keyword: Optional[str] = None,
+    ):
+        self.status = status
+        self.event_type = event_type
+        self.department_id = department_id
+        self.date_from = date_from
+        self.date_to = date_to
+        self.amount_min = amount_min
+        self.amount_max = amount_max
+        self.keyword = keyword
+
+    def build(self):
+        filters = QueryFilters()
+        filters.add_if(self.status, "a.status = ?")
+        filters.add_if(self.event_type, "be.event_type = ?")
+        filters.add_if(self.department_id, "be.department_id = ?")
+        filters.add_if(self.date_from and self.date_from.isoformat(), "a.created_at >= ?")
+        # created_at 带时分秒，截止日期取次日零点之前
+        filters.add_if(self.date_to and self.date_to.isoformat(), "a.created_at < date(?, '+1 day')")
+        filters.add_if(self.amount_min, "be.amount >= ?")
+        filters.add_if(self.amount_max, "be.amount <= ?")
+        if self.keyword:
+            filters.add("be.project_name LIKE ?", f"%{self.keyword}%")
+        return filters
+
+
+class BudgetFilters:
+    """预算筛选条件"""
+
+    def __init__(
+        self,
+        year: Optional[int] = None,
+        month: Optional[int] = None,
+        department_id: Optional[int] = None,
+        account_subject_id: Optional[int] = None,
+    ):
+        self.year = year
+        self.month = month
+        self.department_id = department_id
+        self.account_subject_id = account_subject_id
+
+    def build(self):
+        filters = QueryFilters()
+        filters.add_if(self.year, "b.year = ?")
+        filters.add_if(self.month, "b.month = ?")
+        filters.add_if(self.department_id, "b.department_id = ?")
+        filters.add_if(self.account_subject_id, "b.account_subject_id = ?")
+        return filters
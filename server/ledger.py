@@ -0,0 +1,135 @@
+"""
+业财融合管理系统 - 科目余额与试算平衡
+
+科目余额检查点 ledger_checkpoints 按 (科目编码, 财年, 会计期间) 保存借方/贷方发生额，
+由 posting.post_records 在入账事务中维护。任一期间的试算平衡：
+- 期初余额: 该期间之前全部检查点之和
+- 本期发生额: 该期间的检查点；指定截止日期时改为该期间内截止日期前的财务记录（最多一个期间的明细）
+- 期末余额: 期初余额 + 本期发生额
+未做期末结转，损益类科目的余额为累计数。上级科目的金额包含全部下级科目。
+"""
+
+# 资产类科目编码前缀：收入记借方、支出记贷方；其他科目收入记贷方、支出记借方
+ASSET_CODE_PREFIX = "1"
+
+# 借贷差额小于该值视为平衡
+BALANCE_TOLERANCE = 0.005
+
+# 指定科目编码时只包含该科目及其下级科目
+ACCOUNT_CONDITION = "substr(account_code, 1, length(?)) = ?"
+
+
+def is_debit(account_code, direction):
+    """财务记录是否记借方"""
+    return account_code.startswith(ASSET_CODE_PREFIX) == (direction == "收入")
+
+
+def _account_filter(account_code):
+    if not account_code:
+        return "", ()
+    return " AND " + ACCOUNT_CONDITION, (account_code, account_code)
+
+
+def _opening_totals(conn, fiscal_year, fiscal_period, account_code):
+    condition, params = _account_filter(account_code)
+    return conn.execute(f"""
+        SELECT account_code, SUM(debit_amount), SUM(credit_amount)
+        FROM ledger_checkpoints
+        WHERE (fiscal_year < ? OR (fiscal_year = ? AND fiscal_period < ?)){condition}
+        GROUP BY account_code
+    """, (fiscal_year, fiscal_year, fiscal_period) + params).fetchall()
+
+
+def _period_totals(conn, fiscal_year, fiscal_period, as_of, account_code):
+    condition, params = _account_filter(account_code)
+    if as_of is None:
+        return conn.execute(f"""
+            SELECT account_code, debit_amount, credit_amount, record_count
+            FROM ledger_checkpoints
+            WHERE fiscal_year = ? AND fiscal_period = ?{condition}
+        """, (fiscal_year, fiscal_period) + params).fetchall()
+    # 截止日期所在期间只汇总该期间的明细（按 (财年, 期间) 索引查找）
+    return conn.execute(f"""
+        SELECT account_code,
+               SUM(CASE WHEN (account_code LIKE '{ASSET_CODE_PREFIX}%') = (direction = '收入') THEN amount ELSE 0 END),
+               SUM(CASE WHEN (account_code LIKE '{ASSET_CODE_PREFIX}%') = (direction = '收入') THEN 0 ELSE amount END),
+               COUNT(*)
+        FROM financial_records
+        WHERE fiscal_year = ? AND fiscal_period = ? AND record_date <= ?{condition}
+        GROUP BY account_code
+    """, (fiscal_year, fiscal_period, as_of) + params).fetchall()
+
+
+def trial_balance(conn, fiscal_year, fiscal_period, as_of=None, account_code=None):
+    """试算平衡表
+
+    as_of: 可选截止日期（YYYY-MM-DD），本期发生额只包含该日期（含）之前的记录
+    account_code: 可选，只包含该科目及其下级科目
+    """
+    # 各科目自身的 [期初借方, 期初贷方, 本期借方, 本期贷方, 记录数]
+    own = {}
+    for code, debit, credit in _opening_totals(conn, fiscal_year, fiscal_period, account_code):
+        own.setdefault(code, [0.0, 0.0, 0.0, 0.0, 0])[0:2] = [debit, credit]
+    for code, debit, credit, count in _period_totals(conn, fiscal_year, fiscal_period, as_of, account_code):
+        own.setdefault(code, [0.0, 0.0, 0.0, 0.0, 0])[2:5] = [debit, credit, count]
+
+    subjects = {
+        row[0]: (row[1], row[2], row[3])
+        for row in conn.execute("SELECT code, name, direction, parent_code FROM account_subjects")
+    }
+
+    # 上级科目汇总全部下级科目
+    aggregated = {}
+    for code, amounts in own.items():
+        current = code
+        while current is not None:
+            if account_code and not current.startswith(account_code):
+                break
+            totals = aggregated.setdefault(current, [0.0, 0.0, 0.0, 0.0, 0])
+            for i, value in enumerate(amounts):
+                totals[i] += value
+            current = subjects[current][2] if current in subjects else None
+
+    accounts = []
+    for code in sorted(aggregated):
+        opening_debit, opening_credit, period_debit, period_credit, count = aggregated[code]
+        name, direction, parent_code = subjects.get(code, (None, "借", None))
+        # 余额按科目余额方向表示，正数表示在余额方向一侧
+        sign = 1 if direction == "借" else -1
+        opening = sign * (opening_debit - opening_credit)
+        accounts.append({
+            "account_code": code,
+            "account_name": name,
+            "parent_code": parent_code,
+            "direction": direction,
+            "opening_balance": round(opening, 2),
+            "period_debit": round(period_debit, 2),
+            "period_credit": round(period_credit, 2),
+            "closing_balance": round(opening + sign * (period_debit - period_credit), 2),
+            "record_count": count,
+        })
+
+    # 合计只统计各科目自身的金额，避免上下级重复
+    totals = {
+        "opening_debit": 0.0, "opening_credit": 0.0,
+        "period_debit": 0.0, "period_credit": 0.0,
+        "closing_debit": 0.0, "closing_credit": 0.0,
+    }
+    for opening_debit, opening_credit, period_debit, period_credit, _ in own.values():
+        opening_net = opening_debit - opening_credit
+        closing_net = opening_net + period_debit - period_credit
+        totals["opening_debit" if opening_net >= 0 else "opening_credit"] += abs(opening_net)
+        totals["closing_debit" if closing_net >= 0 else "closing_credit"] += abs(closing_net)
+        totals["period_debit"] += period_debit
+        totals["period_credit"] += period_credit
+    totals = {key: round(value, 2) for key, value in totals.items()}
+
+    return {
+        "fiscal_year": fiscal_year,
+        "fiscal_period": fiscal_period,
+        "as_of": as_of,
+        "accounts": accounts,
+        "totals": totals,
+        "balanced": (abs(totals["period_debit"] - totals["period_credit"]) < BALANCE_TOLERANCE
+                     and abs(totals["closing_debit"] - totals["closing_credit"]) < BALANCE_TOLERANCE),
+    }
@@ -0,0 +1,177 @@
+"""
+业财融合管理系统 - 请求指标
+
+MetricsMiddleware 按路由模板（例如 /approvals/{approval_id}/approve，而不是实际路径）记录：
+- 请求数（按状态码）与处理中的请求数
+- 请求耗时直方图（到响应体发送完毕为止，包含压缩与流式输出）
+- 每个请求的数据库耗时直方图：Database 的每次调用（含等待数据库线程与连接的时间）
+  累加到当前请求的计数器中，计数器通过 contextvars 传递
+GET /metrics 以 Prometheus 文本格式输出上述指标与连接池指标。
+
+指标只在事件循环线程中更新，不需要加锁；每个请求只有几次字典查找、一次二分查找和加法。
+"""
+
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+# 直方图桶上限（秒）
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 未匹配任何路由的请求（404等）使用的路由标签，避免按实际路径产生无限多的标签
+UNMATCHED_ROUTE = "<unmatched>"
+
+# Prometheus 文本格式的内容类型
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 当前请求的数据库耗时累加器（单元素列表），请求之外为None
+_request_db_time = ContextVar("request_db_time", default=None)
+
+
+def record_db_time(seconds):
+    """把一次数据库调用的耗时计入当前请求"""
+    accumulator = _request_db_time.get()
+    if accumulator is not None:
+        accumulator[0] += seconds
+
+
+class Histogram:
+    """固定桶直方图（各桶分别计数，输出时再累加）"""
+
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class RouteStats:
+    """单个 (方法, 路由模板) 的指标"""
+
+    __slots__ = ("statuses", "duration", "db_time")
+
+    def __init__(self):
+        self.statuses = {}
+        self.duration = Histogram()
+        self.db_time = Histogram()
+
+
+class RequestMetrics:
+    """所有路由的请求指标"""
+
+    def __init__(self):
+        self.routes = {}
+        self.in_flight = 0
+
+    def observe(self, method, route, status, duration, db_time):
+        stats = self.routes.get((method, route))
+        if stats is None:
+            stats = self.routes[(method, route)] = RouteStats()
+        stats.statuses[status] = stats.statuses.get(status, 0) + 1
+        stats.duration.observe(duration)
+        stats.db_time.observe(db_time)
+
+    def render(self, pools=()):
+        """Prometheus 文本格式"""
+        lines = [
+            "# HELP http_requests_total 请求数",
+            "# TYPE http_requests_total counter",
+        ]
+        routes = sorted(self.routes.items())
+        for (method, route), stats in routes:
+            for status, count in sorted(stats.statuses.items()):
+                lines.append(f'http_requests_total{{method="{method}",route="{_escape(route)}",status="{status}"}} {count}')
+
+        lines += [
+            "# HELP http_requests_in_flight 处理中的请求数",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+        ]
+
+        for name, attribute, help_text in (
+            ("http_request_duration_seconds", "duration", "请求耗时（秒）"),
+            ("http_request_db_seconds", "db_time", "每个请求的数据库耗时（秒）"),
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+            for (method, route), stats in routes:
+                histogram = getattr(stats, attribute)
+                labels = f'method="{method}",route="{_escape(route)}"'
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f"{name}_sum{{{labels}}} {histogram.sum:.6f}")
+                lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+        if pools:
+            lines += [
+                "# HELP db_pool_connections 连接池连接数",
+                "# TYPE db_pool_connections gauge",
+            ]
+            for pool in pools:
+                lines.append(f'db_pool_connections{{pool="{pool["pool"]}",state="in_use"}} {pool["in_use"]}')
+                lines.append(f'db_pool_connections{{pool="{pool["pool"]}",state="idle"}} {pool["idle"]}')
+            for name, key, scale, help_text in (
+                ("db_pool_checkouts_total", "checkouts", 1, "连接借出次数"),
+                ("db_pool_timeouts_total", "timeouts", 1, "获取连接超时次数"),
+                ("db_pool_wait_seconds_total", "wait_time_total_ms", 0.001, "等待连接的总时间（秒）"),
+            ):
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+                for pool in pools:
+                    lines.append(f'{name}{{pool="{pool["pool"]}"}} {pool[key] * scale:g}')
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+request_metrics = RequestMetrics()
+
+
+class MetricsMiddleware:
+    """记录请求指标的ASGI中间件（应作为最外层中间件添加）"""
+
+    def __init__(self, app, metrics=request_metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        db_time = [0.0]
+        token = _request_db_time.set(db_time)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self.metrics.in_flight += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.metrics.in_flight -= 1
+            _request_db_time.reset(token)
+            # 路由匹配后 FastAPI 会把路由对象写入 scope
+            route = scope.get("route")
+            self.metrics.observe(
+                scope["method"],
+                route.path if route is not None else UNMATCHED_ROUTE,
+                status,
+                time.perf_counter() - start,
+                db_time[0],
+            )
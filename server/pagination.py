@@ -0,0 +1,139 @@
+"""
+业财融合管理系统 - 列表分页
+
+列表接口使用键集（keyset）分页替代一次性返回全表：
+- 按 (created_at, id) 等排序键倒序，下一页条件为 (排序键) < (上一页最后一行的排序键)，
+  无论翻到第几页都只需沿索引扫描 limit 行，不需要 OFFSET
+- 游标是最后一行排序键的 base64 编码，对客户端不透明
+- 可选返回满足筛选条件的总行数（需要额外一次 COUNT 查询，默认不返回）
+"""
+
+import base64
+import binascii
+import json
+from typing import Optional
+
+from fastapi import HTTPException, Query
+
+# 默认每页行数与上限
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# 游标中排序键允许的类型（另可为 None）
+CURSOR_VALUE_TYPES = (str, int, float)
+
+
+def encode_cursor(values):
+    """把排序键编码为游标"""
+    raw = json.dumps(list(values), ensure_ascii=False, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token, size):
+    """解析游标，返回排序键列表；游标无效时返回400"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+    except (ValueError, binascii.Error, UnicodeError):
+        raise HTTPException(status_code=400, detail="无效的分页游标")
+    # 排序键只能是可绑定的标量，其他类型会在绑定参数时出错
+    if (not isinstance(values, list) or len(values) != size
+            or not all(value is None or isinstance(value, CURSOR_VALUE_TYPES) for value in values)):
+        raise HTTPException(status_code=400, detail="无效的分页游标")
+    return values
+
+
+class PageParams:
+    """分页参数（FastAPI依赖项）"""
+
+    def __init__(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        with_total: bool = False,
+    ):
+        self.cursor = cursor
+        self.limit = limit
+        self.with_total = with_total
+
+
+class QueryFilters:
+    """WHERE条件收集器，条件之间以 AND 连接，参数按顺序绑定"""
+
+    def __init__(self):
+        self.conditions = []
+        self.params = []
+
+    def add(self, condition, *params):
+        self.conditions.append(condition)
+        self.params.extend(params)
+        return self
+
+    def add_if(self, value, condition):
+        """值不为空时添加条件，条件中只有一个占位符"""
+        if value is not None and value != "":
+            self.add(condition, value)
+        return self
+
+    def where(self, extra=None):
+        conditions = self.conditions + ([extra] if extra else [])
+        if not conditions:
+            return ""
+        return " WHERE " + " AND ".join(conditions)
+
+
+def count_rows(conn, from_sql, filters):
+    """满足筛选条件的总行数"""
+    return conn.execute(f"SELECT COUNT(*) {from_sql}{filters.where()}", filters.params).fetchone()[0]
+
+
+def list_query(select_sql, from_sql, filters, order_by):
+    """不分页的列表查询（用于流式导出），排序与 fetch_page 一致，返回 (sql, params)"""
+    sql = "{} {}{} ORDER BY {}".format(
+        select_sql,
+        from_sql,
+        filters.where(),
+        ", ".join(f"{column} DESC" for column, _ in order_by),
+    )
+    return sql, list(filters.params)
+
+
+def fetch_page(conn, select_sql, from_sql, filters, order_by, page, wrap_sql=None):
+    """执行键集分页查询
+
+    select_sql: SELECT 子句，例如 "SELECT be.*"
+    from_sql:   FROM/JOIN 子句
+    order_by:   排序键列表 [(SQL表达式, 结果列名), ...]，全部倒序，最后一个必须唯一（通常是id）
+    wrap_sql:   可选，以本页结果作为CTE "page" 的外层查询，用于在同一条SQL中补充关联数据；
+                需保留排序键列并按相同顺序排序
+    返回 {"items": [...], "next_cursor": str或None, "total": int（仅 with_total 时）}
+    """
+    columns = [column for column, _ in order_by]
+    keys = [key for _, key in order_by]
+
+    keyset = None
+    params = list(filters.params)
+    if page.cursor:
+        params.extend(decode_cursor(page.cursor, len(order_by)))
+        keyset = "({}) < ({})".format(", ".join(columns), ", ".join("?" * len(columns)))
+
+    sql = "{} {}{} ORDER BY {} LIMIT ?".format(
+        select_sql,
+        from_sql,
+        filters.where(keyset),
+        ", ".join(f"{column} DESC" for column in columns),
+    )
+    params.append(page.limit + 1)
+    if wrap_sql:
+        sql = f"WITH page AS ({sql}) {wrap_sql}"
+    rows = [dict(row) for row in conn.execute(sql, params).fetchall()]
+
+    next_cursor = None
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+        next_cursor = encode_cursor([rows[-1][key] for key in keys])
+
+    result = {"items": rows, "next_cursor": next_cursor}
+    if page.with_total:
+        result["total"] = count_rows(conn, from_sql, filters)
+    return result
@@ -0,0 +1,98 @@
+"""
+业财融合管理系统 - 财务记录入账
+
+单条与批量创建财务记录共用的入账逻辑，在调用方的写事务中执行（未开启事务时以 BEGIN IMMEDIATE 开启）：
+- executemany 插入财务记录
+- 支出按 (部门, 财年, 会计期间) 汇总后更新预算已用金额，每个预算期间只执行一次UPDATE
+- 按 (部门, 会计科目, 财年, 会计期间) 汇总后累加到预算执行汇总表 budget_execution
+- 按 (会计科目, 财年, 会计期间) 汇总借贷发生额后累加到科目余额检查点 ledger_checkpoints
+"""
+
+from ledger import is_debit
+
+
+def post_records(conn, lines, created_by):
+    """入账财务记录
+
+    lines: [(FinancialRecord, 业务事件所属部门ID), ...]
+    返回新记录的id列表，顺序与 lines 一致
+    """
+    if not lines:
+        return []
+
+    # 先取得写锁再读取最大id：延迟事务在第一条写语句之前不持有锁，
+    # 并发的写连接可能读到相同的最大id，从而把对方插入的行当作自己的。
+    # 持有写锁时新插入行的id一定大于插入前的最大id，且按插入顺序递增
+    if not conn.in_transaction:
+        conn.execute("BEGIN IMMEDIATE")
+    max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM financial_records").fetchone()[0]
+    conn.executemany("""
+        INSERT INTO financial_records (business_event_id, account_code, account_name,
+        amount, direction, record_date, fiscal_year, fiscal_period, description, created_by)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, [(record.business_event_id, record.account_code, record.account_name,
+           record.amount, record.direction, record.record_date, record.fiscal_year,
+           record.fiscal_period, record.description, created_by)
+          for record, _ in lines])
+    record_ids = [row[0] for row in conn.execute(
+        "SELECT id FROM financial_records WHERE id > ? ORDER BY id", (max_id,))]
+    if len(record_ids) != len(lines):
+        raise RuntimeError(f"新财务记录数量不符: 插入 {len(lines)} 条，查询到 {len(record_ids)} 条")
+
+    # 更新预算使用情况：同一预算期间的支出先汇总
+    deltas = {}
+    for record, department_id in lines:
+        if record.direction == "支出":
+            key = (department_id, record.fiscal_year, record.fiscal_period)
+            deltas[key] = deltas.get(key, 0) + record.amount
+    if deltas:
+        conn.executemany("""
+            UPDATE budgets
+            SET used_amount = used_amount + ?
+            WHERE department_id = ? AND year = ? AND month = ?
+        """, [(amount, department_id, year, month)
+              for (department_id, year, month), amount in deltas.items()])
+
+    # 预算执行汇总：同一 (部门, 科目, 期间) 的发生额先汇总，再一次性累加
+    execution = {}
+    for record, department_id in lines:
+        key = (department_id, record.account_code, record.fiscal_year, record.fiscal_period)
+        expense, income, count = execution.get(key, (0, 0, 0))
+        if record.direction == "支出":
+            expense += record.amount
+        else:
+            income += record.amount
+        execution[key] = (expense, income, count + 1)
+    conn.executemany("""
+        INSERT INTO budget_execution (department_id, account_code, year, month,
+        expense_amount, income_amount, record_count)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (year, month, department_id, account_code) DO UPDATE SET
+            expense_amount = expense_amount + excluded.expense_amount,
+            income_amount = income_amount + excluded.income_amount,
+            record_count = record_count + excluded.record_count,
+            updated_at = CURRENT_TIMESTAMP
+    """, [key + totals for key, totals in execution.items()])
+
+    # 科目余额检查点
+    checkpoints = {}
+    for record, _ in lines:
+        key = (record.account_code, record.fiscal_year, record.fiscal_period)
+        debit, credit, count = checkpoints.get(key, (0, 0, 0))
+        if is_debit(record.account_code, record.direction):
+            debit += record.amount
+        else:
+            credit += record.amount
+        checkpoints[key] = (debit, credit, count + 1)
+    conn.executemany("""
+        INSERT INTO ledger_checkpoints (account_code, fiscal_year, fiscal_period,
+        debit_amount, credit_amount, record_count)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (fiscal_year, fiscal_period, account_code) DO UPDATE SET
+            debit_amount = debit_amount + excluded.debit_amount,
+            credit_amount = credit_amount + excluded.credit_amount,
+            record_count = record_count + excluded.record_count,
+            updated_at = CURRENT_TIMESTAMP
+    """, [key + totals for key, totals in checkpoints.items()])
+
+    return record_ids
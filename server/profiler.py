@@ -0,0 +1,325 @@
+"""
+业财融合管理系统 - SQL 性能分析
+
+通过环境变量 SQL_PROFILE=1 开启（默认关闭，关闭时连接不做任何包装）：
+- 连接池用 ProfilingConnection 创建连接，其游标记录每条语句的执行时间（execute 与逐批读取的时间之和）
+  与返回行数，按归一化SQL（字面量替换为 ?、空白合并、批量 VALUES 合并）汇总
+- 单次执行超过 SLOW_QUERY_MS 毫秒的语句写入慢查询日志（finance.slow_query 记录器）
+- 后台任务每 PROFILE_EXPLAIN_INTERVAL 秒对累计耗时最多的语句执行 EXPLAIN QUERY PLAN，
+  标记出对数据表做全表扫描的执行计划（不使用索引的 SCAN；计划中的表别名还原为表名，
+  按索引顺序的 SCAN ... USING [COVERING] INDEX 以及 CTE、子查询的扫描不计入）
+GET /system/sql_profile 返回汇总后的前N条语句。
+
+未使用 set_progress_handler：reports.py 用它实现报表超时，同一连接只能有一个进度回调；
+set_trace_callback 只在语句开始时回调，无法得到耗时与行数，因此在游标上计时。
+"""
+
+import asyncio
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from app_logging import get_logger
+
+SQL_PROFILE = os.environ.get("SQL_PROFILE", "") in ("1", "true", "yes")
+
+# 慢查询阈值（毫秒）
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", "100"))
+
+# 执行计划检查的间隔（秒）与检查的语句数量
+PROFILE_EXPLAIN_INTERVAL = float(os.environ.get("PROFILE_EXPLAIN_INTERVAL", "60"))
+PROFILE_EXPLAIN_TOP = 20
+
+# 最多汇总的不同语句数量，超过后新语句计入 OTHER_STATEMENT
+PROFILE_MAX_STATEMENTS = 1000
+OTHER_STATEMENT = "<other>"
+
+# 归一化结果缓存的条数（同一SQL字符串只归一化一次）
+NORMALIZE_CACHE_SIZE = 4096
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])")
+_WHITESPACE = re.compile(r"\s+")
+# 批量插入的多组 VALUES 与 IN 列表合并为一组
+_REPEATED_GROUPS = re.compile(r"(\([?,\s]*\))(?:\s*,\s*\([?,\s]*\))+")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)+\s*\)", re.IGNORECASE)
+# 执行计划中的扫描：新版本为 "SCAN be"（表名或别名），旧版本为 "SCAN TABLE business_events AS be"
+_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)")
+_SCAN_USING_INDEX = re.compile(r"\bUSING (?:COVERING )?INDEX\b")
+# FROM/JOIN 子句中的 "表名 [AS] 别名"
+_TABLE_ALIAS = re.compile(r"\b(?:FROM|JOIN)\s+(\w+)\s+(?:AS\s+)?(\w+)", re.IGNORECASE)
+
+logger = get_logger("slow_query")
+
+_normalized = {}
+
+
+def normalize_sql(sql):
+    """归一化SQL：字面量替换为 ?，合并空白与重复的参数组"""
+    result = _normalized.get(sql)
+    if result is None:
+        result = _STRING_LITERAL.sub("?", sql)
+        result = _NUMBER_LITERAL.sub("?", result)
+        result = _WHITESPACE.sub(" ", result).strip()
+        result = _REPEATED_GROUPS.sub(r"\1, ...", result)
+        result = _IN_LIST.sub("IN (?, ...)", result)
+        if len(_normalized) >= NORMALIZE_CACHE_SIZE:
+            _normalized.clear()
+        _normalized[sql] = result
+    return result
+
+
+def find_full_scans(plan, sql, tables):
+    """执行计划中做全表扫描的数据表（按出现顺序）
+
+    plan: EXPLAIN QUERY PLAN 的 detail 列表；sql: 对应语句，用于把别名还原为表名；tables: 数据表名集合
+    """
+    aliases = {alias: table for table, alias in _TABLE_ALIAS.findall(sql)}
+    full_scans = []
+    for detail in plan:
+        match = _SCAN.match(detail)
+        if match is None or _SCAN_USING_INDEX.search(detail):
+            continue
+        name = match.group(1)
+        table = name if name in tables else aliases.get(name)
+        if table in tables:
+            full_scans.append(table)
+    return full_scans
+
+
+class StatementStats:
+    """一条归一化语句的汇总"""
+
+    __slots__ = ("sql", "calls", "total_time", "max_time", "rows", "slow_calls",
+                 "sample_sql", "sample_params", "plan", "full_scans")
+
+    def __init__(self, sql, sample_sql, sample_params):
+        self.sql = sql
+        self.calls = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.rows = 0
+        self.slow_calls = 0
+        # 用于 EXPLAIN QUERY PLAN 的原始SQL与参数
+        self.sample_sql = sample_sql
+        self.sample_params = sample_params
+        self.plan = None
+        self.full_scans = []
+
+    def to_dict(self):
+        return {
+            "sql": self.sql,
+            "calls": self.calls,
+            "total_ms": round(self.total_time * 1000, 3),
+            "avg_ms": round(self.total_time * 1000 / self.calls, 3) if self.calls else 0.0,
+            "max_ms": round(self.max_time * 1000, 3),
+            "rows": self.rows,
+            "avg_rows": round(self.rows / self.calls, 1) if self.calls else 0.0,
+            "slow_calls": self.slow_calls,
+            "plan": self.plan,
+            "full_scans": self.full_scans,
+        }
+
+
+class SQLProfiler:
+    """按归一化SQL汇总的语句统计（各数据库线程共享，加锁更新）"""
+
+    def __init__(self, slow_query_ms=SLOW_QUERY_MS, max_statements=PROFILE_MAX_STATEMENTS):
+        self.slow_query_time = slow_query_ms / 1000
+        self.max_statements = max_statements
+        self.statements = {}
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._task = None
+
+    def record(self, sql, params, elapsed, rows):
+        """记录一次语句执行"""
+        normalized = normalize_sql(sql)
+        if normalized.startswith("EXPLAIN"):
+            return
+        slow = elapsed >= self.slow_query_time
+        with self._lock:
+            stats = self.statements.get(normalized)
+            if stats is None:
+                if len(self.statements) >= self.max_statements:
+                    normalized = OTHER_STATEMENT
+                    stats = self.statements.get(normalized)
+                if stats is None:
+                    stats = self.statements[normalized] = StatementStats(normalized, sql, params)
+            stats.calls += 1
+            stats.total_time += elapsed
+            stats.rows += rows
+            if elapsed > stats.max_time:
+                stats.max_time = elapsed
+            if slow:
+                stats.slow_calls += 1
+        if slow:
+            logger.warning("慢查询 %.1f ms: %s", elapsed * 1000, normalized,
+                           extra={"elapsed_ms": round(elapsed * 1000, 3), "rows": rows})
+
+    def top(self, limit=20, order_by="total_time"):
+        """按累计耗时（或 calls / max_time / rows）排序的前 limit 条语句"""
+        with self._lock:
+            statements = sorted(self.statements.values(), key=lambda s: getattr(s, order_by), reverse=True)
+            return [stats.to_dict() for stats in statements[:limit]]
+
+    def reset(self):
+        with self._lock:
+            self.statements.clear()
+            self.started_at = time.time()
+
+    def explain_top(self, conn, limit=PROFILE_EXPLAIN_TOP):
+        """对累计耗时最多的语句执行 EXPLAIN QUERY PLAN，标记全表扫描"""
+        with self._lock:
+            candidates = sorted(
+                (s for s in self.statements.values() if s.sql != OTHER_STATEMENT and s.plan is None),
+                key=lambda s: s.total_time, reverse=True,
+            )[:limit]
+        if not candidates:
+            return
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        for stats in candidates:
+            try:
+                plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + stats.sample_sql, stats.sample_params)]
+            except sqlite3.Error as e:
+                # 例如 executemany 的语句或只读连接无法编译的语句
+                plan = [f"无法获取执行计划: {e}"]
+            full_scans = find_full_scans(plan, stats.sample_sql, tables)
+            with self._lock:
+                stats.plan = plan
+                stats.full_scans = full_scans
+
+    async def _run(self, db):
+        while True:
+            await asyncio.sleep(PROFILE_EXPLAIN_INTERVAL)
+            try:
+                await db.read(self.explain_top)
+            except Exception as e:
+                logger.warning("获取执行计划失败: %s", e)
+
+    def start(self, db):
+        """启动定期检查执行计划的后台任务"""
+        self._task = asyncio.create_task(self._run(db))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def summary(self, limit=20, order_by="total_time"):
+        with self._lock:
+            total_time = sum(s.total_time for s in self.statements.values())
+            total_calls = sum(s.calls for s in self.statements.values())
+            statement_count = len(self.statements)
+        return {
+            "enabled": True,
+            "slow_query_ms": self.slow_query_time * 1000,
+            "since": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.started_at)),
+            "statement_count": statement_count,
+            "total_calls": total_calls,
+            "total_ms": round(total_time * 1000, 3),
+            "statements": self.top(limit, order_by),
+        }
+
+
+profiler = SQLProfiler()
+
+
+class ProfilingCursor(sqlite3.Cursor):
+    """记录语句耗时与返回行数的游标
+
+    一条语句的耗时为 execute 与之后各次读取的时间之和，在结果读完、游标关闭或执行下一条语句时记录
+    """
+
+    _statement = None
+
+    def _finish(self):
+        statement = self._statement
+        if statement is not None:
+            self._statement = None
+            profiler.record(*statement)
+
+    def execute(self, sql, parameters=()):
+        self._finish()
+        start = time.perf_counter()
+        try:
+            super().execute(sql, parameters)
+        finally:
+            self._statement = [sql, parameters, time.perf_counter() - start, 0]
+        if self.description is None:
+            # 非查询语句：行数为受影响的行数
+            self._statement[3] = max(self.rowcount, 0)
+            self._finish()
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._finish()
+        start = time.perf_counter()
+        try:
+            super().executemany(sql, seq_of_parameters)
+        finally:
+            profiler.record(sql, (), time.perf_counter() - start, max(self.rowcount, 0))
+        return self
+
+    def _fetched(self, start, rows, done):
+        statement = self._statement
+        if statement is not None:
+            statement[2] += time.perf_counter() - start
+            statement[3] += rows
+            if done:
+                self._finish()
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(start, row is not None, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        size = self.arraysize if size is None else size
+        rows = super().fetchmany(size)
+        self._fetched(start, len(rows), len(rows) < size)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(start, len(rows), True)
+        return rows
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(start, 0, True)
+            raise
+        self._fetched(start, 1, False)
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        self._finish()
+
+
+class ProfilingConnection(sqlite3.Connection):
+    """创建 ProfilingCursor 的连接（Connection.execute 不经过 cursor()，因此一并覆盖）"""
+
+    def cursor(self, factory=ProfilingCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
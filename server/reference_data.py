@@ -0,0 +1,88 @@
+"""
+业财融合管理系统 - 参考数据条件请求
+
+部门、会计科目、客户等参考数据变化很少，但每次打开对话框都会被重新下载。
+每个表的版本号由触发器维护（见 table_versions），据此生成 ETag 与 Last-Modified：
+- 请求带 If-None-Match / If-Modified-Since 且数据未变化时返回 304，只读取一行版本号
+- 否则返回按版本号缓存的已序列化响应，同一版本只查询和序列化一次
+
+ETag 总是返回且优先于 If-Modified-Since。Last-Modified 只精确到秒，同一秒内的后续写入不会改变它，
+因此更新时间还在当前这一秒内时不返回 Last-Modified（RFC 7232 2.2.2 的弱验证器），
+客户端拿到的 Last-Modified 一定已包含该秒内的全部写入，据此返回 304 不会得到旧数据。
+"""
+
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Response
+
+from responses import dumps
+
+
+def read_version(conn, table_name):
+    """读取单个表的 (版本号, 更新时间)"""
+    row = conn.execute(
+        "SELECT version, updated_at FROM table_versions WHERE table_name = ?", (table_name,)
+    ).fetchone()
+    return (row["version"], row["updated_at"]) if row else (0, None)
+
+
+def settled(timestamp):
+    """数据库时间（UTC，精确到秒）是否早于当前这一秒，即该秒内不会再有写入"""
+    return timestamp < datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def http_date(timestamp):
+    """把数据库时间（UTC）转换为HTTP日期"""
+    value = datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+    return format_datetime(value, usegmt=True)
+
+
+def etag_matches(if_none_match, etag):
+    """If-None-Match 是否包含当前 ETag（弱比较）"""
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return etag in [tag[2:] if tag.startswith("W/") else tag for tag in candidates]
+
+
+def not_modified_since(if_modified_since, last_modified):
+    try:
+        return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+
+
+class ReferenceData:
+    """一个参考数据表的条件响应"""
+
+    def __init__(self, table_name, sql):
+        self.table_name = table_name
+        self.sql = sql
+        self._cached = None   # (版本号, 响应体)
+
+    async def response(self, request, db):
+        version, updated_at = await db.read(read_version, self.table_name)
+
+        etag = f'"{self.table_name}-{version}"'
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        last_modified = http_date(updated_at) if updated_at and settled(updated_at) else None
+        if last_modified:
+            headers["Last-Modified"] = last_modified
+
+        # If-None-Match 优先于 If-Modified-Since
+        if_none_match = request.headers.get("if-none-match")
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_none_match is not None:
+            if etag_matches(if_none_match, etag):
+                return Response(status_code=304, headers=headers)
+        elif if_modified_since and last_modified and not_modified_since(if_modified_since, last_modified):
+            return Response(status_code=304, headers=headers)
+
+        cached = self._cached
+        if cached is None or cached[0] != version:
+            # 先读版本号再读数据，数据不会比版本号旧；之后的变化会使版本号递增
+            rows = await db.fetchall(self.sql)
+            cached = (version, dumps(rows))
+            self._cached = cached
+        return Response(content=cached[1], media_type="application/json", headers=headers)
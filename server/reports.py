@@ -0,0 +1,209 @@
+"""
+业财融合管理系统 - 报表执行
+
+执行 report_configs 中保存的报表SQL：
+- 在只读连接上执行，授权回调（set_authorizer）只允许读取，拒绝 PRAGMA、ATTACH 等其他操作
+- 进度回调（set_progress_handler）超过执行时间上限时中断查询；结果超过行数上限时截断
+- 参数只通过绑定传入（命名参数 :name 或位置参数 ?），不拼接到SQL中
+- 结果按 (报表SQL, 参数, 所读各表的版本号) 缓存，LRU淘汰；数据未变化时直接返回缓存，
+  所读的表由授权回调收集，只要有一个表没有版本号（见 table_versions）就不缓存
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# 单个报表的执行时间上限（秒）与返回行数上限
+REPORT_TIMEOUT = float(os.environ.get("REPORT_TIMEOUT", "5.0"))
+REPORT_MAX_ROWS = int(os.environ.get("REPORT_MAX_ROWS", "10000"))
+
+# 最多缓存的报表结果数量
+REPORT_CACHE_SIZE = int(os.environ.get("REPORT_CACHE_SIZE", "64"))
+
+# 每执行多少条虚拟机指令检查一次是否超时
+PROGRESS_INTERVAL = 1000
+
+# 报表SQL允许的操作
+ALLOWED_ACTIONS = {
+    sqlite3.SQLITE_SELECT,
+    sqlite3.SQLITE_READ,
+    sqlite3.SQLITE_FUNCTION,
+    sqlite3.SQLITE_RECURSIVE,
+}
+
+
+class ReportError(Exception):
+    """报表执行失败"""
+
+
+class ReportTimeoutError(ReportError):
+    """报表执行超时"""
+
+
+class ReportCache:
+    """报表结果的有界LRU缓存"""
+
+    def __init__(self, max_size=REPORT_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        # 指标
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key, result):
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def metrics(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+report_cache = ReportCache()
+
+# 报表SQL -> 所读的表（同一SQL只在第一次执行时收集）
+_dependencies = {}
+
+
+def _authorizer(tables):
+    """只允许读取的授权回调，并收集读取的表名"""
+    def authorize(action, arg1, arg2, db_name, source):
+        if action not in ALLOWED_ACTIONS:
+            return sqlite3.SQLITE_DENY
+        if action == sqlite3.SQLITE_READ and arg1:
+            tables.add(arg1)
+        return sqlite3.SQLITE_OK
+    return authorize
+
+
+def _dependencies_of(conn, sql, params):
+    """报表SQL读取的表
+
+    语句缓存命中时不会再次调用授权回调，因此用 EXPLAIN 单独编译一次来收集
+    """
+    tables = _dependencies.get(sql)
+    if tables is None:
+        collected = set()
+        conn.set_authorizer(_authorizer(collected))
+        try:
+            conn.execute("EXPLAIN " + sql, params).fetchall()
+        finally:
+            conn.set_authorizer(None)
+        tables = frozenset(collected)
+        _dependencies[sql] = tables
+    return tables
+
+
+def _execute(conn, sql, params, max_rows, timeout):
+    """在超时与行数限制下执行，返回 (列名, 行, 是否截断)"""
+    deadline = time.perf_counter() + timeout
+    conn.set_authorizer(_authorizer(set()))
+    conn.set_progress_handler(lambda: 1 if time.perf_counter() > deadline else 0, PROGRESS_INTERVAL)
+    try:
+        cursor = conn.execute(sql, params)
+        columns = [column[0] for column in cursor.description or []]
+        rows = [dict(row) for row in cursor.fetchmany(max_rows + 1)]
+        cursor.close()
+    except sqlite3.OperationalError as e:
+        if time.perf_counter() > deadline:
+            raise ReportTimeoutError(f"报表执行超过 {timeout:g} 秒") from e
+        raise ReportError(str(e)) from e
+    except sqlite3.Error as e:
+        raise ReportError(str(e)) from e
+    finally:
+        conn.set_progress_handler(None, 0)
+        conn.set_authorizer(None)
+    truncated = len(rows) > max_rows
+    return columns, rows[:max_rows], truncated
+
+
+def run_report(conn, report_id, params, max_rows=REPORT_MAX_ROWS, timeout=REPORT_TIMEOUT):
+    """执行报表，返回结果；报表不存在或已停用时返回None
+
+    params: 命名参数字典或位置参数列表
+    """
+    start = time.perf_counter()
+    # 报表配置、版本号与查询在同一读事务（同一快照）中读取
+    conn.execute("BEGIN")
+    try:
+        report = conn.execute(
+            "SELECT id, report_name, report_type, sql_query FROM report_configs WHERE id = ? AND is_active = 1",
+            (report_id,),
+        ).fetchone()
+        if report is None:
+            return None
+        sql = report["sql_query"].strip().rstrip(";")
+
+        try:
+            tables = _dependencies_of(conn, sql, params)
+        except sqlite3.Error as e:
+            raise ReportError(str(e)) from e
+
+        versions = {
+            row["table_name"]: row["version"]
+            for row in conn.execute("SELECT table_name, version FROM table_versions")
+        }
+        cacheable = all(table in versions for table in tables)
+        key = None
+        if cacheable:
+            key = (
+                sql,
+                json.dumps(params, sort_keys=True, ensure_ascii=False),
+                tuple(sorted((table, versions[table]) for table in tables)),
+                max_rows,
+            )
+            cached = report_cache.get(key)
+            if cached is not None:
+                return dict(cached, cached=True, elapsed_ms=round((time.perf_counter() - start) * 1000, 3))
+
+        columns, rows, truncated = _execute(conn, sql, params, max_rows, timeout)
+    finally:
+        conn.rollback()
+
+    execution_ms = round((time.perf_counter() - start) * 1000, 3)
+    result = {
+        "report_id": report["id"],
+        "report_name": report["report_name"],
+        "report_type": report["report_type"],
+        "columns": columns,
+        "rows": rows,
+        "row_count": len(rows),
+        "truncated": truncated,
+        "tables": sorted(tables),
+        "execution_ms": execution_ms,
+    }
+    if key is not None:
+        report_cache.put(key, result)
+    return dict(result, cached=False, elapsed_ms=execution_ms)
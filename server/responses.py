@@ -0,0 +1,201 @@
+"""
+业财融合管理系统 - 响应序列化与压缩
+
+- FastJSONResponse: 优先使用 orjson 序列化（未安装时退回标准库 json）
+- json_response(): 列表接口直接返回已构造的响应，跳过 FastAPI 的 jsonable_encoder；
+  数据库行本身只包含 str/int/float/None，不需要逐值转换
+- stream_response(): 把逐批产出的数据库行编码为 NDJSON 或增量输出的 JSON 数组，
+  通过 StreamingResponse 发送，内存中只保留当前一批
+- CompressionMiddleware: 按 Accept-Encoding 协商 br / gzip，响应体超过阈值才压缩，
+  流式响应逐块压缩
+"""
+
+import json
+import os
+import zlib
+
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 可选依赖
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - 可选依赖
+    brotli = None
+
+# 超过该字节数的响应才压缩
+COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", "1024"))
+
+# 压缩级别：兼顾压缩率与CPU开销
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+
+# 流式响应格式与内容类型
+STREAM_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "json": "application/json",
+}
+
+# 可压缩的内容类型
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+
+def dumps(content):
+    """序列化为UTF-8编码的JSON字节串"""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """使用 orjson 序列化的JSON响应"""
+
+    def render(self, content):
+        return dumps(content)
+
+
+def json_response(content, status_code=200, headers=None):
+    """直接构造响应，跳过 jsonable_encoder"""
+    return FastJSONResponse(content, status_code=status_code, headers=headers)
+
+
+async def _encode_ndjson(chunks):
+    """每行一个JSON对象"""
+    async for rows in chunks:
+        yield b"".join(dumps(row) + b"\n" for row in rows)
+
+
+async def _encode_json_array(chunks):
+    """增量输出JSON数组：[ 行, 行, ... ]"""
+    yield b"["
+    separator = b""
+    async for rows in chunks:
+        yield separator + b",".join(dumps(row) for row in rows)
+        separator = b","
+    yield b"]"
+
+
+def stream_response(chunks, format="ndjson"):
+    """chunks: 逐批产出行列表的异步迭代器，例如 Database.stream()"""
+    encode = _encode_ndjson if format == "ndjson" else _encode_json_array
+    return StreamingResponse(encode(chunks), media_type=STREAM_FORMATS[format])
+
+
+def choose_encoding(accept_encoding):
+    """按客户端支持情况选择压缩算法：br 优先，其次 gzip"""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if token:
+            accepted[token.strip().lower()] = quality
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+class _Compressor:
+    def __init__(self, encoding):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            # wbits=31: 带 gzip 头
+            self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        if self.encoding == "br":
+            return self._compressor.process(data) + self._compressor.flush()
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data=b""):
+        if self.encoding == "br":
+            return self._compressor.process(data) + self._compressor.finish()
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+class CompressionMiddleware:
+    """协商 br / gzip 压缩的ASGI中间件"""
+
+    def __init__(self, app, minimum_size=COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, compressor, passthrough
+
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                if ("content-encoding" in headers
+                        or message["status"] < 200 or message["status"] in (204, 304)
+                        or not content_type.startswith(COMPRESSIBLE_TYPES)):
+                    passthrough = True
+                    await send(message)
+                else:
+                    # 等到第一段响应体再决定是否压缩
+                    start_message = message
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                if not more_body and len(body) < self.minimum_size:
+                    # 小响应不压缩
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+
+                compressor = _Compressor(encoding)
+                headers = MutableHeaders(raw=start_message["headers"])
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if more_body:
+                    # 流式响应：长度未知
+                    del headers["Content-Length"]
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": compressor.compress(body), "more_body": True})
+                else:
+                    compressed = compressor.finish(body)
+                    headers["Content-Length"] = str(len(compressed))
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": compressed})
+                return
+
+            if more_body:
+                await send({"type": "http.response.body", "body": compressor.compress(body), "more_body": True})
+            else:
+                await send({"type": "http.response.body", "body": compressor.finish(body)})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,59 @@
+"""
+业财融合管理系统 - 事务编号分配
+
+事务编号格式: 事件类型缩写-年月日-4位序号，例如 XS-20230615-0001 (销售-2023年6月15日-0001号)。
+
+序号保存在 code_sequences 表中，以 (类型缩写, 日期) 为主键。分配时用一条
+INSERT ... ON CONFLICT DO UPDATE 原子地增加计数，并与业务事件的插入处于同一事务：
+SQLite 只允许一个写事务，计数行上的写锁保证并发写入不会得到重复序号，
+事务回滚时已分配的序号也一并回滚。批量导入时可一次预分配一段连续序号。
+"""
+
+from datetime import datetime
+
+# 事件类型缩写
+EVENT_TYPE_PREFIXES = {
+    "销售": "XS",
+    "采购": "CG",
+    "合同": "HT",
+    "报销": "BX",
+}
+
+# 其他事件类型的缩写
+DEFAULT_PREFIX = "QT"
+
+
+def event_type_prefix(event_type):
+    """事件类型对应的编号缩写"""
+    return EVENT_TYPE_PREFIXES.get(event_type, DEFAULT_PREFIX)
+
+
+def allocate(conn, prefix, date_str, count=1):
+    """在当前事务中为 (prefix, date_str) 分配 count 个连续序号，返回第一个序号"""
+    conn.execute("""
+        INSERT INTO code_sequences (prefix, seq_date, last_value)
+        VALUES (?, ?, ?)
+        ON CONFLICT (prefix, seq_date) DO UPDATE SET last_value = last_value + excluded.last_value
+    """, (prefix, date_str, count))
+    last_value = conn.execute(
+        "SELECT last_value FROM code_sequences WHERE prefix = ? AND seq_date = ?",
+        (prefix, date_str)
+    ).fetchone()[0]
+    return last_value - count + 1
+
+
+def format_code(prefix, date_str, seq):
+    return f"{prefix}-{date_str}-{seq:04d}"
+
+
+def allocate_codes(conn, event_type, count=1, day=None):
+    """为某一事件类型预分配 count 个事务编号（默认当天）"""
+    prefix = event_type_prefix(event_type)
+    date_str = (day or datetime.now()).strftime("%Y%m%d")
+    first = allocate(conn, prefix, date_str, count)
+    return [format_code(prefix, date_str, seq) for seq in range(first, first + count)]
+
+
+def next_code(conn, event_type, day=None):
+    """分配一个事务编号"""
+    return allocate_codes(conn, event_type, 1, day)[0]
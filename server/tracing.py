@@ -0,0 +1,238 @@
+"""
+业财融合管理系统 - 请求轨迹记录
+
+设置环境变量 TRACE_FILE 后，TraceMiddleware 把每个请求追加为轨迹文件（JSON Lines）中的一行，
+供 benchmarks/replay.py 按原始的时间间隔与请求组合回放：
+- t: 相对记录开始的秒数；duration_ms / status / response_bytes: 原始的耗时、状态码与响应字节数
+- route: 路由模板（例如 /approvals/{approval_id}/approve），path_params: 路径参数
+- query / body: 匿名化后的查询参数与请求体形状
+- client: 按 Authorization 头分配的匿名编号（c1、c2 ...），不记录令牌、用户名或密码
+
+匿名化规则：数字、日期、布尔值与 TRACE_KEEP_PARAMS 中参数（状态、格式等枚举值）的值原样保留，
+其余字符串替换为 {"str": 长度}；请求体只记录结构（字段名、值类型、字符串长度、数组长度），不记录任何值。
+
+请求处理中只把原始数据放入队列，匿名化、序列化与写文件都在后台线程中完成。
+TRACE_SAMPLE 为记录比例（默认 1，全部记录）。
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import queue
+import random
+import re
+import secrets
+import threading
+import time
+from urllib.parse import parse_qsl
+
+from app_logging import get_logger
+from responses import dumps
+
+# 为空时不记录
+TRACE_FILE = os.environ.get("TRACE_FILE", "")
+TRACE_SAMPLE = float(os.environ.get("TRACE_SAMPLE", "1"))
+
+# 值可以原样保留的查询参数（枚举值，不含业务数据）
+TRACE_KEEP_PARAMS = {
+    "status", "event_type", "direction", "format", "order_by", "rollup", "dry_run",
+    "explain", "with_total", "limit", "fiscal_year", "fiscal_period", "as_of",
+}
+
+# 超过该字节数的请求体不解析，只记录大小
+TRACE_MAX_BODY = 1024 * 1024
+
+# 每次最多批量写入的记录数
+TRACE_WRITE_BATCH = 500
+
+# 匿名客户端编号的上限，超过后统一记为 OTHER_CLIENT
+TRACE_MAX_CLIENTS = 10000
+OTHER_CLIENT = "c0"
+
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?")
+_DATE = re.compile(r"\d{4}-\d{2}(?:-\d{2})?(?:[ T]\d{2}:\d{2}(?::\d{2})?)?")
+_BOOLEAN = {"true", "false", "0", "1", "yes", "no"}
+
+logger = get_logger("trace")
+
+
+def anonymize_value(key, value):
+    """匿名化一个查询参数或路径参数的值"""
+    if key in TRACE_KEEP_PARAMS or value.lower() in _BOOLEAN:
+        return value
+    if _NUMBER.fullmatch(value) or _DATE.fullmatch(value):
+        return value
+    return {"str": len(value)}
+
+
+def anonymize_query(query_string):
+    """查询参数 -> [[名称, 匿名化的值], ...]（保留重复参数与顺序）"""
+    return [[key, anonymize_value(key, value)]
+            for key, value in parse_qsl(query_string, keep_blank_values=True)]
+
+
+def value_shape(value):
+    """请求体的结构：字典保留字段名，数组记录长度与首个元素的结构，标量只记录类型"""
+    if isinstance(value, dict):
+        return {key: value_shape(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return {"list": len(value), "item": value_shape(value[0]) if value else None}
+    if isinstance(value, str):
+        return {"str": len(value)}
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int"
+    if isinstance(value, float):
+        return "float"
+    return None
+
+
+def body_shape(content_type, body):
+    """按内容类型解析请求体并返回其结构（body 为整数时表示超过上限、未保留的请求体大小）"""
+    if isinstance(body, int):
+        return {"bytes": body}
+    if not body:
+        return None
+    if content_type.startswith("application/json"):
+        try:
+            return value_shape(json.loads(body))
+        except (ValueError, UnicodeDecodeError):
+            return {"bytes": len(body)}
+    if content_type.startswith("application/x-www-form-urlencoded"):
+        # 表单（例如登录）只记录字段名与长度
+        return {key: {"str": len(value)} for key, value in parse_qsl(body.decode("latin-1"))}
+    return {"bytes": len(body)}
+
+
+class TraceWriter:
+    """后台写入轨迹文件的线程"""
+
+    def __init__(self, path):
+        self.path = path
+        self.started = time.perf_counter()
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._clients = {}
+        # 客户端编号只在本次记录内有效：令牌加随机盐后取摘要
+        self._salt = secrets.token_bytes(16)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="trace-writer", daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+
+    def stop(self):
+        """写完队列中剩余的记录后结束线程"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def submit(self, raw):
+        self._queue.put(raw)
+
+    def _client(self, authorization):
+        if not authorization:
+            return None
+        digest = hashlib.sha256(self._salt + authorization).digest()
+        client = self._clients.get(digest)
+        if client is None:
+            if len(self._clients) >= TRACE_MAX_CLIENTS:
+                return OTHER_CLIENT
+            client = self._clients[digest] = f"c{len(self._clients) + 1}"
+        return client
+
+    def _entry(self, raw):
+        (start, method, route, path_params, query_string, authorization,
+         content_type, body, status, duration, response_bytes) = raw
+        return {
+            "t": round(start - self.started, 6),
+            "method": method,
+            "route": route,
+            "path_params": {key: anonymize_value(key, str(value)) for key, value in path_params.items()},
+            "query": anonymize_query(query_string.decode("latin-1")),
+            "body": body_shape(content_type, body),
+            "client": self._client(authorization),
+            "status": status,
+            "duration_ms": round(duration * 1000, 3),
+            "response_bytes": response_bytes,
+        }
+
+    def _run(self):
+        with open(self.path, "ab") as output:
+            while True:
+                batch = [self._queue.get()]
+                while len(batch) < TRACE_WRITE_BATCH:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                stopping = None in batch
+                lines = []
+                for raw in batch:
+                    if raw is None:
+                        continue
+                    try:
+                        lines.append(dumps(self._entry(raw)))
+                    except Exception as e:
+                        logger.warning("轨迹记录失败: %s", e)
+                if lines:
+                    output.write(b"\n".join(lines) + b"\n")
+                    output.flush()
+                if stopping:
+                    return
+
+
+class TraceMiddleware:
+    """记录请求轨迹的ASGI中间件（只处理匹配到路由的HTTP请求）"""
+
+    def __init__(self, app, writer, sample=TRACE_SAMPLE):
+        self.app = app
+        self.writer = writer
+        self.sample = sample
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or (self.sample < 1 and random.random() >= self.sample):
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        chunks = []
+        body_size = 0
+        status = 500
+        response_bytes = 0
+
+        async def receive_wrapper():
+            nonlocal body_size
+            message = await receive()
+            if message["type"] == "http.request":
+                chunk = message.get("body", b"")
+                body_size += len(chunk)
+                if body_size <= TRACE_MAX_BODY:
+                    chunks.append(chunk)
+            return message
+
+        async def send_wrapper(message):
+            nonlocal status, response_bytes
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            route = scope.get("route")
+            if route is not None:
+                headers = dict(scope["headers"])
+                body = b"".join(chunks) if body_size <= TRACE_MAX_BODY else body_size
+                self.writer.submit((
+                    start, scope["method"], route.path, scope.get("path_params", {}),
+                    scope.get("query_string", b""), headers.get(b"authorization"),
+                    headers.get(b"content-type", b"").decode("latin-1"), body,
+                    status, time.perf_counter() - start, response_bytes,
+                ))
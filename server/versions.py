@@ -0,0 +1,75 @@
+"""
+业财融合管理系统 - 表版本号
+
+table_versions 表记录各表的版本号，由数据库触发器在数据变化时递增，
+因此无论数据是通过本服务还是直接修改数据库变化的都能被感知。
+VersionWatcher 定期（默认每秒）读取一次版本号，发现变化时通知订阅者，
+进程内缓存据此失效，而不必在每个请求中查询数据库。
+"""
+
+import asyncio
+import os
+
+from app_logging import get_logger
+
+logger = get_logger("versions")
+
+# 版本号轮询间隔（秒）
+VERSION_POLL_INTERVAL = float(os.environ.get("VERSION_POLL_INTERVAL", "1.0"))
+
+
+def read_versions(conn):
+    """读取所有表的版本号 {表名: (版本号, 更新时间)}"""
+    rows = conn.execute("SELECT table_name, version, updated_at FROM table_versions").fetchall()
+    return {row["table_name"]: (row["version"], row["updated_at"]) for row in rows}
+
+
+class VersionWatcher:
+    """轮询 table_versions，版本变化时调用订阅的回调"""
+
+    def __init__(self, db, interval=VERSION_POLL_INTERVAL):
+        self.db = db
+        self.interval = interval
+        self.versions = {}
+        self._subscribers = {}
+        self._task = None
+
+    def subscribe(self, table_name, callback):
+        """订阅某个表的变化，callback() 在版本号变化时调用"""
+        self._subscribers.setdefault(table_name, []).append(callback)
+
+    def version(self, table_name):
+        """最近一次读取到的 (版本号, 更新时间)"""
+        return self.versions.get(table_name, (0, None))
+
+    async def check(self):
+        """读取版本号并通知发生变化的表的订阅者"""
+        versions = await self.db.read(read_versions)
+        changed = [name for name, value in versions.items()
+                   if name in self.versions and self.versions[name] != value]
+        self.versions = versions
+        for table_name in changed:
+            for callback in self._subscribers.get(table_name, []):
+                callback()
+        return changed
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.check()
+            except Exception as e:
+                logger.warning("读取表版本号失败: %s", e)
+
+    async def start(self):
+        await self.check()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,129 @@
+"""
+业财融合管理系统 - 测试公共设施
+
+每次测试运行在临时目录中用 schema.sql 与 sample_data.sql 新建数据库，
+在导入服务端模块之前通过 FINANCE_DB_PATH 指向它（db.py 在导入时读取路径），仓库中的数据库不会被修改。
+"""
+
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+from types import SimpleNamespace
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVER_DIR = os.path.join(ROOT_DIR, "server")
+DATABASE_DIR = os.path.join(ROOT_DIR, "database")
+
+sys.path.insert(0, SERVER_DIR)
+sys.path.insert(0, DATABASE_DIR)
+
+TEST_DIR = tempfile.mkdtemp(prefix="finance-test-")
+TEST_DB_PATH = os.path.join(TEST_DIR, "finance.db")
+
+os.environ["FINANCE_DB_PATH"] = TEST_DB_PATH
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+# 测试中版本号变化需要尽快被感知
+os.environ.setdefault("VERSION_POLL_INTERVAL", "0.1")
+
+
+def create_database(path):
+    """按 schema.sql 与 sample_data.sql 创建数据库（不执行迁移）"""
+    conn = sqlite3.connect(path)
+    for name in ("schema.sql", "sample_data.sql"):
+        with open(os.path.join(DATABASE_DIR, name), encoding="utf-8") as f:
+            conn.executescript(f.read())
+    conn.commit()
+    conn.close()
+
+
+create_database(TEST_DB_PATH)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(TEST_DIR, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def client():
+    """启动应用（执行迁移、预热连接池、启动版本号轮询）的测试客户端"""
+    from fastapi.testclient import TestClient
+    import app
+
+    with TestClient(app.app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(scope="session")
+def auth_headers(client):
+    response = client.post("/token", data={"username": "admin", "password": "admin"})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def db_conn(client):
+    """直接访问测试数据库的连接"""
+    conn = sqlite3.connect(TEST_DB_PATH, timeout=10)
+    conn.row_factory = sqlite3.Row
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def migrated_conn(tmp_path):
+    """独立的临时数据库（示例数据并执行全部迁移），用于直接调用数据访问函数"""
+    from migrate import migrate
+
+    path = str(tmp_path / "migrated.db")
+    create_database(path)
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    migrate(conn)
+    yield conn
+    conn.close()
+
+
+def create_event(client, headers, **fields):
+    """通过接口创建业务事件，返回新事件的id"""
+    event = {
+        "event_type": "采购", "project_name": "测试采购", "amount": 20000.0,
+        "event_date": "2025-06-15", "department_id": 3, "created_by": 1,
+    }
+    event.update(fields)
+    response = client.post("/business_events", json=event, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+def collect_pages(client, headers, path, limit, **params):
+    """按 next_cursor 翻页直到结束，返回 (全部行, 页数)"""
+    items = []
+    pages = 0
+    cursor = None
+    while True:
+        query = dict(params, limit=limit)
+        if cursor:
+            query["cursor"] = cursor
+        response = client.get(path, params=query, headers=headers)
+        assert response.status_code == 200, response.text
+        body = response.json()
+        assert len(body["items"]) <= limit
+        items.extend(body["items"])
+        pages += 1
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return items, pages
+
+
+def make_record(account_code, direction, amount, record_date, business_event_id=1):
+    """post_records 使用的财务记录（会计期间取记录日期的年月）"""
+    year, month, _ = record_date.split("-")
+    return SimpleNamespace(
+        business_event_id=business_event_id, account_code=account_code, account_name=account_code,
+        amount=amount, direction=direction, record_date=record_date,
+        fiscal_year=int(year), fiscal_period=int(month), description=None,
+    )
@@ -0,0 +1,116 @@
+"""审批路由索引：与原来按金额阈值查询 approval_configs 的SQL结果一致，配置变化后重新编译"""
+
+import random
+import sqlite3
+import time
+
+import pytest
+
+from approval_routing import ApprovalRouting
+from conftest import create_database, create_event
+
+# 原来创建业务事件与提交审批时使用的查询（同一级别按id排序，使结果确定）
+LEGACY_ROUTE_SQL = """
+    SELECT approver_id, approval_level FROM approval_configs
+    WHERE event_type = ? AND department_id = ? AND is_active = 1
+    AND (amount_threshold IS NULL OR amount_threshold <= ?)
+    ORDER BY approval_level, id
+"""
+
+
+def legacy_route(conn, event_type, department_id, amount):
+    return tuple(tuple(row) for row in conn.execute(LEGACY_ROUTE_SQL, (event_type, department_id, amount)))
+
+
+@pytest.fixture
+def config_conn(tmp_path):
+    """示例数据的审批配置，加上无阈值、停用、同阈值多级与级别乱序的配置"""
+    path = str(tmp_path / "routing.db")
+    create_database(path)
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.executemany("""
+        INSERT INTO approval_configs (event_type, department_id, approver_id, approval_level, amount_threshold, is_active)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, [
+        ("销售", 3, 1, 3, None, 1),
+        ("销售", 3, 2, 1, 500000.0, 1),
+        ("销售", 3, 6, 2, 100000.0, 1),
+        ("销售", 3, 4, 4, 5000.0, 0),
+        ("采购", 5, 6, 2, 2000.0, 1),
+        ("采购", 5, 7, 1, 2000.0, 1),
+        ("采购", 5, 8, 1, None, 1),
+        ("报销", 6, 3, 1, 100.0, 0),
+    ])
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def test_route_matches_legacy_sql(config_conn):
+    routing = ApprovalRouting()
+    keys = [tuple(row) for row in config_conn.execute(
+        "SELECT DISTINCT event_type, department_id FROM approval_configs")]
+    thresholds = [row[0] for row in config_conn.execute(
+        "SELECT DISTINCT amount_threshold FROM approval_configs WHERE amount_threshold IS NOT NULL")]
+
+    rng = random.Random(25)
+    amounts = [-1.0, 0.0, 0.01, 1e12] + [rng.uniform(0, 1e6) for _ in range(200)]
+    for threshold in thresholds:
+        amounts += [threshold - 0.01, threshold, threshold + 0.01]
+
+    checked = 0
+    for event_type, department_id in keys + [("不存在", 3), ("销售", 999)]:
+        for amount in amounts:
+            assert routing.route(config_conn, event_type, department_id, amount) == \
+                legacy_route(config_conn, event_type, department_id, amount), (event_type, department_id, amount)
+            checked += 1
+    assert checked > 1000
+    assert routing.compilations == 1
+
+    # 无阈值的配置始终生效，停用的配置被忽略，同一级别按配置id排序
+    assert routing.route(config_conn, "销售", 3, 100000.0) == ((7, 1), (8, 2), (6, 2), (1, 3))
+    assert routing.route(config_conn, "销售", 3, 99999.99) == ((7, 1), (1, 3))
+    assert routing.route(config_conn, "采购", 5, 2000.0) == ((7, 1), (8, 1), (6, 2))
+    assert routing.route(config_conn, "采购", 5, 1999.0) == ((8, 1),)
+    assert routing.route(config_conn, "报销", 6, 1000.0) == ()
+
+
+def test_invalidate_recompiles(config_conn):
+    routing = ApprovalRouting()
+    assert routing.route(config_conn, "合同", 5, 1000.0) == ()
+
+    config_conn.execute("""
+        INSERT INTO approval_configs (event_type, department_id, approver_id, approval_level, amount_threshold)
+        VALUES ('合同', 5, 6, 1, NULL)
+    """)
+    # 未失效前使用已编译的索引，不查询数据库
+    assert routing.route(config_conn, "合同", 5, 1000.0) == ()
+
+    routing.invalidate()
+    assert routing.route(config_conn, "合同", 5, 1000.0) == ((6, 1),)
+    assert routing.compilations == 2
+
+
+def test_config_change_reaches_new_events(client, auth_headers, db_conn):
+    def chain(event_id):
+        return [tuple(row) for row in db_conn.execute(
+            "SELECT approver_id, approval_level FROM approvals WHERE business_event_id = ? ORDER BY approval_level",
+            (event_id,))]
+
+    assert chain(create_event(client, auth_headers, event_type="合同", department_id=5)) == []
+
+    with db_conn:
+        db_conn.execute("""
+            INSERT INTO approval_configs (event_type, department_id, approver_id, approval_level, amount_threshold)
+            VALUES ('合同', 5, 6, 1, NULL)
+        """)
+    try:
+        # 版本号轮询之后新建的事件使用新的配置
+        deadline = time.monotonic() + 3.0
+        while chain(create_event(client, auth_headers, event_type="合同", department_id=5)) != [(6, 1)]:
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+    finally:
+        with db_conn:
+            db_conn.execute("DELETE FROM approval_configs WHERE event_type = '合同' AND department_id = 5")
@@ -0,0 +1,31 @@
+"""认证缓存：users 表变化后，已缓存的用户信息在版本号轮询时失效"""
+
+import time
+
+
+def wait_for(condition, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_role_change_invalidates_cached_principal(client, db_conn):
+    from auth_cache import principal_cache
+
+    response = client.post("/token", data={"username": "lisi", "password": "password123"})
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    role = client.get("/users/me", headers=headers).json()["role"]
+    hits = principal_cache.hits
+    assert client.get("/users/me", headers=headers).json()["role"] == role
+    assert principal_cache.hits == hits + 1
+
+    db_conn.execute("UPDATE users SET role = '管理员' WHERE username = 'lisi'")
+    db_conn.commit()
+    try:
+        assert wait_for(lambda: client.get("/users/me", headers=headers).json()["role"] != role)
+    finally:
+        db_conn.execute("UPDATE users SET role = '业务' WHERE username = 'lisi'")
+        db_conn.commit()
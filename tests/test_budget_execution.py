@@ -0,0 +1,99 @@
+"""预算执行情况：由预算执行汇总表得到的执行数与直接汇总财务记录的结果一致"""
+
+import sqlite3
+
+import pytest
+
+from conftest import TEST_DB_PATH, create_event
+
+YEAR, MONTH = 2029, 7
+PARENT = 3  # 业务部
+
+
+def direct_sums(db_conn, department_ids, account_prefix):
+    """直接按财务记录汇总 (支出, 收入, 记录数)"""
+    row = db_conn.execute(f"""
+        SELECT COALESCE(SUM(CASE WHEN fr.direction = '支出' THEN fr.amount END), 0),
+               COALESCE(SUM(CASE WHEN fr.direction = '收入' THEN fr.amount END), 0),
+               COUNT(*)
+        FROM financial_records fr JOIN business_events be ON fr.business_event_id = be.id
+        WHERE be.department_id IN ({','.join('?' * len(department_ids))})
+        AND fr.fiscal_year = ? AND fr.fiscal_period = ? AND fr.account_code LIKE ?
+    """, [*department_ids, YEAR, MONTH, f"{account_prefix}%"]).fetchone()
+    return tuple(row)
+
+
+def descendants(db_conn, department_id):
+    """部门及其全部下级部门"""
+    return [row[0] for row in db_conn.execute("""
+        WITH RECURSIVE tree(id) AS (
+            SELECT ? UNION ALL SELECT d.id FROM departments d JOIN tree ON d.parent_id = tree.id
+        ) SELECT id FROM tree
+    """, (department_id,))]
+
+
+@pytest.fixture(scope="module")
+def budgets(client, auth_headers):
+    """业务部及其一个下级部门在同一期间的预算与入账"""
+    conn = sqlite3.connect(TEST_DB_PATH, timeout=10)
+    child = conn.execute("SELECT MIN(id) FROM departments WHERE parent_id = ?", (PARENT,)).fetchone()[0]
+    subject_id = conn.execute("SELECT id FROM account_subjects WHERE code = '6001'").fetchone()[0]
+    ids = {}
+    for name, department_id, account_subject_id in [
+        ("部门", PARENT, None), ("部门科目", PARENT, subject_id), ("下级部门", child, None),
+    ]:
+        ids[name] = conn.execute("""
+            INSERT INTO budgets (department_id, year, month, account_subject_id, amount) VALUES (?, ?, ?, ?, 1000)
+        """, (department_id, YEAR, MONTH, account_subject_id)).lastrowid
+    conn.commit()
+    events = {department_id: create_event(client, auth_headers, department_id=department_id) for department_id in (PARENT, child)}
+    conn.executemany("UPDATE business_events SET status = '已审批' WHERE id = ?", [(i,) for i in events.values()])
+    conn.commit()
+    conn.close()
+
+    records = [
+        (PARENT, "6001001", "支出", 100.0), (PARENT, "6001002", "支出", 40.0), (PARENT, "6602001", "支出", 7.0),
+        (PARENT, "4001001", "收入", 500.0), (child, "6001001", "支出", 30.0),
+    ]
+    response = client.post("/financial_records/bulk", json={"records": [{
+        "business_event_id": events[department_id], "account_code": code, "account_name": code,
+        "amount": amount, "direction": direction, "record_date": f"{YEAR}-{MONTH:02d}-10",
+        "fiscal_year": YEAR, "fiscal_period": MONTH, "created_by": 1,
+    } for department_id, code, direction, amount in records]}, headers=auth_headers)
+    assert response.json()["created"] == len(records), response.text
+    return ids, child
+
+
+def fetch(client, headers, **params):
+    response = client.get("/budgets/execution", params={"year": YEAR, "month": MONTH, **params}, headers=headers)
+    assert response.status_code == 200, response.text
+    return {budget["id"]: budget for budget in response.json()}
+
+
+@pytest.mark.parametrize("rollup", [False, True])
+def test_matches_financial_records(client, auth_headers, db_conn, budgets, rollup):
+    ids, child = budgets
+    execution = fetch(client, auth_headers, rollup=rollup)
+    parent = descendants(db_conn, PARENT) if rollup else [PARENT]
+    assert len(parent) > 1 or not rollup
+    cases = [("部门", parent, ""), ("部门科目", parent, "6001"), ("下级部门", [child], "")]
+    for name, department_ids, prefix in cases:
+        budget = execution[ids[name]]
+        expense, income, count = direct_sums(db_conn, department_ids, prefix)
+        assert (budget["executed_amount"], budget["income_amount"], budget["record_count"]) == \
+            pytest.approx((expense, income, count)), name
+        assert budget["remaining_amount"] == pytest.approx(1000 - expense)
+        assert budget["execution_rate"] == round(expense / 1000 * 100, 2)
+
+
+def test_expected_amounts(client, auth_headers, budgets):
+    budgets, _ = budgets
+    execution = fetch(client, auth_headers)
+    assert execution[budgets["部门"]]["executed_amount"] == 147.0
+    assert execution[budgets["部门科目"]]["executed_amount"] == 140.0
+    assert execution[budgets["下级部门"]]["executed_amount"] == 30.0
+
+    rollup = fetch(client, auth_headers, rollup=True)
+    assert rollup[budgets["部门"]]["executed_amount"] == 177.0
+    assert rollup[budgets["部门科目"]]["executed_amount"] == 170.0
+    assert rollup[budgets["下级部门"]]["executed_amount"] == 30.0
@@ -0,0 +1,72 @@
+"""批量创建业务事件：逐行结果中的id与事务编号对应本次插入的事件，审批流程随事件一并创建"""
+
+import asyncio
+
+import httpx
+
+
+def event_row(project_name, **fields):
+    row = {
+        "event_type": "采购", "project_name": project_name, "amount": 20000.0,
+        "event_date": "2025-06-15", "department_id": 3, "created_by": 1,
+    }
+    row.update(fields)
+    return row
+
+
+def test_bulk_results_match_inserted_events(client, auth_headers, db_conn):
+    rows = [
+        event_row("批量A"),
+        event_row("批量B", department_id=999999),
+        event_row("批量C", event_type="销售", amount=200000.0),
+        {"event_type": "采购"},
+        event_row("批量D", amount=1.0),
+    ]
+    response = client.post("/business_events/bulk", json={"events": rows}, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert (body["created"], body["failed"]) == (3, 2)
+
+    results = body["results"]
+    assert [result["success"] for result in results] == [True, False, True, False, True]
+    for result, row in zip(results, rows):
+        if not result["success"]:
+            continue
+        event = db_conn.execute(
+            "SELECT project_name, project_code, amount FROM business_events WHERE id = ?", (result["id"],)
+        ).fetchone()
+        assert (event["project_name"], event["project_code"], event["amount"]) == (
+            row["project_name"], result["transaction_code"], row["amount"])
+
+    # 审批流程与单条创建一致：采购/部门3 在 20000 时有一级审批，金额 1 时没有
+    def chain(event_id):
+        return [tuple(row) for row in db_conn.execute(
+            "SELECT approver_id, approval_level FROM approvals WHERE business_event_id = ? ORDER BY approval_level",
+            (event_id,))]
+
+    assert chain(results[0]["id"]) == [(7, 1)]
+    assert chain(results[2]["id"]) == [(7, 1), (8, 2)]
+    assert chain(results[4]["id"]) == []
+
+
+def test_concurrent_bulk_imports_return_their_own_events(client, auth_headers, db_conn):
+    import app
+
+    async def run():
+        transport = httpx.ASGITransport(app=app.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            return await asyncio.gather(*[
+                http.post("/business_events/bulk", headers=auth_headers,
+                          json={"events": [event_row(f"并发{batch}-{i}") for i in range(20)]})
+                for batch in range(6)
+            ])
+
+    seen = set()
+    for batch, response in enumerate(asyncio.run(run())):
+        assert response.status_code == 200, response.text
+        for i, result in enumerate(response.json()["results"]):
+            name = db_conn.execute(
+                "SELECT project_name FROM business_events WHERE id = ?", (result["id"],)).fetchone()[0]
+            assert name == f"并发{batch}-{i}"
+            seen.add(result["id"])
+    assert len(seen) == 120
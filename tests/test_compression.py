@@ -0,0 +1,124 @@
+"""响应压缩：按 Accept-Encoding 协商 br / gzip，小响应与已编码响应不压缩，流式响应逐块压缩"""
+
+import gzip
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from responses import CompressionMiddleware, brotli, choose_encoding
+
+# brotli 为可选依赖
+needs_brotli = pytest.mark.skipif(brotli is None, reason="未安装 brotli")
+
+MINIMUM_SIZE = 100
+LARGE = "业财融合" * 200
+SMALL = "ok"
+CHUNKS = [f'{{"id": {i}, "name": "{"记录" * 50}"}}\n' for i in range(20)]
+
+
+@pytest.fixture(scope="module")
+def compression_client():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=MINIMUM_SIZE)
+
+    @app.get("/large")
+    def large():
+        return PlainTextResponse(LARGE)
+
+    @app.get("/small")
+    def small():
+        return PlainTextResponse(SMALL)
+
+    @app.get("/encoded")
+    def encoded():
+        return Response(gzip.compress(LARGE.encode()), media_type="text/plain",
+                        headers={"Content-Encoding": "gzip"})
+
+    @app.get("/binary")
+    def binary():
+        return Response(LARGE.encode(), media_type="application/octet-stream")
+
+    @app.get("/stream")
+    def stream():
+        async def rows():
+            for chunk in CHUNKS:
+                yield chunk.encode()
+        return StreamingResponse(rows(), media_type="application/x-ndjson")
+
+    return TestClient(app)
+
+
+def raw_get(client, path, accept_encoding):
+    """不让 httpx 自动解压，返回 (响应, 原始字节)"""
+    with client.stream("GET", path, headers={"Accept-Encoding": accept_encoding}) as response:
+        return response, b"".join(response.iter_raw())
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    pytest.param("gzip, deflate, br", "br", marks=needs_brotli),
+    ("gzip", "gzip"),
+    ("br;q=0, gzip", "gzip"),
+    pytest.param("gzip;q=0.5, br;q=0.8", "br", marks=needs_brotli),
+    ("identity", None),
+    ("gzip;q=0", None),
+    ("", None),
+])
+def test_choose_encoding(accept_encoding, expected):
+    assert choose_encoding(accept_encoding) == expected
+
+
+@pytest.mark.parametrize("accept_encoding, decompress", [
+    pytest.param("br, gzip", lambda body: brotli.decompress(body), marks=needs_brotli),
+    ("gzip", gzip.decompress),
+])
+def test_large_response_compressed(compression_client, accept_encoding, decompress):
+    response, body = raw_get(compression_client, "/large", accept_encoding)
+    encoding = accept_encoding.split(",")[0]
+    assert response.headers["content-encoding"] == encoding
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) == len(body) < len(LARGE.encode())
+    assert decompress(body).decode() == LARGE
+
+
+def test_not_compressed(compression_client):
+    # 未声明支持的压缩算法
+    response, body = raw_get(compression_client, "/large", "identity")
+    assert "content-encoding" not in response.headers
+    assert body.decode() == LARGE
+
+    # 低于阈值的小响应
+    response, body = raw_get(compression_client, "/small", "gzip")
+    assert "content-encoding" not in response.headers
+    assert body.decode() == SMALL
+
+    # 不可压缩的内容类型
+    response, body = raw_get(compression_client, "/binary", "gzip")
+    assert "content-encoding" not in response.headers
+    assert body == LARGE.encode()
+
+
+def test_already_encoded_passed_through(compression_client):
+    response, body = raw_get(compression_client, "/encoded", "br, gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(body).decode() == LARGE
+
+
+@pytest.mark.parametrize("accept_encoding, decompress", [
+    pytest.param("br", lambda body: brotli.decompress(body), marks=needs_brotli),
+    ("gzip", gzip.decompress),
+])
+def test_streaming_compressed_incrementally(compression_client, accept_encoding, decompress):
+    response, body = raw_get(compression_client, "/stream", accept_encoding)
+    assert response.headers["content-encoding"] == accept_encoding
+    # 长度未知，不能带 Content-Length
+    assert "content-length" not in response.headers
+    assert decompress(body).decode() == "".join(CHUNKS)
+
+
+def test_application_endpoint_compressed(client, auth_headers):
+    response = client.get("/account_subjects", headers={**auth_headers, "Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.json()
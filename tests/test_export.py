@@ -0,0 +1,106 @@
+"""列表导出：CSV 带 BOM 与表头、字段内换行按引号转义；Excel 内容与筛选结果一致"""
+
+import csv
+import io
+
+import pytest
+
+from conftest import collect_pages, create_event
+from export import BUSINESS_EVENT_COLUMNS, FINANCIAL_RECORD_COLUMNS, Workbook
+
+needs_openpyxl = pytest.mark.skipif(Workbook is None, reason="未安装 openpyxl")
+
+KEYWORD = "导出测试"
+
+
+@pytest.fixture(scope="module")
+def events(client, auth_headers):
+    """三条可按关键字筛选的业务事件，描述含换行、逗号与引号"""
+    return [create_event(client, auth_headers, project_name=f"{KEYWORD}{i}", amount=100.0 + i,
+                         description='第一行\n第二行, 含"引号"')
+            for i in range(3)]
+
+
+def expected_rows(client, headers, path, columns, **params):
+    """分页列表中对应导出列的值"""
+    items, _ = collect_pages(client, headers, path, 50, **params)
+    return [[item[key] for key, _ in columns] for item in items]
+
+
+def as_text(value):
+    return "" if value is None else str(value)
+
+
+@pytest.mark.parametrize("path, columns", [
+    ("/business_events", BUSINESS_EVENT_COLUMNS),
+    ("/financial_records", FINANCIAL_RECORD_COLUMNS),
+])
+def test_csv_export(client, auth_headers, events, path, columns):
+    response = client.get(f"{path}/export", params={"format": "csv"}, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.headers["content-disposition"].startswith("attachment;")
+    assert response.headers["content-disposition"].endswith('.csv"')
+
+    body = response.content
+    assert body.startswith(b"\xef\xbb\xbf")
+    rows = list(csv.reader(io.StringIO(body.decode("utf-8-sig"), newline="")))
+    assert rows[0] == [title for _, title in columns]
+
+    expected = expected_rows(client, auth_headers, path, columns)
+    assert int(response.headers["x-total-count"]) == len(expected) == len(rows) - 1
+    assert rows[1:] == [[as_text(value) for value in row] for row in expected]
+
+
+def test_csv_multiline_fields(client, auth_headers, events):
+    response = client.get("/business_events/export", params={"format": "csv", "keyword": KEYWORD},
+                          headers=auth_headers)
+    rows = list(csv.reader(io.StringIO(response.content.decode("utf-8-sig"), newline="")))
+    assert response.headers["x-total-count"] == "3"
+    assert len(rows) == 4
+    # 描述中的换行在引号内，不会拆成多条记录
+    assert response.content.count(b"\n") > len(rows)
+    description = [title for _, title in BUSINESS_EVENT_COLUMNS].index("描述")
+    assert {row[description] for row in rows[1:]} == {'第一行\n第二行, 含"引号"'}
+    assert sorted(int(row[0]) for row in rows[1:]) == sorted(events)
+
+
+@needs_openpyxl
+@pytest.mark.parametrize("path, columns, sheet_title", [
+    ("/business_events", BUSINESS_EVENT_COLUMNS, "业务事件"),
+    ("/financial_records", FINANCIAL_RECORD_COLUMNS, "财务记录"),
+])
+def test_xlsx_export(client, auth_headers, events, path, columns, sheet_title):
+    from openpyxl import load_workbook
+
+    response = client.get(f"{path}/export", headers=auth_headers)
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"] == \
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    assert response.headers["content-disposition"].endswith('.xlsx"')
+    assert int(response.headers["content-length"]) == len(response.content)
+
+    workbook = load_workbook(io.BytesIO(response.content), read_only=True)
+    assert workbook.sheetnames == [sheet_title]
+    rows = [list(row) for row in workbook[sheet_title].iter_rows(values_only=True)]
+    assert rows[0] == [title for _, title in columns]
+    expected = expected_rows(client, auth_headers, path, columns)
+    assert int(response.headers["x-total-count"]) == len(expected)
+    assert rows[1:] == expected
+
+
+@needs_openpyxl
+def test_xlsx_export_filtered(client, auth_headers, events):
+    from openpyxl import load_workbook
+
+    response = client.get("/business_events/export", params={"keyword": KEYWORD}, headers=auth_headers)
+    assert response.headers["x-total-count"] == "3"
+    sheet = load_workbook(io.BytesIO(response.content), read_only=True)["业务事件"]
+    rows = list(sheet.iter_rows(min_row=2, values_only=True))
+    assert sorted(row[0] for row in rows) == sorted(events)
+    assert sorted(row[4] for row in rows) == [100.0, 101.0, 102.0]
+
+
+def test_export_rejects_unknown_format(client, auth_headers):
+    response = client.get("/financial_records/export", params={"format": "ndjson"}, headers=auth_headers)
+    assert response.status_code == 422
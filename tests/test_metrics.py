@@ -0,0 +1,86 @@
+"""请求指标：Prometheus 文本格式、按路由模板（而非实际路径）分组、/metrics 的令牌校验"""
+
+import re
+
+import pytest
+
+import app
+from metrics import CONTENT_TYPE, LATENCY_BUCKETS, UNMATCHED_ROUTE, RequestMetrics, record_db_time
+
+
+def sample_value(text, name, **labels):
+    """取出指定名称与标签的样本值"""
+    expected = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    for line in text.splitlines():
+        match = re.fullmatch(r"(\w+)(?:\{(.*)\})? (\S+)", line)
+        if match and match.group(1) == name and (match.group(2) or "") == expected:
+            return float(match.group(3))
+    return None
+
+
+def test_render_histograms_and_counters():
+    metrics = RequestMetrics()
+    metrics.observe("GET", "/budgets/{budget_id}", 200, 0.003, 0.001)
+    metrics.observe("GET", "/budgets/{budget_id}", 200, 0.2, 0.05)
+    metrics.observe("GET", "/budgets/{budget_id}", 404, 20.0, 0.0)
+    metrics.observe("POST", '/odd"route', 500, 0.01, 0.0)
+    text = metrics.render([{"pool": "read", "in_use": 1, "idle": 3, "checkouts": 7,
+                            "timeouts": 0, "wait_time_total_ms": 1500}])
+
+    assert "# TYPE http_requests_total counter" in text
+    assert "# TYPE http_request_duration_seconds histogram" in text
+    route = {"method": "GET", "route": "/budgets/{budget_id}"}
+    assert sample_value(text, "http_requests_total", **route, status=200) == 2
+    assert sample_value(text, "http_requests_total", **route, status=404) == 1
+    # 引号在标签值中转义
+    assert sample_value(text, "http_requests_total", method="POST", route='/odd\\"route', status=500) == 1
+
+    # 直方图的桶是累计计数，超过最大桶的只计入 +Inf
+    buckets = [sample_value(text, "http_request_duration_seconds_bucket", **route, le=bound)
+               for bound in LATENCY_BUCKETS]
+    assert buckets == sorted(buckets)
+    assert sample_value(text, "http_request_duration_seconds_bucket", **route, le=0.005) == 1
+    assert sample_value(text, "http_request_duration_seconds_bucket", **route, le=0.25) == 2
+    assert sample_value(text, "http_request_duration_seconds_bucket", **route, le=10.0) == 2
+    assert sample_value(text, "http_request_duration_seconds_bucket", **route, le="+Inf") == 3
+    assert sample_value(text, "http_request_duration_seconds_count", **route) == 3
+    assert sample_value(text, "http_request_duration_seconds_sum", **route) == pytest.approx(20.203)
+    assert sample_value(text, "http_request_db_seconds_sum", **route) == pytest.approx(0.051)
+
+    assert sample_value(text, "db_pool_connections", pool="read", state="idle") == 3
+    assert sample_value(text, "db_pool_wait_seconds_total", pool="read") == 1.5
+    assert text.endswith("\n")
+
+
+def test_db_time_only_recorded_inside_request():
+    # 请求之外调用不报错，也不计入任何请求
+    record_db_time(1.0)
+
+
+def test_requests_labelled_by_route_template(client, auth_headers):
+    record_id = client.get("/financial_records", headers=auth_headers).json()["items"][0]["id"]
+    for _ in range(2):
+        assert client.get(f"/financial_records/{record_id}", headers=auth_headers).status_code == 200
+    assert client.get("/no/such/path").status_code == 404
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == CONTENT_TYPE
+    text = response.text
+    route = {"method": "GET", "route": "/financial_records/{record_id}"}
+    assert sample_value(text, "http_requests_total", **route, status=200) >= 2
+    assert sample_value(text, "http_request_db_seconds_count", **route) >= 2
+    assert sample_value(text, "http_requests_total", method="GET", route=UNMATCHED_ROUTE, status=404) >= 1
+    # 实际路径不会成为标签
+    assert f"/financial_records/{record_id}" not in text
+    assert "/no/such/path" not in text
+    assert sample_value(text, "db_pool_connections", pool="read", state="in_use") is not None
+
+
+def test_metrics_token(client, monkeypatch):
+    monkeypatch.setattr(app, "METRICS_TOKEN", "secret-token")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    response = client.get("/metrics", headers={"Authorization": "Bearer secret-token"})
+    assert response.status_code == 200
+    assert "http_requests_total" in response.text
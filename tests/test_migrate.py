@@ -0,0 +1,78 @@
+"""数据库迁移：按版本号执行一次，重复执行不做任何事，失败的脚本整体回滚"""
+
+import sqlite3
+
+import pytest
+
+import migrate as migrate_module
+from conftest import create_database
+from migrate import MigrationError, current_version, list_migrations, migrate
+
+
+def schema(conn):
+    return conn.execute("SELECT type, name, sql FROM sqlite_master ORDER BY type, name").fetchall()
+
+
+@pytest.fixture
+def fresh_conn(tmp_path):
+    path = str(tmp_path / "fresh.db")
+    create_database(path)
+    conn = sqlite3.connect(path)
+    yield conn
+    conn.close()
+
+
+def test_migrate_is_idempotent(fresh_conn):
+    migrations = list_migrations()
+    assert [version for version, _, _ in migrations] == list(range(1, len(migrations) + 1))
+
+    executed = migrate(fresh_conn)
+    assert executed == [(version, name) for version, name, _ in migrations]
+    assert current_version(fresh_conn) == len(migrations)
+    before = schema(fresh_conn)
+
+    assert migrate(fresh_conn) == []
+    assert schema(fresh_conn) == before
+    assert fresh_conn.execute("SELECT COUNT(*) FROM schema_version").fetchone()[0] == len(migrations)
+
+    indexes = {row[0] for row in fresh_conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {"idx_business_events_created_at", "idx_business_events_status_created",
+            "idx_financial_records_event", "idx_approvals_pending"} <= indexes
+    # 0002 删除了只为前缀查询准备的索引
+    assert "idx_business_events_project_code" not in indexes
+
+
+def test_code_sequences_seeded_from_existing_codes(fresh_conn):
+    # 执行迁移之前已有事务编号（含不符合格式的手工编号）的数据库
+    fresh_conn.executemany(
+        "INSERT INTO business_events (event_type, project_name, project_code, amount, event_date, "
+        "department_id, created_by) VALUES ('销售', '历史', ?, 1, '2025-01-02', 3, 1)",
+        [("XS-20250102-0001",), ("XS-20250102-0007",), ("CG-20250102-0003",), ("手工编号",)],
+    )
+    fresh_conn.commit()
+    migrate(fresh_conn)
+
+    rows = fresh_conn.execute("SELECT prefix, seq_date, last_value FROM code_sequences ORDER BY prefix").fetchall()
+    assert rows == [("CG", "20250102", 3), ("XS", "20250102", 7)]
+
+
+def test_failed_migration_rolls_back(fresh_conn, tmp_path, monkeypatch):
+    migrations_dir = tmp_path / "migrations"
+    migrations_dir.mkdir()
+    (migrations_dir / "0001_good.sql").write_text("CREATE TABLE good (id INTEGER);", encoding="utf-8")
+    (migrations_dir / "0002_bad.sql").write_text(
+        "CREATE TABLE partial (id INTEGER);\nINSERT INTO missing_table VALUES (1);", encoding="utf-8")
+    (migrations_dir / "notes.txt").write_text("不是迁移脚本", encoding="utf-8")
+    monkeypatch.setattr(migrate_module, "MIGRATIONS_DIR", str(migrations_dir))
+
+    with pytest.raises(MigrationError):
+        migrate(fresh_conn)
+    assert current_version(fresh_conn) == 1
+    tables = {row[0] for row in fresh_conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert "good" in tables and "partial" not in tables
+
+    # 修复脚本后从失败的版本继续
+    (migrations_dir / "0002_bad.sql").write_text("CREATE TABLE partial (id INTEGER);", encoding="utf-8")
+    assert migrate(fresh_conn) == [(2, "bad")]
+    assert migrate(fresh_conn) == []
+
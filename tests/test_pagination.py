@@ -0,0 +1,73 @@
+"""键集分页：逐页翻完与一次取完的结果一致，created_at 相同的行以 id 区分，不重复也不遗漏"""
+
+import pytest
+from fastapi import HTTPException
+
+from conftest import collect_pages
+from pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    values = ["2025-06-15 10:00:00", 42]
+    assert decode_cursor(encode_cursor(values), 2) == values
+
+
+@pytest.mark.parametrize("token", [
+    "%%%", "bm90IGpzb24", encode_cursor({"id": 1}), encode_cursor([1]),
+    encode_cursor([{}, 1]), encode_cursor([[1], 2]),
+])
+def test_invalid_cursor_rejected(token):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(token, 2)
+    assert error.value.status_code == 400
+
+
+def test_pages_match_single_query(client, auth_headers):
+    # 批量创建的事件 created_at 大多相同，翻页依赖 id 作为第二排序键
+    events = [{
+        "event_type": "报销", "project_name": f"分页{i}", "amount": 100.0 + i,
+        "event_date": "2025-06-15", "department_id": 3, "created_by": 1,
+    } for i in range(23)]
+    response = client.post("/business_events/bulk", json={"events": events}, headers=auth_headers)
+    assert response.status_code == 200, response.text
+
+    response = client.get("/business_events", params={"limit": 1000, "with_total": True}, headers=auth_headers)
+    everything = response.json()
+    assert everything["next_cursor"] is None
+    assert everything["total"] == len(everything["items"])
+
+    items, pages = collect_pages(client, auth_headers, "/business_events", 4)
+    assert [item["id"] for item in items] == [item["id"] for item in everything["items"]]
+    assert pages == -(-len(items) // 4)
+
+    keys = [(item["created_at"], item["id"]) for item in items]
+    assert keys == sorted(keys, reverse=True)
+    assert len(set(keys)) == len(keys)
+
+
+def test_pages_with_filters(client, auth_headers):
+    for i in range(5):
+        client.post("/business_events", json={
+            "event_type": "合同", "project_name": f"分页合同{i}", "amount": 500.0,
+            "event_date": "2025-07-01", "department_id": 3, "created_by": 1,
+        }, headers=auth_headers)
+
+    expected = client.get("/business_events", params={"event_type": "合同", "limit": 1000},
+                          headers=auth_headers).json()["items"]
+    items, _ = collect_pages(client, auth_headers, "/business_events", 2, event_type="合同")
+    assert [item["id"] for item in items] == [item["id"] for item in expected]
+    assert {item["event_type"] for item in items} == {"合同"}
+
+
+def test_invalid_cursor_returns_400(client, auth_headers):
+    response = client.get("/business_events", params={"cursor": "not-a-cursor"}, headers=auth_headers)
+    assert response.status_code == 400
+    response = client.get("/business_events", params={"cursor": encode_cursor([1, 2, 3])}, headers=auth_headers)
+    assert response.status_code == 400
+    for values in ([{}, 1], [[1], 2]):
+        response = client.get("/business_events", params={"cursor": encode_cursor(values)}, headers=auth_headers)
+        assert response.status_code == 400
+        assert response.json()["detail"] == "无效的分页游标"
+    # 空值与浮点数可以绑定，只是匹配不到行
+    response = client.get("/business_events", params={"cursor": encode_cursor([None, 1.5])}, headers=auth_headers)
+    assert response.status_code == 200
@@ -0,0 +1,123 @@
+"""财务记录入账：单条与批量入账返回的id对应本次插入的记录"""
+
+import asyncio
+import sqlite3
+import threading
+
+import httpx
+
+from conftest import TEST_DB_PATH, create_event
+
+
+def approved_events(client, headers, db_conn, count):
+    """创建 count 个已审批的业务事件"""
+    event_ids = [create_event(client, headers, project_name=f"入账测试{i}") for i in range(count)]
+    db_conn.executemany("UPDATE business_events SET status = '已审批' WHERE id = ?", [(i,) for i in event_ids])
+    db_conn.commit()
+    return event_ids
+
+
+def record_body(event_id, amount=100.0):
+    return {
+        "business_event_id": event_id, "account_code": "6001", "account_name": "办公费用",
+        "amount": amount, "direction": "支出", "record_date": "2025-06-15",
+        "fiscal_year": 2025, "fiscal_period": 6, "description": "测试", "created_by": 1,
+    }
+
+
+def assert_records(db_conn, expected):
+    """expected: {记录id: (业务事件id, 金额)}"""
+    rows = db_conn.execute(
+        f"SELECT id, business_event_id, amount FROM financial_records WHERE id IN ({','.join('?' * len(expected))})",
+        list(expected),
+    ).fetchall()
+    assert {row["id"]: (row["business_event_id"], row["amount"]) for row in rows} == expected
+
+
+def test_single_posting_returns_its_record(client, auth_headers, db_conn):
+    event_id, = approved_events(client, auth_headers, db_conn, 1)
+    response = client.post("/financial_records", json=record_body(event_id, 123.45), headers=auth_headers)
+    assert response.status_code == 200, response.text
+    assert_records(db_conn, {response.json()["id"]: (event_id, 123.45)})
+
+
+def test_bulk_posting_returns_ids_in_row_order(client, auth_headers, db_conn):
+    event_ids = approved_events(client, auth_headers, db_conn, 3)
+    rows = [record_body(event_id, 10.0 + i) for i, event_id in enumerate(event_ids)]
+    rows.insert(1, record_body(999999))
+    response = client.post("/financial_records/bulk", json={"records": rows}, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    results = response.json()["results"]
+    assert [result["success"] for result in results] == [True, False, True, True]
+    assert_records(db_conn, {
+        result["id"]: (row["business_event_id"], row["amount"])
+        for result, row in zip(results, rows) if result["success"]
+    })
+
+
+def test_invalid_direction_rejected_by_both_paths(client, auth_headers, db_conn):
+    event_id, = approved_events(client, auth_headers, db_conn, 1)
+    body = dict(record_body(event_id), direction="支岀")
+
+    response = client.post("/financial_records", json=body, headers=auth_headers)
+    assert response.status_code == 422
+    response = client.post("/financial_records/bulk", json={"records": [body, record_body(event_id)]},
+                           headers=auth_headers)
+    results = response.json()["results"]
+    assert [result["success"] for result in results] == [False, True]
+    assert "只能是收入或支出" in results[0]["error"]
+    count = db_conn.execute("SELECT COUNT(*) FROM financial_records WHERE business_event_id = ?", (event_id,))
+    assert count.fetchone()[0] == 1
+
+
+def test_concurrent_postings_return_their_own_records(client, auth_headers, db_conn):
+    import app
+
+    event_ids = approved_events(client, auth_headers, db_conn, 40)
+
+    async def run():
+        transport = httpx.ASGITransport(app=app.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            return await asyncio.gather(*[
+                http.post("/financial_records", json=record_body(event_id, float(i)), headers=auth_headers)
+                for i, event_id in enumerate(event_ids)
+            ])
+
+    responses = asyncio.run(run())
+    assert all(response.status_code == 200 for response in responses)
+    assert_records(db_conn, {
+        response.json()["id"]: (event_id, float(i))
+        for i, (event_id, response) in enumerate(zip(event_ids, responses))
+    })
+
+
+def test_post_records_takes_write_lock_before_reading_max_id(client, auth_headers, db_conn):
+    """不经过 Database.write，直接在各自的连接（默认延迟事务）上并发入账"""
+    from app import FinancialRecord
+    from posting import post_records
+
+    event_ids = approved_events(client, auth_headers, db_conn, 4)
+    returned = {}
+    errors = []
+
+    def worker(event_id):
+        conn = sqlite3.connect(TEST_DB_PATH, timeout=30)
+        try:
+            for i in range(25):
+                record = FinancialRecord.model_validate(record_body(event_id, float(i)))
+                ids = post_records(conn, [(record, 3)], 1)
+                conn.commit()
+                returned[ids[0]] = (event_id, float(i))
+        except Exception as e:
+            errors.append(e)
+        finally:
+            conn.close()
+
+    threads = [threading.Thread(target=worker, args=(event_id,)) for event_id in event_ids]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert len(returned) == 100
+    assert_records(db_conn, returned)
@@ -0,0 +1,69 @@
+"""SQL性能分析：语句归一化与执行计划中全表扫描的识别"""
+
+from profiler import SQLProfiler, find_full_scans, normalize_sql
+
+TABLES = {"business_events", "financial_records", "approvals", "approval_configs", "users"}
+
+
+def plan_of(conn, sql, params=()):
+    return [row["detail"] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+
+def test_normalize_sql():
+    assert normalize_sql("SELECT * FROM t WHERE a = 'x''y' AND b = 12\n  AND c IN (?, ?, ?)") == \
+        "SELECT * FROM t WHERE a = ? AND b = ? AND c IN (?, ...)"
+    assert normalize_sql("INSERT INTO t VALUES (?, ?), (?, ?), (?, ?)") == "INSERT INTO t VALUES (?, ?), ..."
+
+
+def test_recorded_plans():
+    """SQLite 3.40 输出的执行计划（别名、按索引顺序扫描、CTE、子查询、虚拟表）"""
+    cases = [
+        ("SELECT be.* FROM business_events be WHERE be.description LIKE ?",
+         ["SCAN be"], ["business_events"]),
+        ("SELECT be.* FROM business_events be ORDER BY be.created_at DESC, be.id DESC LIMIT ?",
+         ["SCAN be USING INDEX idx_business_events_created_at"], []),
+        ("SELECT * FROM approval_configs WHERE is_active = 1 ORDER BY event_type, department_id, approval_level",
+         ["SCAN approval_configs USING INDEX idx_approval_configs_route"], []),
+        ("SELECT COUNT(*) FROM financial_records",
+         ["SCAN financial_records USING COVERING INDEX idx_financial_records_created_at"], []),
+        ("SELECT a.id FROM approvals AS a JOIN users u ON u.id = a.approver_id WHERE a.comment = ?",
+         ["SCAN a", "SEARCH u USING INTEGER PRIMARY KEY (rowid=?)"], ["approvals"]),
+        ("WITH page AS (SELECT * FROM business_events ORDER BY id DESC LIMIT ?) SELECT p.* FROM page p",
+         ["CO-ROUTINE page", "SCAN business_events", "SCAN p"], ["business_events"]),
+        ("SELECT * FROM (SELECT event_type, COUNT(*) c FROM business_events GROUP BY event_type) ORDER BY c",
+         ["CO-ROUTINE (subquery-1)",
+          "SCAN business_events USING COVERING INDEX idx_business_events_type_created",
+          "SCAN (subquery-1)", "USE TEMP B-TREE FOR ORDER BY"], []),
+        ("SELECT j.value FROM json_each(?) j", ["SCAN j VIRTUAL TABLE INDEX 1:"], []),
+        # 旧版本的格式
+        ("SELECT * FROM financial_records fr", ["SCAN TABLE financial_records AS fr"], ["financial_records"]),
+    ]
+    for sql, plan, expected in cases:
+        assert find_full_scans(plan, sql, TABLES) == expected, sql
+
+
+def test_plans_from_test_database(db_conn):
+    tables = {row[0] for row in db_conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+    sql = "SELECT be.* FROM business_events be WHERE be.description LIKE ?"
+    assert find_full_scans(plan_of(db_conn, sql, ("%x%",)), sql, tables) == ["business_events"]
+
+    sql = "SELECT be.* FROM business_events be WHERE be.status = ? ORDER BY be.created_at DESC LIMIT 10"
+    assert find_full_scans(plan_of(db_conn, sql, ("已审批",)), sql, tables) == []
+
+    sql = "SELECT * FROM approval_configs WHERE is_active = 1 ORDER BY event_type, department_id, approval_level"
+    assert find_full_scans(plan_of(db_conn, sql), sql, tables) == []
+
+
+def test_explain_top_marks_aliased_scans(db_conn):
+    profiler = SQLProfiler(slow_query_ms=10000)
+    scan_sql = "SELECT fr.* FROM financial_records fr WHERE fr.description = ?"
+    indexed_sql = "SELECT fr.* FROM financial_records fr WHERE fr.business_event_id = ?"
+    profiler.record(scan_sql, ("测试",), 0.002, 0)
+    profiler.record(indexed_sql, (1,), 0.001, 1)
+
+    profiler.explain_top(db_conn)
+    statements = {stats["sql"]: stats for stats in profiler.top()}
+    assert statements[normalize_sql(scan_sql)]["full_scans"] == ["financial_records"]
+    assert statements[normalize_sql(indexed_sql)]["full_scans"] == []
+    assert statements[normalize_sql(indexed_sql)]["plan"]
@@ -0,0 +1,159 @@
+"""预算对账：发现并更正与财务记录不一致的预算已用金额与预算执行汇总，重复执行不再有更正"""
+
+import pytest
+
+from conftest import make_record as record
+from posting import post_records
+from reconcile import JOB_NAME, reconcile_budgets
+
+DEPARTMENT_ID = 5
+
+
+def run(conn, **options):
+    """与命令行相同：试运行回滚，否则提交"""
+    result = reconcile_budgets(conn, **options)
+    if options.get("dry_run"):
+        conn.rollback()
+    else:
+        conn.commit()
+    return result
+
+
+def state(conn):
+    """预算已用金额与预算执行汇总（用于比较对账前后）"""
+    budgets = [tuple(row) for row in conn.execute("SELECT id, used_amount FROM budgets ORDER BY id")]
+    execution = [tuple(row) for row in conn.execute("""
+        SELECT department_id, account_code, year, month, expense_amount, income_amount, record_count
+        FROM budget_execution ORDER BY 1, 2, 3, 4
+    """)]
+    return budgets, execution
+
+
+def expense_total(conn, year, month):
+    return conn.execute("""
+        SELECT COALESCE(SUM(fr.amount), 0) FROM financial_records fr
+        JOIN business_events be ON fr.business_event_id = be.id
+        WHERE be.department_id = ? AND fr.fiscal_year = ? AND fr.fiscal_period = ? AND fr.direction = '支出'
+    """, (DEPARTMENT_ID, year, month)).fetchone()[0]
+
+
+def january_used(conn):
+    return conn.execute("SELECT used_amount FROM budgets WHERE department_id = ? AND year = 2030 AND month = 1",
+                        (DEPARTMENT_ID,)).fetchone()[0]
+
+
+def high_water_mark(conn):
+    row = conn.execute("SELECT last_id FROM job_high_water_marks WHERE job_name = ?", (JOB_NAME,)).fetchone()
+    return row[0] if row else None
+
+
+@pytest.fixture
+def conn(migrated_conn):
+    """部门5在2030年1-2月的预算与已入账的支出，并完成一次全量对账"""
+    conn = migrated_conn
+    event_id = conn.execute("""
+        INSERT INTO business_events (event_type, project_name, amount, event_date, department_id, created_by, status)
+        VALUES ('报销', '对账测试', 1000, '2030-01-05', ?, 1, '已审批')
+    """, (DEPARTMENT_ID,)).lastrowid
+    conn.executemany("""
+        INSERT INTO budgets (department_id, year, month, amount, used_amount) VALUES (?, 2030, ?, 10000, 0)
+    """, [(DEPARTMENT_ID, 1), (DEPARTMENT_ID, 2)])
+    conn.commit()
+    post_records(conn, [(record(code, "支出", amount, day, event_id), DEPARTMENT_ID) for code, amount, day in [
+        ("6001001", 300.0, "2030-01-05"), ("6001002", 200.0, "2030-01-20"), ("6001001", 50.0, "2030-02-03"),
+    ]], 1)
+    conn.commit()
+    run(conn, full=True)
+    return conn
+
+
+def test_consistent_after_posting(conn):
+    assert january_used(conn) == expense_total(conn, 2030, 1) == 500.0
+    for options in ({"full": True}, {}):
+        result = run(conn, **options)
+        assert (result["budgets_corrected"], result["execution_rows_corrected"]) == (0, 0)
+
+
+def test_drift_detected_and_repaired(conn):
+    with conn:
+        conn.execute("UPDATE budgets SET used_amount = 999 WHERE department_id = ? AND year = 2030 AND month = 1",
+                     (DEPARTMENT_ID,))
+        conn.execute("""
+            UPDATE budget_execution SET expense_amount = expense_amount + 1, record_count = 7
+            WHERE department_id = ? AND account_code = '6001001' AND year = 2030 AND month = 2
+        """, (DEPARTMENT_ID,))
+        conn.execute("""
+            INSERT INTO budget_execution (department_id, account_code, year, month,
+            expense_amount, income_amount, record_count) VALUES (?, '6602001', 2030, 1, 5, 0, 1)
+        """, (DEPARTMENT_ID,))
+    drifted = state(conn)
+    mark = high_water_mark(conn)
+
+    # 试运行只报告差异
+    report = run(conn, full=True, dry_run=True)
+    assert report["budgets_corrected"] == 1
+    assert report["execution_rows_corrected"] == 2
+    [correction] = report["corrections"]
+    assert (correction["used_amount"], correction["actual_amount"]) == (999, 500.0)
+    assert state(conn) == drifted
+    assert high_water_mark(conn) == mark
+
+    result = run(conn, full=True)
+    assert (result["budgets_corrected"], result["execution_rows_corrected"]) == (1, 2)
+    assert january_used(conn) == 500.0
+    row = conn.execute("""
+        SELECT expense_amount, record_count FROM budget_execution
+        WHERE department_id = ? AND account_code = '6001001' AND year = 2030 AND month = 2
+    """, (DEPARTMENT_ID,)).fetchone()
+    assert tuple(row) == (50.0, 1)
+    assert conn.execute("SELECT COUNT(*) FROM budget_execution WHERE account_code = '6602001'").fetchone()[0] == 0
+
+    # 再次执行没有更正
+    repaired = state(conn)
+    result = run(conn, full=True)
+    assert (result["budgets_corrected"], result["execution_rows_corrected"]) == (0, 0)
+    assert state(conn) == repaired
+
+
+def test_incremental_uses_high_water_mark(conn):
+    mark = high_water_mark(conn)
+    assert mark == conn.execute("SELECT MAX(id) FROM financial_records").fetchone()[0]
+
+    # 没有新增记录时不检查任何期间
+    with conn:
+        conn.execute("UPDATE budgets SET used_amount = 0 WHERE department_id = ? AND year = 2030", (DEPARTMENT_ID,))
+    result = run(conn)
+    assert (result["from_id"], result["to_id"], result["periods"], result["budgets_checked"]) == (mark, mark, 0, 0)
+
+    # 只在旁路写入财务记录（不经过入账逻辑），增量对账只处理新记录所在的期间（2030年2月）
+    event_id = conn.execute("SELECT business_event_id FROM financial_records WHERE id = ?", (mark,)).fetchone()[0]
+    with conn:
+        conn.execute("""
+            INSERT INTO financial_records (business_event_id, account_code, account_name, amount, direction,
+            record_date, fiscal_year, fiscal_period, created_by)
+            VALUES (?, '6001001', '办公费用', 25, '支出', '2030-02-10', 2030, 2, 1)
+        """, (event_id,))
+    result = run(conn)
+    assert result["periods"] == 1
+    assert result["budgets_corrected"] == 1
+    used = dict(conn.execute("SELECT month, used_amount FROM budgets WHERE department_id = ? AND year = 2030",
+                     (DEPARTMENT_ID,)))
+    assert used == {1: 0, 2: expense_total(conn, 2030, 2)} and used[2] == 75.0
+    assert high_water_mark(conn) == mark + 1
+
+    # 1月的差异只有全量对账才能发现
+    result = run(conn, full=True)
+    assert result["budgets_corrected"] == 1
+    assert run(conn, full=True)["budgets_corrected"] == 0
+
+
+def test_reconciliation_endpoint(client, auth_headers):
+    response = client.post("/system/budget_reconciliation", params={"dry_run": True, "full": True},
+                           headers=auth_headers)
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert (body["mode"], body["dry_run"]) == ("full", True)
+
+    response = client.post("/token", data={"username": "lisi", "password": "password123"})
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    assert client.post("/system/budget_reconciliation", headers=headers).status_code == 403
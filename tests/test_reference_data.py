@@ -0,0 +1,109 @@
+"""参考数据条件请求：ETag / Last-Modified 未变化时返回 304，数据变化后返回新版本"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from reference_data import http_date, settled
+
+REFERENCE_PATHS = ["/departments", "/customers", "/account_subjects"]
+TABLES = {"/departments": "departments", "/customers": "customers", "/account_subjects": "account_subjects"}
+
+
+def set_updated_at(db_conn, table_name, modifier):
+    """改写版本号的更新时间（相对当前时间），模拟更早或刚刚发生的写入"""
+    with db_conn:
+        db_conn.execute("UPDATE table_versions SET updated_at = datetime('now', ?) WHERE table_name = ?",
+                        (modifier, table_name))
+
+
+@pytest.mark.parametrize("path", REFERENCE_PATHS)
+def test_if_none_match(client, auth_headers, path):
+    response = client.get(path, headers=auth_headers)
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"] == "no-cache"
+    assert isinstance(response.json(), list)
+
+    for if_none_match in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+        cached = client.get(path, headers={**auth_headers, "If-None-Match": if_none_match})
+        assert cached.status_code == 304, if_none_match
+        assert cached.content == b""
+        assert cached.headers["etag"] == etag
+
+    stale = client.get(path, headers={**auth_headers, "If-None-Match": '"other"'})
+    assert stale.status_code == 200
+    assert stale.json() == response.json()
+
+
+@pytest.mark.parametrize("path", REFERENCE_PATHS)
+def test_if_modified_since(client, auth_headers, db_conn, path):
+    set_updated_at(db_conn, TABLES[path], "-1 minute")
+    response = client.get(path, headers=auth_headers)
+    last_modified = response.headers["last-modified"]
+
+    cached = client.get(path, headers={**auth_headers, "If-Modified-Since": last_modified})
+    assert cached.status_code == 304
+
+    for if_modified_since in ("Mon, 01 Jan 1990 00:00:00 GMT", "not a date"):
+        response = client.get(path, headers={**auth_headers, "If-Modified-Since": if_modified_since})
+        assert response.status_code == 200
+
+    # If-None-Match 优先：ETag 不匹配时忽略 If-Modified-Since
+    response = client.get(path, headers={**auth_headers, "If-None-Match": '"other"',
+                                         "If-Modified-Since": last_modified})
+    assert response.status_code == 200
+
+
+def test_change_produces_new_etag(client, auth_headers, db_conn):
+    response = client.get("/customers", headers=auth_headers)
+    etag = response.headers["etag"]
+
+    with db_conn:
+        db_conn.execute("INSERT INTO customers (name, code) VALUES (?, ?)", ("条件请求测试客户", "ETAG-TEST"))
+
+    changed = client.get("/customers", headers={**auth_headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert "ETAG-TEST" in [customer["code"] for customer in changed.json()]
+
+    cached = client.get("/customers", headers={**auth_headers, "If-None-Match": changed.headers["etag"]})
+    assert cached.status_code == 304
+
+
+def test_settled():
+    now = datetime.now(timezone.utc)
+    assert settled((now - timedelta(seconds=2)).strftime("%Y-%m-%d %H:%M:%S"))
+    assert not settled((now + timedelta(seconds=2)).strftime("%Y-%m-%d %H:%M:%S"))
+
+
+def test_same_second_write_not_served_as_not_modified(client, auth_headers, db_conn):
+    # 把更新时间设为尚未结束的一秒，模拟读取与随后的写入发生在同一秒内
+    current_second = (datetime.now(timezone.utc) + timedelta(seconds=30)).strftime("%Y-%m-%d %H:%M:%S")
+
+    def write_in_current_second(sql, params=()):
+        with db_conn:
+            db_conn.execute(sql, params)
+            db_conn.execute("UPDATE table_versions SET updated_at = ? WHERE table_name = 'customers'",
+                            (current_second,))
+
+    write_in_current_second("UPDATE customers SET name = name WHERE id = 1")
+    response = client.get("/customers", headers=auth_headers)
+    assert response.status_code == 200
+    # 这一秒内还可能有写入，Last-Modified 不可靠，只返回 ETag
+    assert "last-modified" not in response.headers
+    etag = response.headers["etag"]
+
+    write_in_current_second("INSERT INTO customers (name, code) VALUES (?, ?)", ("同一秒写入客户", "SAME-SECOND"))
+    if_modified_since = http_date(current_second)
+    for headers in ({"If-Modified-Since": if_modified_since}, {"If-None-Match": etag}):
+        changed = client.get("/customers", headers={**auth_headers, **headers})
+        assert changed.status_code == 200, headers
+        assert changed.headers["etag"] != etag
+        assert "SAME-SECOND" in [customer["code"] for customer in changed.json()]
+
+    # 这一秒过去之后才返回 Last-Modified，并据此返回 304
+    set_updated_at(db_conn, "customers", "-1 minute")
+    response = client.get("/customers", headers=auth_headers)
+    cached = client.get("/customers", headers={**auth_headers, "If-Modified-Since": response.headers["last-modified"]})
+    assert cached.status_code == 304
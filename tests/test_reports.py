@@ -0,0 +1,105 @@
+"""报表执行：只允许读取、超时中断、行数截断，结果按所读表的版本号缓存"""
+
+import pytest
+
+from reports import ReportError, ReportTimeoutError, report_cache, run_report
+
+
+def add_report(conn, sql, is_active=1):
+    report_id = conn.execute("""
+        INSERT INTO report_configs (report_name, report_type, sql_query, created_by, is_active)
+        VALUES ('测试报表', '预算', ?, 1, ?)
+    """, (sql, is_active)).lastrowid
+    conn.commit()
+    return report_id
+
+
+@pytest.fixture
+def conn(migrated_conn):
+    report_cache.clear()
+    yield migrated_conn
+    report_cache.clear()
+
+
+def test_cached_until_referenced_table_changes(conn):
+    report_id = add_report(conn, """
+        SELECT b.year, COUNT(*) AS budgets FROM budgets b JOIN departments d ON d.id = b.department_id
+        WHERE b.year = :year GROUP BY b.year
+    """)
+    first = run_report(conn, report_id, {"year": 2031})
+    assert (first["cached"], first["rows"], first["tables"]) == (False, [], ["budgets", "departments"])
+
+    second = run_report(conn, report_id, {"year": 2031})
+    assert second["cached"] and second["rows"] == first["rows"]
+    # 不同参数单独缓存
+    assert not run_report(conn, report_id, {"year": 2032})["cached"]
+
+    # 写入报表读取的表后版本号变化，缓存不再命中
+    conn.execute("INSERT INTO budgets (department_id, year, month, amount) VALUES (3, 2031, 1, 100)")
+    conn.commit()
+    third = run_report(conn, report_id, {"year": 2031})
+    assert not third["cached"]
+    assert third["rows"] == [{"year": 2031, "budgets": 1}]
+    assert run_report(conn, report_id, {"year": 2031})["cached"]
+
+    # 写入无关的表不影响缓存
+    conn.execute("INSERT INTO customers (name, code) VALUES ('报表测试', 'REPORT-TEST')")
+    conn.commit()
+    assert run_report(conn, report_id, {"year": 2031})["cached"]
+
+
+def test_table_without_version_not_cached(conn):
+    report_id = add_report(conn, "SELECT COUNT(*) AS reports FROM report_configs")
+    assert not run_report(conn, report_id, {})["cached"]
+    assert not run_report(conn, report_id, {})["cached"]
+
+
+@pytest.mark.parametrize("sql", [
+    "DELETE FROM budgets",
+    "UPDATE budgets SET used_amount = 0",
+    "INSERT INTO customers (name) VALUES ('x')",
+    "ATTACH DATABASE ':memory:' AS other",
+    "PRAGMA table_info(budgets)",
+    "SELECT * FROM budgets; DELETE FROM budgets",
+])
+def test_disallowed_statements_refused(conn, sql):
+    count = conn.execute("SELECT COUNT(*) FROM budgets").fetchone()[0]
+    report_id = add_report(conn, sql)
+    with pytest.raises(ReportError):
+        run_report(conn, report_id, {})
+    assert conn.execute("SELECT COUNT(*) FROM budgets").fetchone()[0] == count
+    assert conn.execute("PRAGMA database_list").fetchall()[-1]["name"] == "main"
+
+
+def test_timeout_and_row_limit(conn):
+    report_id = add_report(conn, """
+        WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 100000000)
+        SELECT SUM(i) FROM n
+    """)
+    with pytest.raises(ReportTimeoutError):
+        run_report(conn, report_id, {}, timeout=0.05)
+
+    report_id = add_report(conn, """
+        WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 50) SELECT i FROM n
+    """)
+    result = run_report(conn, report_id, {}, max_rows=10)
+    assert (result["row_count"], result["truncated"]) == (10, True)
+    assert run_report(conn, report_id, {}, max_rows=50)["truncated"] is False
+
+
+def test_inactive_report(conn):
+    assert run_report(conn, add_report(conn, "SELECT 1", is_active=0), {}) is None
+
+
+def test_report_endpoint(client, auth_headers, db_conn):
+    report_id = add_report(db_conn, "DELETE FROM budgets")
+    response = client.post(f"/reports/{report_id}/run", headers=auth_headers)
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("报表执行失败")
+
+    report_id = add_report(db_conn, "SELECT COUNT(*) AS n FROM budgets WHERE year = ?")
+    response = client.post(f"/reports/{report_id}/run", json={"params": [2023]}, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    response = client.post(f"/reports/{report_id}/run", json={"params": [[1]]}, headers=auth_headers)
+    assert response.status_code == 400
+    assert client.post("/reports/999999/run", headers=auth_headers).status_code == 404
@@ -0,0 +1,85 @@
+"""事务编号分配：格式、连续性、回滚，以及并发事务之间不重复"""
+
+import sqlite3
+import threading
+from datetime import date
+
+from conftest import TEST_DB_PATH, create_event
+from sequences import allocate_codes, event_type_prefix, format_code, next_code
+
+
+def connect():
+    conn = sqlite3.connect(TEST_DB_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def test_prefix_and_format():
+    assert [event_type_prefix(t) for t in ("销售", "采购", "合同", "报销", "其他")] == ["XS", "CG", "HT", "BX", "QT"]
+    assert format_code("XS", "20230615", 1) == "XS-20230615-0001"
+    assert format_code("XS", "20230615", 12345) == "XS-20230615-12345"
+
+
+def test_codes_are_consecutive(client):
+    conn = connect()
+    day = date(1999, 1, 1)
+    with conn:
+        assert next_code(conn, "销售", day) == "XS-19990101-0001"
+        assert allocate_codes(conn, "销售", 3, day) == [
+            "XS-19990101-0002", "XS-19990101-0003", "XS-19990101-0004"]
+        # 序号按 (类型缩写, 日期) 分别计数
+        assert next_code(conn, "采购", day) == "CG-19990101-0001"
+        assert next_code(conn, "销售", date(1999, 1, 2)) == "XS-19990102-0001"
+    conn.close()
+
+
+def test_rollback_releases_codes(client):
+    conn = connect()
+    day = date(1999, 2, 1)
+    conn.execute("BEGIN IMMEDIATE")
+    assert next_code(conn, "合同", day) == "HT-19990201-0001"
+    conn.rollback()
+    with conn:
+        assert next_code(conn, "合同", day) == "HT-19990201-0001"
+    conn.close()
+
+
+def test_concurrent_transactions_get_distinct_codes(client):
+    day = date(1999, 3, 1)
+    codes = []
+    lock = threading.Lock()
+    errors = []
+
+    def worker():
+        conn = connect()
+        try:
+            for _ in range(20):
+                conn.execute("BEGIN IMMEDIATE")
+                allocated = allocate_codes(conn, "报销", 5, day)
+                conn.commit()
+                with lock:
+                    codes.extend(allocated)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            conn.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert sorted(codes) == [format_code("BX", "19990301", seq) for seq in range(1, 6 * 20 * 5 + 1)]
+
+
+def test_created_events_have_unique_codes(client, auth_headers, db_conn):
+    ids = [create_event(client, auth_headers, event_type="销售", project_name=f"编号{i}") for i in range(5)]
+    rows = db_conn.execute(
+        f"SELECT project_code FROM business_events WHERE id IN ({','.join('?' * len(ids))}) ORDER BY id", ids
+    ).fetchall()
+    codes = [row["project_code"] for row in rows]
+    prefix, date_str, first = codes[0].split("-")
+    assert prefix == "XS"
+    assert codes == [format_code(prefix, date_str, seq) for seq in range(int(first), int(first) + len(ids))]
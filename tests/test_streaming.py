@@ -0,0 +1,80 @@
+"""流式导出：NDJSON 每行一个对象、JSON 数组分批拼接后仍是合法JSON，内容与分页列表一致"""
+
+import asyncio
+import json
+
+import pytest
+
+from conftest import collect_pages, create_event
+from responses import stream_response
+
+
+async def batches(*chunks):
+    for rows in chunks:
+        yield rows
+
+
+def render(response):
+    """收集 StreamingResponse 的全部输出"""
+    async def collect():
+        return b"".join([chunk async for chunk in response.body_iterator])
+    return asyncio.run(collect())
+
+
+CHUNKS = ([{"id": 1, "name": "差旅"}, {"id": 2, "name": None}], [{"id": 3, "name": "含\n换行与\"引号\""}])
+ROWS = [row for rows in CHUNKS for row in rows]
+
+
+def test_ndjson_framing():
+    response = stream_response(batches(*CHUNKS), "ndjson")
+    assert response.media_type == "application/x-ndjson"
+    body = render(response)
+    assert body.endswith(b"\n")
+    lines = body.decode("utf-8").splitlines()
+    assert [json.loads(line) for line in lines] == ROWS
+
+
+@pytest.mark.parametrize("chunks", [CHUNKS, CHUNKS[:1], ()])
+def test_json_array_framing(chunks):
+    response = stream_response(batches(*chunks), "json")
+    assert response.media_type == "application/json"
+    assert json.loads(render(response)) == [row for rows in chunks for row in rows]
+
+
+@pytest.fixture(scope="module")
+def events(client, auth_headers):
+    """保证有足够的业务事件，其中一条描述含换行"""
+    ids = [create_event(client, auth_headers, project_name=f"流式导出{i}", description="第一行\n第二行")
+           for i in range(5)]
+    return ids
+
+
+@pytest.mark.parametrize("path", ["/business_events", "/financial_records"])
+@pytest.mark.parametrize("output_format", ["ndjson", "json"])
+def test_stream_matches_list(client, auth_headers, events, path, output_format):
+    response = client.get(f"{path}/stream", params={"format": output_format}, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    if output_format == "ndjson":
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        rows = [json.loads(line) for line in response.text.splitlines()]
+    else:
+        assert response.headers["content-type"].startswith("application/json")
+        rows = response.json()
+
+    # 与分页列表的行及顺序一致（列表另外附带关联信息）
+    items, _ = collect_pages(client, auth_headers, path, 50)
+    assert [row["id"] for row in rows] == [item["id"] for item in items]
+    for row, item in zip(rows, items):
+        assert row.items() <= item.items()
+
+
+def test_stream_filters(client, auth_headers, events):
+    response = client.get("/business_events/stream", params={"keyword": "流式导出"}, headers=auth_headers)
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(row["id"] for row in rows) == sorted(events)
+    assert all(row["description"] == "第一行\n第二行" for row in rows)
+
+
+def test_stream_rejects_unknown_format(client, auth_headers):
+    response = client.get("/business_events/stream", params={"format": "csv"}, headers=auth_headers)
+    assert response.status_code == 422
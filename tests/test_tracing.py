@@ -0,0 +1,110 @@
+"""请求轨迹：查询参数与请求体只保留结构与可公开的值，令牌、用户名、密码不会写入轨迹文件"""
+
+import json
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from tracing import (
+    OTHER_CLIENT, TraceMiddleware, TraceWriter, anonymize_query, anonymize_value, body_shape,
+)
+
+SECRET_TOKEN = "eyJhbGciOiJIUzI1NiJ9.secret-payload.signature"
+NOTE = "客户张三的手机号13800000000"
+
+
+@pytest.mark.parametrize("key, value, expected", [
+    ("status", "已审批", "已审批"),
+    ("format", "ndjson", "ndjson"),
+    ("department_id", "3", "3"),
+    ("amount_min", "-12.5", "-12.5"),
+    ("date_from", "2025-06-15", "2025-06-15"),
+    ("cursor_at", "2025-06-15 10:00:00", "2025-06-15 10:00:00"),
+    ("with_total", "true", "true"),
+    ("keyword", "张三的报销", {"str": 5}),
+    ("cursor", "WyIyMDI1Il0", {"str": 11}),
+    ("project_code", "3.1.4", {"str": 5}),
+])
+def test_anonymize_value(key, value, expected):
+    assert anonymize_value(key, value) == expected
+
+
+def test_anonymize_query_keeps_order_and_duplicates():
+    query = "keyword=%E5%BC%A0%E4%B8%89&limit=50&status=&keyword=x&fiscal_year=2025"
+    assert anonymize_query(query) == [
+        ["keyword", {"str": 2}], ["limit", "50"], ["status", ""], ["keyword", {"str": 1}], ["fiscal_year", "2025"],
+    ]
+
+
+def test_body_shape():
+    body = json.dumps({
+        "records": [{"account_code": "6001001", "amount": 100.5, "direction": "支出", "business_event_id": 7}],
+        "dry_run": True, "note": None, "tags": [],
+    }).encode()
+    assert body_shape("application/json", body) == {
+        "records": {"list": 1, "item": {
+            "account_code": {"str": 7}, "amount": "float", "direction": {"str": 2}, "business_event_id": "int",
+        }},
+        "dry_run": "bool", "note": None, "tags": {"list": 0, "item": None},
+    }
+    # 登录表单只保留字段名与长度
+    assert body_shape("application/x-www-form-urlencoded", b"username=admin&password=admin123") == {
+        "username": {"str": 5}, "password": {"str": 8},
+    }
+    assert body_shape("application/json", b"{not json") == {"bytes": 9}
+    assert body_shape("application/octet-stream", b"\x00\x01") == {"bytes": 2}
+    assert body_shape("application/json", 5 * 1024 * 1024) == {"bytes": 5 * 1024 * 1024}
+    assert body_shape("application/json", b"") is None
+
+
+def test_client_ids(tmp_path, monkeypatch):
+    writer = TraceWriter(str(tmp_path / "trace.jsonl"))
+    assert writer._client(None) is None
+    assert writer._client(b"Bearer a") == "c1"
+    assert writer._client(b"Bearer b") == "c2"
+    assert writer._client(b"Bearer a") == "c1"
+    monkeypatch.setattr("tracing.TRACE_MAX_CLIENTS", 2)
+    assert writer._client(b"Bearer c") == OTHER_CLIENT
+
+
+def test_trace_file_has_no_secrets(tmp_path):
+    path = tmp_path / "trace.jsonl"
+    writer = TraceWriter(str(path))
+    app = FastAPI()
+    app.add_middleware(TraceMiddleware, writer=writer)
+
+    @app.post("/customers/{customer_id}/notes")
+    async def add_note(customer_id: int, request: Request):
+        return {"received": len(await request.body())}
+
+    @app.post("/token")
+    async def token(request: Request):
+        await request.body()
+        return {"access_token": SECRET_TOKEN}
+
+    writer.start()
+    with TestClient(app) as client:
+        client.post("/token", data={"username": "zhangsan", "password": "s3cret-pass"})
+        client.post("/customers/42/notes", params={"keyword": "华为技术有限公司", "limit": 10},
+                    json={"note": NOTE, "amount": 12.5},
+                    headers={"Authorization": f"Bearer {SECRET_TOKEN}"})
+        client.get("/not/a/route")
+    writer.stop()
+
+    text = path.read_text(encoding="utf-8")
+    for secret in (SECRET_TOKEN, "zhangsan", "s3cret-pass", "华为", "张三", "13800000000"):
+        assert secret not in text
+
+    # 未匹配路由的请求不记录
+    login, note = [json.loads(line) for line in text.splitlines()]
+    assert (login["method"], login["route"], login["status"], login["client"]) == ("POST", "/token", 200, None)
+    assert login["body"] == {"username": {"str": 8}, "password": {"str": 11}}
+    assert login["response_bytes"] > 0
+
+    assert note["route"] == "/customers/{customer_id}/notes"
+    assert note["path_params"] == {"customer_id": "42"}
+    assert note["query"] == [["keyword", {"str": 8}], ["limit", "10"]]
+    assert note["body"] == {"note": {"str": len(NOTE)}, "amount": "float"}
+    assert note["client"] == "c1"
+    assert 0 <= login["t"] <= note["t"]
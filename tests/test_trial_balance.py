@@ -0,0 +1,117 @@
+"""试算平衡：由科目余额检查点得到的期初余额、本期发生额与上级科目汇总，与直接按财务记录计算的结果一致"""
+
+import pytest
+
+from conftest import make_record as record
+from ledger import is_debit, trial_balance
+from posting import post_records
+
+
+def post(conn, *records):
+    post_records(conn, [(r, 3) for r in records], 1)
+    conn.commit()
+
+
+@pytest.fixture
+def ledger_conn(migrated_conn):
+    """示例数据（其财务记录由迁移初始化检查点）之后再入账几个期间"""
+    conn = migrated_conn
+    # 2030年1月：销售收款；2月：支付办公费用；3月：两笔收款
+    post(conn, record("1002001", "收入", 1000.0, "2030-01-10"), record("4001001", "收入", 1000.0, "2030-01-10"))
+    post(conn, record("1002001", "支出", 300.0, "2030-02-15"), record("6001001", "支出", 300.0, "2030-02-15"))
+    post(conn, record("1002002", "收入", 200.0, "2030-03-05"), record("4001002", "收入", 200.0, "2030-03-05"))
+    post(conn, record("1002002", "收入", 50.0, "2030-03-20"), record("4001002", "收入", 50.0, "2030-03-20"))
+    return conn
+
+
+def recompute(conn, fiscal_year, fiscal_period, as_of=None):
+    """直接扫描财务记录计算各科目（含上级汇总）的 (期初借-贷, 本期借, 本期贷)"""
+    parents = {row["code"]: row["parent_code"] for row in conn.execute("SELECT code, parent_code FROM account_subjects")}
+    result = {}
+    for row in conn.execute("SELECT * FROM financial_records"):
+        period = (row["fiscal_year"], row["fiscal_period"])
+        if period > (fiscal_year, fiscal_period):
+            continue
+        if period == (fiscal_year, fiscal_period) and as_of and row["record_date"] > as_of:
+            continue
+        debit = is_debit(row["account_code"], row["direction"])
+        code = row["account_code"]
+        while code is not None:
+            totals = result.setdefault(code, [0.0, 0.0, 0.0])
+            if period < (fiscal_year, fiscal_period):
+                totals[0] += row["amount"] if debit else -row["amount"]
+            else:
+                totals[1 if debit else 2] += row["amount"]
+            code = parents.get(code)
+    return result
+
+
+def by_code(balance):
+    return {account["account_code"]: account for account in balance["accounts"]}
+
+
+@pytest.mark.parametrize("fiscal_year, fiscal_period, as_of", [
+    (2023, 4, None), (2023, 9, None), (2030, 1, None), (2030, 2, None), (2030, 3, None), (2030, 3, "2030-03-10"),
+])
+def test_matches_records(ledger_conn, fiscal_year, fiscal_period, as_of):
+    balance = trial_balance(ledger_conn, fiscal_year, fiscal_period, as_of)
+    expected = recompute(ledger_conn, fiscal_year, fiscal_period, as_of)
+    accounts = by_code(balance)
+    assert set(accounts) == set(expected)
+    for code, (opening_net, period_debit, period_credit) in expected.items():
+        account = accounts[code]
+        sign = 1 if account["direction"] == "借" else -1
+        assert account["opening_balance"] == pytest.approx(sign * opening_net, abs=0.01), code
+        assert account["period_debit"] == pytest.approx(period_debit, abs=0.01), code
+        assert account["period_credit"] == pytest.approx(period_credit, abs=0.01), code
+        assert account["closing_balance"] == pytest.approx(
+            sign * (opening_net + period_debit - period_credit), abs=0.01), code
+    assert balance["balanced"]
+    assert balance["totals"]["period_debit"] == balance["totals"]["period_credit"]
+    assert balance["totals"]["closing_debit"] == balance["totals"]["closing_credit"]
+
+
+def test_opening_balance_carries_previous_closing(ledger_conn):
+    january = by_code(trial_balance(ledger_conn, 2030, 1))
+    february = by_code(trial_balance(ledger_conn, 2030, 2))
+    for code, account in january.items():
+        assert february[code]["opening_balance"] == account["closing_balance"], code
+
+    # 资产类科目收入记借方、支出记贷方；费用类支出记借方；上级科目包含下级科目
+    assert (february["1002001"]["period_debit"], february["1002001"]["period_credit"]) == (0.0, 300.0)
+    assert (february["6001001"]["period_debit"], february["6001001"]["period_credit"]) == (300.0, 0.0)
+    assert february["1002"]["period_credit"] == 300.0
+    assert february["6001"]["period_debit"] == 300.0
+    assert february["1002"]["closing_balance"] == pytest.approx(
+        february["1002001"]["closing_balance"] + february["1002002"]["closing_balance"])
+    # 收入类科目余额在贷方，以正数表示
+    assert january["4001001"]["closing_balance"] == january["4001001"]["opening_balance"] + 1000.0
+
+
+def test_as_of_and_account_filter(ledger_conn):
+    march = by_code(trial_balance(ledger_conn, 2030, 3, as_of="2030-03-10", account_code="1002"))
+    assert set(march) == {"1002", "1002001", "1002002"}
+    assert march["1002002"]["period_debit"] == 200.0
+    assert march["1002002"]["record_count"] == 1
+    assert march["1002"]["period_debit"] == 200.0
+
+    full = by_code(trial_balance(ledger_conn, 2030, 3, account_code="1002"))
+    assert full["1002002"]["period_debit"] == 250.0
+    assert full["1002002"]["record_count"] == 2
+
+
+def test_unbalanced_entry_detected(ledger_conn):
+    post(ledger_conn, record("6001001", "支出", 10.0, "2030-04-01"))
+    balance = trial_balance(ledger_conn, 2030, 4)
+    assert not balance["balanced"]
+    assert balance["totals"]["period_debit"] - balance["totals"]["period_credit"] == 10.0
+
+
+def test_trial_balance_endpoint(client, auth_headers):
+    response = client.get("/reports/trial_balance", headers=auth_headers)
+    assert response.status_code == 400
+    response = client.get("/reports/trial_balance", params={"as_of": "2023-04-30"}, headers=auth_headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["fiscal_year"], body["fiscal_period"], body["as_of"]) == (2023, 4, "2023-04-30")
+    assert body["balanced"]
@@ -0,0 +1,65 @@
+"""财务待处理队列：只返回已审批且没有财务记录的业务事件，由索引支持的反连接完成"""
+
+from conftest import create_event
+from filters import BusinessEventFilters
+from pagination import list_query
+
+import app
+
+
+def unposted_ids(client, headers, **params):
+    ids = []
+    cursor = None
+    while True:
+        query = dict(params, limit=50)
+        if cursor:
+            query["cursor"] = cursor
+        response = client.get("/business_events/unposted", params=query, headers=headers)
+        assert response.status_code == 200, response.text
+        body = response.json()
+        ids.extend(item["id"] for item in body["items"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return ids
+
+
+def test_unposted_queue(client, auth_headers, db_conn):
+    approved = [create_event(client, auth_headers, project_name=f"待入账{i}") for i in range(3)]
+    pending = create_event(client, auth_headers, project_name="待审批")
+    with db_conn:
+        db_conn.executemany("UPDATE business_events SET status = '已审批' WHERE id = ?", [(i,) for i in approved])
+
+    ids = unposted_ids(client, auth_headers)
+    assert set(approved) <= set(ids)
+    assert pending not in ids
+
+    response = client.post("/financial_records", json={
+        "business_event_id": approved[0], "account_code": "6001", "account_name": "办公费用",
+        "amount": 100.0, "direction": "支出", "record_date": "2025-06-15",
+        "fiscal_year": 2025, "fiscal_period": 6, "description": "测试", "created_by": 1,
+    }, headers=auth_headers)
+    assert response.status_code == 200, response.text
+
+    ids = unposted_ids(client, auth_headers)
+    assert approved[0] not in ids
+    assert set(approved[1:]) <= set(ids)
+
+    # 与列表接口相同的筛选条件
+    sales = create_event(client, auth_headers, event_type="销售", project_name="待入账销售")
+    with db_conn:
+        db_conn.execute("UPDATE business_events SET status = '已审批' WHERE id = ?", (sales,))
+    sales_ids = unposted_ids(client, auth_headers, event_type="销售")
+    assert sales in sales_ids
+    assert not set(approved) & set(sales_ids)
+
+
+def test_unposted_query_uses_indexes(client, db_conn):
+    filters = BusinessEventFilters(status="已审批").build()
+    filters.add("NOT EXISTS (SELECT 1 FROM financial_records fr WHERE fr.business_event_id = be.id)")
+    select_sql, from_sql, order_by = app.BUSINESS_EVENT_LIST
+    sql, params = list_query(select_sql, from_sql, filters, order_by)
+
+    plan = " | ".join(row["detail"] for row in db_conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+    assert "idx_business_events_status_created" in plan
+    assert "idx_financial_records_event" in plan
+    assert "SCAN fr" not in plan
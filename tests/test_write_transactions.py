@@ -0,0 +1,55 @@
+"""写事务：读取与写入处于同一写锁下，并发的“先查后改”不会同时通过检查"""
+
+import asyncio
+import time
+
+import httpx
+
+from conftest import create_event
+
+
+def test_check_then_write_is_serialized(client, auth_headers, db_conn):
+    import db
+
+    event_id = create_event(client, auth_headers)
+    approval_id = db_conn.execute(
+        "SELECT id FROM approvals WHERE business_event_id = ? ORDER BY approval_level LIMIT 1", (event_id,)
+    ).fetchone()["id"]
+
+    def approve_once(conn):
+        status = conn.execute("SELECT status FROM approvals WHERE id = ?", (approval_id,)).fetchone()[0]
+        # 拉长检查与写入之间的间隔，让两个写连接的检查重叠
+        time.sleep(0.2)
+        if status != "待审批":
+            return False
+        conn.execute("UPDATE approvals SET status = '已通过' WHERE id = ?", (approval_id,))
+        return True
+
+    async def run():
+        database = db.get_db()
+        return await asyncio.gather(database.write(approve_once), database.write(approve_once))
+
+    assert db.WRITE_POOL_SIZE >= 2
+    assert sorted(asyncio.run(run())) == [False, True]
+
+
+def test_concurrent_double_approval_is_rejected(client, auth_headers, db_conn):
+    import app
+
+    event_id = create_event(client, auth_headers)
+    approval_id = db_conn.execute(
+        "SELECT id FROM approvals WHERE business_event_id = ? ORDER BY approval_level LIMIT 1", (event_id,)
+    ).fetchone()["id"]
+
+    async def run():
+        transport = httpx.ASGITransport(app=app.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            return await asyncio.gather(*[
+                http.post(f"/approvals/{approval_id}/approve", headers=auth_headers) for _ in range(4)
+            ])
+
+    statuses = sorted(response.status_code for response in asyncio.run(run()))
+    assert statuses == [200, 400, 400, 400]
+    assert db_conn.execute(
+        "SELECT COUNT(*) FROM status_history WHERE business_event_id = ? AND remarks = '审批通过'", (event_id,)
+    ).fetchone()[0] == 1